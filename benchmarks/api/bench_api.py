@@ -0,0 +1,180 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import json
+
+import pytest
+
+from benchmarks.api.dataset import create_topic_with_subscriptions
+from subscription_manager import BASE_PATH
+from subscription_manager.auth import credentials_cache
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+def _check(response, status_code):
+    assert status_code == response.status_code, response.data
+
+
+def _post_subscription(client, auth, topic_name):
+    response = client.post(f'{BASE_PATH}/subscriptions/', data=json.dumps({'topics': [topic_name]}),
+                           content_type='application/json', headers=auth)
+    _check(response, 201)
+
+    return json.loads(response.data)['id']
+
+
+# ####
+# Auth
+# ####
+
+def bench_basic_auth__password_hash_check(benchmark, client, basic_auth):
+    def ping():
+        _check(client.get(f'{BASE_PATH}/ping-credentials', headers=basic_auth), 200)
+
+    benchmark.pedantic(ping, setup=credentials_cache.clear, rounds=50)
+
+
+def bench_basic_auth__cached_credentials(benchmark, client, basic_auth):
+    def ping():
+        _check(client.get(f'{BASE_PATH}/ping-credentials', headers=basic_auth), 200)
+
+    benchmark(ping)
+
+
+def bench_bearer_auth(benchmark, client, bearer_auth):
+    def ping():
+        _check(client.get(f'{BASE_PATH}/ping-credentials', headers=bearer_auth), 200)
+
+    benchmark(ping)
+
+
+# #######
+# Listing
+# #######
+
+@pytest.mark.parametrize('limit', [100, 1000])
+def bench_get_subscriptions(benchmark, client, basic_auth, limit):
+    def get_subscriptions():
+        _check(client.get(f'{BASE_PATH}/subscriptions/?limit={limit}', headers=basic_auth), 200)
+
+    benchmark(get_subscriptions)
+
+
+def bench_get_subscriptions__stream(benchmark, client, basic_auth):
+    def get_subscriptions():
+        _check(client.get(f'{BASE_PATH}/subscriptions/?stream=true', headers=basic_auth), 200)
+
+    benchmark(get_subscriptions)
+
+
+def bench_get_topics(benchmark, client, basic_auth):
+    def get_topics():
+        _check(client.get(f'{BASE_PATH}/topics/', headers=basic_auth), 200)
+
+    benchmark(get_topics)
+
+
+# ##########
+# Single GET
+# ##########
+
+def bench_get_subscription(benchmark, client, basic_auth, dataset):
+    def get_subscription():
+        _check(client.get(f'{BASE_PATH}/subscriptions/{dataset.subscription_id}', headers=basic_auth), 200)
+
+    benchmark(get_subscription)
+
+
+def bench_get_topic(benchmark, client, basic_auth, dataset):
+    def get_topic():
+        _check(client.get(f'{BASE_PATH}/topics/{dataset.topic_id}', headers=basic_auth), 200)
+
+    benchmark(get_topic)
+
+
+# ######################
+# Subscription mutations
+# ######################
+
+def bench_post_subscription(benchmark, client, basic_auth, dataset):
+    benchmark(_post_subscription, client, basic_auth, dataset.topic_name)
+
+
+def bench_post_subscriptions_bulk(benchmark, client, basic_auth, dataset):
+    data = json.dumps([{'topics': [dataset.topic_name]} for _ in range(100)])
+
+    def post_subscriptions():
+        _check(client.post(f'{BASE_PATH}/subscriptions/bulk', data=data, content_type='application/json',
+                           headers=basic_auth), 200)
+
+    benchmark(post_subscriptions)
+
+
+@pytest.mark.parametrize('active', [True, False], ids=['resume', 'pause'])
+def bench_put_subscription(benchmark, client, basic_auth, dataset, active):
+    subscription_id = _post_subscription(client, basic_auth, dataset.topic_name)
+    url = f'{BASE_PATH}/subscriptions/{subscription_id}'
+
+    def _put(state):
+        _check(client.put(url, data=json.dumps({'active': state}), content_type='application/json',
+                          headers=basic_auth), 200)
+
+    # each round changes the state (pause or resume of the broker bindings) instead of setting the current one again
+    def setup():
+        _put(not active)
+
+    benchmark.pedantic(_put, args=(active,), setup=setup, rounds=50)
+
+
+def bench_delete_subscription(benchmark, client, basic_auth, dataset):
+    def setup():
+        return (_post_subscription(client, basic_auth, dataset.topic_name),), {}
+
+    def delete_subscription(subscription_id):
+        _check(client.delete(f'{BASE_PATH}/subscriptions/{subscription_id}', headers=basic_auth), 204)
+
+    benchmark.pedantic(delete_subscription, setup=setup, rounds=50)
+
+
+# ######################
+# Topic deletion cascade
+# ######################
+
+def bench_delete_topic(benchmark, request, app, client, basic_auth, dataset):
+    topic_subscriptions = request.config.getoption('topic_subscriptions')
+
+    def setup():
+        with app.app_context():
+            return (create_topic_with_subscriptions(dataset.user_id, topic_subscriptions),), {}
+
+    def delete_topic(topic_id):
+        _check(client.delete(f'{BASE_PATH}/topics/{topic_id}', headers=basic_auth), 204)
+
+    benchmark.pedantic(delete_topic, setup=setup, rounds=10)
@@ -0,0 +1,98 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import pytest
+
+from benchmarks.api.dataset import Dataset, seed, PASSWORD, TOKEN
+from benchmarks.stub_broker import StubManagementAPI
+from subscription_manager.broker.fake import fake_broker
+from subscription_manager.app import create_app
+from tests.subscription_manager.utils import make_basic_auth_header, make_bearer_auth_header
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('api benchmarks')
+    group.addoption('--app-config', help='app config pointing to a scratch PostgreSQL DB: its data are truncated')
+    group.addoption('--users', type=int, default=100)
+    group.addoption('--topics', type=int, default=1000)
+    group.addoption('--subscriptions', type=int, default=100000)
+    group.addoption('--topic-subscriptions', type=int, default=100,
+                    help='number of subscriptions of the topic deleted in each round of the cascade benchmark')
+    group.addoption('--broker-latency', type=float, default=0.0,
+                    help='seconds the broker waits before answering each management API call')
+    group.addoption('--fake-broker', action='store_true',
+                    help='use the in memory fake broker instead of the stub management API over HTTP')
+
+
+@pytest.fixture(scope='session')
+def stub_broker(request):
+    with StubManagementAPI(latency=request.config.getoption('broker_latency')) as stub:
+        yield stub
+
+
+@pytest.fixture(scope='session')
+def app(request, stub_broker):
+    config_file = request.config.getoption('app_config')
+
+    if not config_file:
+        pytest.exit('--app-config is required: the DB it points to is truncated and seeded')
+
+    _app = create_app(config_file)
+    _app.config['BROKER'].update(host=stub_broker.host, https=False, fake=request.config.getoption('fake_broker'))
+    _app.config['OUTBOX']['enabled'] = False
+
+    fake_broker.reset()
+    fake_broker.configure(latency=request.config.getoption('broker_latency'))
+
+    return _app
+
+
+@pytest.fixture(scope='session')
+def dataset(request, app) -> Dataset:
+    with app.app_context():
+        return seed(users=request.config.getoption('users'),
+                    topics=request.config.getoption('topics'),
+                    subscriptions=request.config.getoption('subscriptions'))
+
+
+@pytest.fixture(scope='session')
+def client(app, dataset):
+    return app.test_client()
+
+
+@pytest.fixture(scope='session')
+def basic_auth(dataset):
+    return make_basic_auth_header(dataset.username, PASSWORD)
+
+
+@pytest.fixture(scope='session')
+def bearer_auth(dataset):
+    return make_bearer_auth_header(TOKEN)
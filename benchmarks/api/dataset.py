@@ -0,0 +1,109 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import typing as t
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import text
+from werkzeug.security import generate_password_hash
+
+from subscription_manager.db.utils import hash_token
+from swim_backend.db import db
+
+__author__ = "EUROCONTROL (SWIM)"
+
+PASSWORD = 'password'
+
+TOKEN = 'benchmark-token'
+
+
+class Dataset:
+    """
+    The ids of a few seeded rows the benchmarks work on; the user owns the topic and the subscription.
+    """
+
+    def __init__(self, user_id: int, username: str, topic_id: int, topic_name: str, subscription_id: int) -> None:
+        self.user_id = user_id
+        self.username = username
+        self.topic_id = topic_id
+        self.topic_name = topic_name
+        self.subscription_id = subscription_id
+
+
+def _execute(statements: t.List[str], **params) -> None:
+    for statement in statements:
+        db.session.execute(text(statement), params)
+    db.session.commit()
+
+
+def seed(users: int, topics: int, subscriptions: int) -> Dataset:
+    """
+    Replaces the data of the DB with the given number of users, topics and subscriptions (one topic each). All the
+    users share the same password and the first one owns a valid token.
+    """
+    _execute([
+        "TRUNCATE topic_subscriptions, subscriptions, topics, tokens, outbox, users RESTART IDENTITY CASCADE",
+        "INSERT INTO users (username, password, created_at, active, is_admin) "
+        "SELECT 'user' || i, :password, now(), true, false FROM generate_series(1, :users) AS i",
+        "INSERT INTO tokens (user_id, token_hash, created_at, expires_at, revoked) "
+        "VALUES (1, :token_hash, now(), :expires_at, false)",
+        "INSERT INTO topics (name, user_id) "
+        "SELECT 'topic' || i, 1 + (i - 1) % :users FROM generate_series(1, :topics) AS i",
+        "INSERT INTO subscriptions (user_id, queue, active, qos, durable) "
+        "SELECT 1 + (i - 1) % :users, md5(i::text), true, 'EXACTLY_ONCE', true "
+        "FROM generate_series(1, :subscriptions) AS i",
+        "INSERT INTO topic_subscriptions (topic_id, subscription_id) "
+        "SELECT 1 + (i - 1) % :topics, i FROM generate_series(1, :subscriptions) AS i",
+        "ANALYZE",
+    ], users=users, topics=topics, subscriptions=subscriptions, password=generate_password_hash(PASSWORD),
+        token_hash=hash_token(TOKEN), expires_at=datetime.utcnow() + timedelta(days=1))
+
+    # user1 owns topic1 and subscription1
+    return Dataset(user_id=1, username='user1', topic_id=1, topic_name='topic1', subscription_id=1)
+
+
+def create_topic_with_subscriptions(user_id: int, subscriptions: int) -> int:
+    """
+    Creates with a few statements a topic with the given number of subscriptions
+    :return: the id of the topic
+    """
+    topic_id = db.session.execute(text("INSERT INTO topics (name, user_id) VALUES (:name, :user_id) RETURNING id"),
+                                  {'name': uuid4().hex[:50], 'user_id': user_id}).scalar()
+
+    _execute([
+        "WITH created AS ("
+        "   INSERT INTO subscriptions (user_id, queue, active, qos, durable) "
+        "   SELECT :user_id, md5(random()::text || i::text), true, 'EXACTLY_ONCE', true "
+        "   FROM generate_series(1, :subscriptions) AS i RETURNING id"
+        ") "
+        "INSERT INTO topic_subscriptions (topic_id, subscription_id) SELECT :topic_id, id FROM created",
+    ], user_id=user_id, topic_id=topic_id, subscriptions=subscriptions)
+
+    return topic_id
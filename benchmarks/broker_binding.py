@@ -0,0 +1,93 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import argparse
+import statistics
+import time
+import uuid
+
+from flask import Flask
+
+from benchmarks.stub_broker import StubManagementAPI
+from subscription_manager.broker import broker
+
+__author__ = "EUROCONTROL (SWIM)"
+
+DESCRIPTION = """
+Measures the duration of broker.create_queue_for_topics against a stub management API with injected latency for
+increasing levels of concurrency (BROKER.max_concurrency).
+
+    python -m benchmarks.broker_binding --topics 50 --latency 0.02
+"""
+
+
+def _make_app(host: str, max_concurrency: int) -> Flask:
+    app = Flask(__name__)
+    app.config['BROKER'] = {
+        'host': host,
+        'https': False,
+        'username': 'guest',
+        'password': 'guest',
+        'cert_path': None,
+        'max_concurrency': max_concurrency
+    }
+    return app
+
+
+def run(topics: int, latency: float, repeat: int, concurrency_levels):
+    topic_names = [f'topic{i}' for i in range(topics)]
+
+    with StubManagementAPI(latency=latency) as stub:
+        print(f'{topics} topics, {latency * 1000:.0f}ms latency per call, median of {repeat} runs')
+
+        baseline = None
+        for max_concurrency in concurrency_levels:
+            app = _make_app(stub.host, max_concurrency)
+
+            durations = []
+            with app.app_context():
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    broker.create_queue_for_topics(uuid.uuid4().hex, topic_names)
+                    durations.append(time.perf_counter() - start)
+
+            median = statistics.median(durations)
+            baseline = baseline or median
+            print(f'max_concurrency={max_concurrency:<3} {median * 1000:8.1f}ms  x{baseline / median:.1f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=DESCRIPTION, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--topics', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.02, help='seconds per management API call')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    run(args.topics, args.latency, args.repeat, args.concurrency)
@@ -0,0 +1,142 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import argparse
+import statistics
+import time
+
+from sqlalchemy import text
+
+from subscription_manager.app import create_app
+from subscription_manager.db import subscriptions as subscriptions_db, topics as topics_db, Topic
+from swim_backend.db import db
+
+__author__ = "EUROCONTROL (SWIM)"
+
+DESCRIPTION = """
+Seeds a scratch DB with a large number of subscriptions and measures the latency of the owner filtered listings and of
+the topic -> subscriptions traversal, without and with the indexes of the user_id foreign keys and topic_subscriptions.
+
+    python -m benchmarks.owner_filtered_listing --config /path/to/scratch_db_config.yml --subscriptions 1000000
+
+The config has to point to a dedicated PostgreSQL DB: the indexes are dropped and recreated.
+"""
+
+DROP_INDEXES = [
+    "DROP INDEX IF EXISTS ix_topics_user_id",
+    "DROP INDEX IF EXISTS ix_subscriptions_user_id",
+    "DROP INDEX IF EXISTS ix_topic_subscriptions_subscription_id",
+    "ALTER TABLE topic_subscriptions DROP CONSTRAINT IF EXISTS topic_subscriptions_pkey",
+]
+
+CREATE_INDEXES = [
+    "CREATE INDEX ix_topics_user_id ON topics (user_id)",
+    "CREATE INDEX ix_subscriptions_user_id ON subscriptions (user_id)",
+    "ALTER TABLE topic_subscriptions ADD CONSTRAINT topic_subscriptions_pkey PRIMARY KEY (topic_id, subscription_id)",
+    "CREATE INDEX ix_topic_subscriptions_subscription_id ON topic_subscriptions (subscription_id)",
+]
+
+
+def _execute(statements, **params):
+    for statement in statements:
+        db.session.execute(text(statement), params)
+    db.session.commit()
+
+
+def seed(subscriptions: int, users: int, topics: int):
+    if db.session.execute(text("SELECT count(*) FROM subscriptions")).scalar() >= subscriptions:
+        return
+
+    print(f'Seeding {subscriptions} subscriptions of {users} users on {topics} topics...')
+    _execute([
+        "TRUNCATE topic_subscriptions, subscriptions, topics, tokens, outbox, users RESTART IDENTITY CASCADE",
+        "INSERT INTO users (username, password, created_at, active, is_admin) "
+        "SELECT 'user' || i, 'password', now(), true, false FROM generate_series(1, :users) AS i",
+        "INSERT INTO topics (name, user_id) "
+        "SELECT 'topic' || i, 1 + i % :users FROM generate_series(1, :topics) AS i",
+        "INSERT INTO subscriptions (user_id, queue, active, qos, durable) "
+        "SELECT 1 + i % :users, md5(i::text), true, 'EXACTLY_ONCE', true FROM generate_series(1, :subscriptions) AS i",
+        "INSERT INTO topic_subscriptions (topic_id, subscription_id) "
+        "SELECT 1 + i % :topics, i FROM generate_series(1, :subscriptions) AS i",
+    ], users=users, topics=topics, subscriptions=subscriptions)
+
+
+def _median_ms(func, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+        db.session.expire_all()
+
+    return statistics.median(durations) * 1000
+
+
+def measure(repeat: int, user_id: int, topic_id: int):
+    def topic_subscriptions():
+        return db.session.query(Topic).get(topic_id).subscriptions
+
+    return {
+        'get_subscriptions(user_id, limit=100)':
+            _median_ms(lambda: subscriptions_db.get_subscriptions(user_id=user_id, limit=100), repeat),
+        'get_topics(user_id)':
+            _median_ms(lambda: topics_db.get_topics(user_id=user_id), repeat),
+        'topic.subscriptions':
+            _median_ms(topic_subscriptions, repeat),
+    }
+
+
+def run(config_file: str, subscriptions: int, users: int, topics: int, repeat: int):
+    app = create_app(config_file)
+
+    with app.app_context():
+        seed(subscriptions, users, topics)
+
+        _execute(DROP_INDEXES + ["ANALYZE"])
+        before = measure(repeat, user_id=users // 2, topic_id=topics // 2)
+
+        _execute(CREATE_INDEXES + ["ANALYZE"])
+        after = measure(repeat, user_id=users // 2, topic_id=topics // 2)
+
+    print(f'{subscriptions} subscriptions, median of {repeat} runs')
+    print(f'{"":<42}{"before":>12}{"after":>12}')
+    for name in before:
+        print(f'{name:<42}{before[name]:>10.2f}ms{after[name]:>10.2f}ms')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=DESCRIPTION, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--config', required=True, help='app config pointing to a scratch PostgreSQL DB')
+    parser.add_argument('--subscriptions', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--topics', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    run(args.config, args.subscriptions, args.users, args.topics, args.repeat)
@@ -0,0 +1,148 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import argparse
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+import yaml
+
+__author__ = "EUROCONTROL (SWIM)"
+
+DESCRIPTION = """
+Measures the cold start of a worker, i.e. the import of the app and create_app, broken down by phase, without and with
+the spec artifact of subscription_manager.spec_cache. Each run takes place in a fresh process.
+
+    python -m benchmarks.startup --config /path/to/config.yml --repeat 10
+"""
+
+# the functions called by create_app, timed by phase
+PHASES = [
+    ('load_app_config', 'subscription_manager.app', 'load_app_config'),
+    ('add_api (spec)', 'subscription_manager.spec_cache', 'add_api'),
+    ('configure_flask', 'subscription_manager.app', 'configure_flask'),
+    ('configure_logging', 'subscription_manager.app', 'configure_logging'),
+    ('configure_db', 'subscription_manager.app', '_configure_db'),
+    ('configure_auth', 'subscription_manager.app', '_configure_auth'),
+    ('configure_broker', 'subscription_manager.app', '_configure_broker'),
+    ('configure_metrics', 'subscription_manager.app', '_configure_metrics'),
+    ('profiling', 'subscription_manager.profiling', 'init_app'),
+]
+
+
+def _timed(func, durations, phase):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            durations[phase] = durations.get(phase, 0) + time.perf_counter() - start
+
+    return wrapper
+
+
+def run_child(config_file: str) -> None:
+    """
+    Creates the app once and prints the duration of each phase in seconds as JSON
+    """
+    durations = OrderedDict()
+
+    start = time.perf_counter()
+    app_module = importlib.import_module('subscription_manager.app')
+    durations['import'] = time.perf_counter() - start
+
+    for phase, module_name, func_name in PHASES:
+        module = importlib.import_module(module_name)
+        setattr(module, func_name, _timed(getattr(module, func_name), durations, phase))
+
+    start = time.perf_counter()
+    app_module.create_app(config_file)
+    durations['create_app (total)'] = time.perf_counter() - start
+
+    print(json.dumps(durations))
+
+
+def _write_config(config_file: str, directory: str, spec_cache: dict) -> str:
+    with open(config_file) as f:
+        config = yaml.safe_load(f)
+
+    config['SPEC_CACHE'] = spec_cache
+
+    path = os.path.join(directory, f"config_{'cache' if spec_cache['enabled'] else 'no_cache'}.yml")
+    with open(path, 'w') as f:
+        yaml.safe_dump(config, f)
+
+    return path
+
+
+def _measure(config_file: str, repeat: int) -> OrderedDict:
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-m', 'benchmarks.startup', '--child', '--config', config_file],
+                                check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1], object_pairs_hook=OrderedDict))
+
+    return OrderedDict((phase, statistics.median(run.get(phase, 0) for run in runs)) for phase in runs[0])
+
+
+def run(config_file: str, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        cache_dir = os.path.join(directory, 'spec_cache')
+
+        # imported lazily because the children run this module and have to import the app within the measurement
+        from subscription_manager import spec_cache
+        spec_cache.build(cache_dir=cache_dir)
+
+        no_cache = _measure(_write_config(config_file, directory, {'enabled': False}), repeat)
+        cache = _measure(_write_config(config_file, directory, {'enabled': True, 'dir': cache_dir}), repeat)
+
+    print(f'median of {repeat} cold starts')
+    print(f'{"":<24}{"no cache":>12}{"cache":>12}')
+    for phase in no_cache:
+        print(f'{phase:<24}{no_cache[phase] * 1000:>10.1f}ms{cache.get(phase, 0) * 1000:>10.1f}ms')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=DESCRIPTION, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--config', required=True, help='app config; DB_CREATE_ALL should be false')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.config)
+    else:
+        run(args.config, args.repeat)
@@ -0,0 +1,10 @@
+#!/bin/sh
+set -e
+
+# The app does not create the schema (DB_CREATE_ALL: false): it is created and upgraded by the migrations before the
+# app starts. Set MIGRATE_DB=false when the migrations are run separately, e.g. by one replica or a deployment job.
+if [ "${MIGRATE_DB:-true}" = "true" ]; then
+    python -m provision.migrate_db ${MIGRATE_DB_CONFIG:+--config "$MIGRATE_DB_CONFIG"}
+fi
+
+exec "$@"
@@ -0,0 +1,107 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import argparse
+import logging
+from functools import partial
+
+from flask_migrate import upgrade, stamp
+from pkg_resources import resource_filename
+from sqlalchemy import inspect
+
+from provision.provision_db import db_operation
+from provision.utils import load_config
+from subscription_manager.app import create_app, MIGRATIONS_DIR
+from swim_backend.db import db
+
+__author__ = "EUROCONTROL (SWIM)"
+
+_logger = logging.getLogger(__name__)
+
+# the revision whose schema is the one that db.create_all() created before the migrations were introduced
+BASELINE_REVISION = '0001_baseline'
+BASELINE_TABLES = ('users', 'topics', 'subscriptions', 'topic_subscriptions')
+
+
+def _is_unversioned_legacy_db() -> bool:
+    """
+    A DB created via db.create_all() before the migrations were introduced has the tables of the baseline revision
+    but no alembic version.
+
+    :raises RuntimeError: if the DB has only some of the tables of the baseline revision, in which case stamping it
+                          would mark a half-created schema as current
+    """
+    tables = set(inspect(db.engine).get_table_names())
+
+    if 'alembic_version' in tables or not tables.intersection(BASELINE_TABLES):
+        return False
+
+    missing_tables = [table for table in BASELINE_TABLES if table not in tables]
+    if missing_tables:
+        raise RuntimeError(f"Unversioned DB without the table(s) {', '.join(missing_tables)} of {BASELINE_REVISION}: "
+                           f"it cannot be stamped and has to be fixed manually")
+
+    return True
+
+
+def migrate(revision: str = 'head'):
+    """
+    Upgrades the DB of the current app to the given revision, stamping it first with the baseline revision if it was
+    created before the migrations were introduced.
+
+    :param revision:
+    """
+    if _is_unversioned_legacy_db():
+        _logger.info(f"Unversioned DB found. Stamping it with {BASELINE_REVISION}")
+        stamp(directory=MIGRATIONS_DIR, revision=BASELINE_REVISION)
+
+    upgrade(directory=MIGRATIONS_DIR, revision=revision)
+    _logger.info(f"DB upgraded to {revision}")
+
+
+def migrate_db(config_file: str, revision: str = 'head'):
+    app = create_app(config_file)
+
+    with app.app_context():
+        migrate(revision)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Upgrades the schema of the DB to the given revision')
+    parser.add_argument('--config', default=resource_filename(__name__, 'config.yml'))
+    parser.add_argument('--revision', default='head')
+    args = parser.parse_args()
+
+    # load config because we need the DB_PROVISION_RETRY variable
+    config = load_config(args.config)
+
+    db_operation(
+        func=partial(migrate_db, config_file=args.config, revision=args.revision),
+        retry=config['DB_PROVISION_RETRY']
+    )
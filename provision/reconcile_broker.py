@@ -0,0 +1,63 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import argparse
+import json
+import sys
+
+from pkg_resources import resource_filename
+
+from subscription_manager.app import create_app
+from subscription_manager.reconciler import reconcile
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+def main(config_file: str, dry_run: bool) -> int:
+    app = create_app(config_file)
+
+    with app.app_context():
+        report = reconcile(dry_run=dry_run)
+
+    print(json.dumps(report.to_dict(), indent=2))
+
+    if report.errors:
+        return 2
+
+    return 1 if dry_run and report.has_drift else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Repairs the drift between the subscriptions in DB and the broker')
+    parser.add_argument('--config', default=resource_filename(__name__, 'config.yml'))
+    parser.add_argument('--dry-run', action='store_true',
+                        help='only report the drift; exits with 1 if any is found')
+    args = parser.parse_args()
+
+    sys.exit(main(args.config, args.dry_run))
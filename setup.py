@@ -45,7 +45,9 @@ setup(
         'pytest',
         'pytest-cov'
     ],
-    package_data={'': ['openapi.yml']},
+    package_data={'': ['openapi.yml'],
+                  'subscription_manager': ['migrations/alembic.ini', 'migrations/env.py', 'migrations/script.py.mako',
+                                           'migrations/README', 'migrations/versions/*.py']},
     include_package_data=True,
     platforms=['Any'],
     license='see LICENSE',
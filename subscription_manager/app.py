@@ -31,15 +31,25 @@ from pathlib import Path
 
 import connexion
 from flask import Flask
+from flask_migrate import Migrate
 from swagger_ui_bundle import swagger_ui_3_path
 from pkg_resources import resource_filename
 
 from swim_backend.flask import configure_flask
 from swim_backend.config import configure_logging, load_app_config
 from swim_backend.db import db
+from subscription_manager import metrics, profiling, spec_cache
+from subscription_manager.auth import credentials_cache
+from subscription_manager.broker.fake import fake_broker
+from subscription_manager.broker.session import broker_session_pool
+from subscription_manager.db import instrumentation
 
 __author__ = "EUROCONTROL (SWIM)"
 
+MIGRATIONS_DIR = str(Path(__file__).parent / 'migrations')
+
+migrate = Migrate()
+
 
 # TODO: fix typing hints
 # TODO: attach subscription to topic
@@ -50,12 +60,16 @@ def create_app(config_file: str) -> Flask:
     options = {'swagger_path': swagger_ui_3_path}
     connexion_app = connexion.App(__name__, options=options)
 
-    connexion_app.add_api(Path('openapi.yml'), strict_validation=True)
+    app_config = load_app_config(filename=config_file)
+
+    spec_cache_config = app_config.get('SPEC_CACHE') or {}
+    api = spec_cache.add_api(connexion_app,
+                             cache_dir=spec_cache_config.get('dir'),
+                             enabled=spec_cache_config.get('enabled', True),
+                             strict_validation=True)
 
     app = connexion_app.app
 
-    app_config = load_app_config(filename=config_file)
-
     app.config.update(app_config)
 
     configure_flask(app)
@@ -64,6 +78,14 @@ def create_app(config_file: str) -> Flask:
 
     _configure_db(db, app)
 
+    _configure_auth(app)
+
+    _configure_broker(app)
+
+    _configure_metrics(app, api)
+
+    profiling.init_app(app)
+
     return app
 
 
@@ -71,7 +93,38 @@ def _configure_db(db, app):
 
     with app.app_context():
         db.init_app(app)
-        db.create_all()
+        migrate.init_app(app, db, directory=MIGRATIONS_DIR)
+        instrumentation.init_app(app, db.engine)
+
+        # the schema is normally managed by the migrations (see provision/migrate_db.py)
+        if app.config.get('DB_CREATE_ALL', True):
+            db.create_all()
+
+
+def _configure_auth(app):
+    config = app.config.get('AUTH', {})
+
+    credentials_cache.configure(max_size=config.get('credentials_cache_size', 1024),
+                                ttl=config.get('credentials_cache_ttl', 300))
+
+
+def _configure_broker(app):
+    config = app.config['BROKER']
+
+    broker_session_pool.configure(pool_size=config.get('pool_size', 10),
+                                  connect_timeout=config.get('connect_timeout', 5),
+                                  read_timeout=config.get('read_timeout', 30),
+                                  auth=(config['username'], config['password']),
+                                  verify=config.get('cert_path') or False)
+
+    if config.get('fake', False):
+        fake_broker.configure(latency=config.get('fake_latency', 0.0),
+                              failure_rate=config.get('fake_failure_rate', 0.0))
+
+
+def _configure_metrics(app, api):
+    with app.app_context():
+        metrics.init_app(app, api, db.engine)
 
 
 if __name__ == '__main__':
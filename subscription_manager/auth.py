@@ -27,18 +27,123 @@ http://opensource.org/licenses/BSD-3-Clause
 
 Details on EUROCONTROL: http://www.eurocontrol.int
 """
+import hashlib
+import hmac
+import os
+import threading
+import time
 import typing as t
+from collections import OrderedDict
 
-from flask import request
+from flask import request, Request
 from werkzeug.security import check_password_hash
 
 from swim_backend.errors import UnauthorizedError
+from subscription_manager.metrics import PASSWORD_HASH_LATENCY, CREDENTIALS_CACHE_HITS, CREDENTIALS_CACHE_MISSES, \
+    CREDENTIALS_CACHE_EVICTIONS
 from subscription_manager.db import User
+from subscription_manager.db.tokens import get_valid_token_by_hash
 from subscription_manager.db.users import get_user_by_username
+from subscription_manager.db.utils import hash_token
 
 __author__ = "EUROCONTROL (SWIM)"
 
 
+class CredentialsCache:
+    """
+    Bounded LRU cache of successfully verified credentials with TTL based eviction. It spares the password hash check
+    (PBKDF2) for clients that authenticate with the same credentials over and over again.
+
+    The plain password is never kept; a keyed (per process) digest of it is kept instead, along with the password hash
+    that was stored in DB at the time of the verification. An entry is considered valid only as long as the stored
+    hash has not changed, so a password change is picked up by every process even before the entry is explicitly
+    invalidated or expires.
+
+    Its hits, misses and evictions are recorded in the metrics of the process.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: int = 300) -> None:
+        """
+        :param max_size: the max number of entries to be kept. 0 disables the cache
+        :param ttl: the number of seconds an entry remains valid after its creation
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: t.Dict[str, t.Tuple[bytes, str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._key = os.urandom(32)
+
+    def configure(self, max_size: int, ttl: int) -> None:
+        with self._lock:
+            self.max_size = max_size
+            self.ttl = ttl
+            self._entries.clear()
+
+    def _digest(self, password: str) -> bytes:
+        return hmac.new(self._key, password.encode('utf-8'), hashlib.sha256).digest()
+
+    def is_verified(self, username: str, password: str, password_hash: str) -> bool:
+        """
+        Checks whether the given credentials have been verified before against the given stored password hash
+        :param username:
+        :param password: the plain password provided by the client
+        :param password_hash: the password hash currently stored in DB
+        :return:
+        """
+        digest = self._digest(password)
+
+        with self._lock:
+            entry = self._entries.get(username)
+
+            if entry is not None:
+                cached_digest, cached_password_hash, expires_at = entry
+
+                if expires_at <= time.monotonic():
+                    del self._entries[username]
+                    CREDENTIALS_CACHE_EVICTIONS.labels(reason='expired').inc()
+                elif cached_password_hash == password_hash and hmac.compare_digest(cached_digest, digest):
+                    self._entries.move_to_end(username)
+                    CREDENTIALS_CACHE_HITS.inc()
+                    return True
+
+            CREDENTIALS_CACHE_MISSES.inc()
+            return False
+
+    def add(self, username: str, password: str, password_hash: str) -> None:
+        """
+        Keeps the given credentials as verified. The least recently used entry is evicted if the cache is full.
+        :param username:
+        :param password: the plain password provided by the client
+        :param password_hash: the password hash currently stored in DB
+        """
+        if self.max_size <= 0:
+            return
+
+        entry = (self._digest(password), password_hash, time.monotonic() + self.ttl)
+
+        with self._lock:
+            self._entries[username] = entry
+            self._entries.move_to_end(username)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                CREDENTIALS_CACHE_EVICTIONS.labels(reason='size').inc()
+
+    def invalidate(self, username: str) -> None:
+        with self._lock:
+            self._entries.pop(username, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+credentials_cache = CredentialsCache()
+
+
 def basic_auth(username: str, password: str, required_scopes: t.Optional[t.List[str]] = None) -> t.Dict[str, t.Any]:
     """
     Implements basic authentication. The function will be called from the connexion library after it has decoded the
@@ -60,16 +165,83 @@ def basic_auth(username: str, password: str, required_scopes: t.Optional[t.List[
     return {}
 
 
+def bearer_auth(token: str, required_scopes: t.Optional[t.List[str]] = None) -> t.Dict[str, t.Any]:
+    """
+    Implements bearer authentication with the opaque tokens issued via POST /tokens/. The function will be called from
+    the connexion library after it has extracted the token from the Authorization header.
+    The authenticated user will be added in the global Flask request for further usage.
+    :param token:
+    :param required_scopes: it is required by connexion but the issued tokens are not scoped
+    :return:
+    """
+    try:
+        user = validate_token(token)
+    except ValueError as e:
+        raise UnauthorizedError(str(e))
+
+    request.user = user
+
+    return {}
+
+
+def validate_token(token: str) -> User:
+    """
+    Checks if the provided token has been issued to an existing and active user and is neither expired nor revoked
+    :param token:
+    :return:
+    """
+    db_token = get_valid_token_by_hash(hash_token(token))
+
+    if db_token is None or not db_token.user.active:
+        raise ValueError('Invalid token')
+
+    return db_token.user
+
+
 def validate_credentials(username: str, password: str) -> User:
     """
-    Checks if the provided username and password belong to an existing user in DB
+    Checks if the provided username and password belong to an existing and active user in DB. The password hash check
+    is skipped for credentials that have already been verified and are still in the credentials cache, but the user is
+    always checked against its current state in DB.
     :param username:
     :param password:
     :return:
     """
     user = get_user_by_username(username)
 
-    if not user or not check_password_hash(user.password, password):
+    if not user or not user.active:
         raise ValueError('Invalid credentials')
 
-    return user
\ No newline at end of file
+    if not credentials_cache.is_verified(username, password, user.password):
+        with PASSWORD_HASH_LATENCY.time():
+            password_matches = check_password_hash(user.password, password)
+
+        if not password_matches:
+            raise ValueError('Invalid credentials')
+
+        credentials_cache.add(username, password, user.password)
+
+    return user
+
+
+def authenticate_admin(request: Request) -> t.Optional[bool]:
+    """
+    Authenticates the given request via its basic credentials or its bearer token, for the views that are not
+    protected by connexion or before connexion gets to authenticate the request within the handler.
+    :param request:
+    :return: whether the request belongs to an admin user or None if it has no valid credentials or token
+    """
+    credentials = request.authorization
+    authorization = request.headers.get('Authorization', '')
+
+    try:
+        if credentials is not None and credentials.username is not None:
+            user = validate_credentials(credentials.username, credentials.password)
+        elif authorization.lower().startswith('bearer '):
+            user = validate_token(authorization.split(None, 1)[1])
+        else:
+            return None
+    except ValueError:
+        return None
+
+    return user.is_admin
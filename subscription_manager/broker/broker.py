@@ -27,25 +27,53 @@ http://opensource.org/licenses/BSD-3-Clause
 
 Details on EUROCONTROL: http://www.eurocontrol.int
 """
-from typing import Union, List
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Union, List, Callable, Any, Optional, Iterable, Dict, Iterator, Tuple, Set
+from urllib.parse import quote
 
 from broker_rest_client.rabbitmq_rest_client import RabbitMQRestClient
 from flask import current_app as app
 from rest_client.errors import APIError
 
 from swim_backend.local import AppContextProxy
+from subscription_manager.broker.fake import fake_broker
+from subscription_manager.broker.session import broker_session_pool
+from subscription_manager.db import Subscription
+from subscription_manager.metrics import observe_broker_call
 
 __author__ = "EUROCONTROL (SWIM)"
 
+_logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+DEFAULT_DEFINITIONS_CHUNK_SIZE = 1000
+
+TOPICS_EXCHANGE = 'default'
+
+VHOST = '/'
+
+
+def _is_fake() -> bool:
+    return bool(app.config['BROKER'].get('fake', False))
+
 
 def _get_rabbitmq_rest_client():
+    """
+    The client is cheap to create as it relies on the process wide keep-alive session of `broker_session_pool`. The in
+    memory fake broker is used instead if BROKER.fake is set.
+    """
+    if _is_fake():
+        return fake_broker
+
     config = app.config['BROKER']
-    return RabbitMQRestClient.create(
+    return RabbitMQRestClient(
+        request_handler=broker_session_pool.get_session(),
         host=config['host'],
         https=config['https'],
-        username=config['username'],
-        password=config['password'],
-        verify=config.get('cert_path') or False
+        timeout=broker_session_pool.timeout
     )
 
 
@@ -56,6 +84,33 @@ class BrokerError(Exception):
     pass
 
 
+def _map_concurrently(func: Callable[[Any], Any], items: List[Any]) -> List[Optional[APIError]]:
+    """
+    Calls the given function for each item using a bounded pool of threads, so that the round trips to the management
+    API overlap instead of adding up. The threads run outside of any app context: the function should call a method
+    of the client resolved beforehand in the calling context, so that all the calls share the same client and its
+    keep-alive connections instead of each thread creating its own.
+
+    :param func: a function accepting a single item and calling the management API
+    :param items:
+    :return: the APIError raised for each item (None in case of success) in the same order as the items
+    """
+    max_workers = min(len(items), app.config['BROKER'].get('max_concurrency', DEFAULT_MAX_CONCURRENCY))
+
+    def _call(item):
+        try:
+            func(item)
+        except APIError as e:
+            return e
+
+    if max_workers <= 1:
+        return [_call(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_call, items))
+
+
+@observe_broker_call
 def create_topic(topic, durable=False):
     try:
         broker_client.create_topic(topic, durable)
@@ -63,6 +118,7 @@ def create_topic(topic, durable=False):
         raise BrokerError(f"Error while creating topic {topic}: {str(e)}")
 
 
+@observe_broker_call
 def delete_topic(topic):
     try:
         broker_client.delete_topic(topic)
@@ -70,6 +126,7 @@ def delete_topic(topic):
         raise BrokerError(f"Error while deleting topic {topic}: {str(e)}")
 
 
+@observe_broker_call
 def bind_queue_to_topic(queue, topic, durable=False):
     try:
         broker_client.bind_queue_to_topic(queue, topic, durable=durable)
@@ -77,6 +134,7 @@ def bind_queue_to_topic(queue, topic, durable=False):
         raise BrokerError(f"Error while binding queue {queue} with topic {topic}: {str(e)}")
 
 
+@observe_broker_call
 def get_queue(queue):
     try:
         return broker_client.get_queue(queue)
@@ -84,18 +142,62 @@ def get_queue(queue):
         return None
 
 
+@observe_broker_call
 def create_queue_for_topics(queue: str, topics: Union[str, List[str]]):
+    """
+    Creates the queue and binds it with the given topics. The bindings are created concurrently and in case any of
+    them fails the ones that succeeded are deleted before the error is raised.
+    """
+    if isinstance(topics, str):
+        topics = [topics]
 
     try:
         broker_client.create_queue(name=queue)
-        if isinstance(topics, str):
-            topics = [topics]
-        for topic in topics:
-            broker_client.bind_queue_to_topic(queue=queue, topic='default', key=topic)
     except APIError as e:
         raise BrokerError(f"Error while creating queue {queue} for topics {topics}") from e
 
+    bind_queue_to_topic = broker_client.bind_queue_to_topic
+    errors = _map_concurrently(lambda topic: bind_queue_to_topic(queue=queue, topic=TOPICS_EXCHANGE, key=topic), topics)
+
+    failed = [error for error in errors if error is not None]
+
+    if failed:
+        bound_topics = [topic for topic, error in zip(topics, errors) if error is None]
+        _unbind_queue_from_topics(queue, bound_topics)
+
+        raise BrokerError(f"Error while creating queue {queue} for topics {topics}") from failed[0]
+
+
+@observe_broker_call
+def unbind_queue_from_topics(queue: str, topics: List[str]):
+    """
+    Deletes concurrently the bindings of the queue with the given topics
+
+    :param queue:
+    :param topics:
+    """
+    delete_queue_binding = broker_client.delete_queue_binding
+    errors = _map_concurrently(lambda topic: delete_queue_binding(queue, topic=TOPICS_EXCHANGE, key=topic), topics)
+
+    failed = [error for error in errors if error is not None]
 
+    if failed:
+        raise BrokerError(f"Error while deleting bindings of queue {queue} with topics {topics}") from failed[0]
+
+
+def _unbind_queue_from_topics(queue: str, topics: List[str]):
+    """
+    Best effort removal of the bindings of the queue with the given topics
+    """
+    delete_queue_binding = broker_client.delete_queue_binding
+    errors = _map_concurrently(lambda topic: delete_queue_binding(queue, topic=TOPICS_EXCHANGE, key=topic), topics)
+
+    for topic, error in zip(topics, errors):
+        if error is not None:
+            _logger.error(f"Error while deleting binding of queue {queue} with topic {topic}: {str(error)}")
+
+
+@observe_broker_call
 def delete_queue(queue):
     try:
         broker_client.delete_queue(queue)
@@ -103,8 +205,210 @@ def delete_queue(queue):
         raise BrokerError(f"Error while deleting queue {queue}: {str(e)}")
 
 
+@observe_broker_call
 def delete_queue_binding(queue, topic):
     try:
-        broker_client.delete_queue_binding(queue, topic='default', key=topic)
+        broker_client.delete_queue_binding(queue, topic=TOPICS_EXCHANGE, key=topic)
     except APIError as e:
         raise BrokerError(f"Error while deleting queue binding: {str(e)}")
+
+
+def _queue_definition(queue: str, durable: bool) -> Dict[str, Any]:
+    return {
+        'name': queue,
+        'vhost': VHOST,
+        'durable': durable,
+        'auto_delete': False,
+        'arguments': {}
+    }
+
+
+def _binding_definition(queue: str, topic: str) -> Dict[str, Any]:
+    return {
+        'source': TOPICS_EXCHANGE,
+        'vhost': VHOST,
+        'destination': queue,
+        'destination_type': 'queue',
+        'routing_key': topic,
+        'arguments': {}
+    }
+
+
+def _chunks(items: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, chunk_size))
+        if not chunk:
+            break
+        yield chunk
+
+
+def _get_definitions_chunk_size(chunk_size: Optional[int] = None) -> int:
+    return chunk_size or app.config['BROKER'].get('definitions_chunk_size', DEFAULT_DEFINITIONS_CHUNK_SIZE)
+
+
+def _management_request(method: str, path: str, **kwargs) -> Any:
+    """
+    Calls the management API directly through the shared keep-alive session, for the bulk operations that are not
+    covered by the RabbitMQ client.
+
+    :param method: the HTTP method
+    :param path: the path of the endpoint below /api/
+    :return: the decoded JSON body of the response if any
+    """
+    if _is_fake():
+        try:
+            return fake_broker.management_request(method, path, **kwargs)
+        except APIError as e:
+            raise BrokerError(f"Error while accessing {path}: {e.status_code} {str(e)}") from e
+
+    config = app.config['BROKER']
+    url = f"{'https' if config['https'] else 'http'}://{config['host']}/api/{path}"
+
+    try:
+        response = broker_session_pool.get_session().request(method, url, **kwargs)
+    except IOError as e:
+        raise BrokerError(f"Error while accessing {path}: {str(e)}") from e
+
+    if not response.ok:
+        raise BrokerError(f"Error while accessing {path}: {response.status_code} {response.text}")
+
+    return response.json() if response.content else None
+
+
+def get_subscriptions_definitions(subscriptions: Iterable[Subscription]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Computes the broker topology required by the given subscriptions in the format of the definitions of the management
+    API: a queue per subscription and, for the active ones, a binding of the queue with each one of its topics.
+
+    :param subscriptions:
+    :return:
+    """
+    queues, bindings = [], []
+
+    for subscription in subscriptions:
+        queues.append(_queue_definition(subscription.queue, subscription.durable))
+
+        if subscription.active:
+            bindings.extend(_binding_definition(subscription.queue, topic_name)
+                            for topic_name in subscription.topic_names)
+
+    return {'queues': queues, 'bindings': bindings}
+
+
+def _upload_definitions(definitions: Dict[str, List[Dict[str, Any]]]) -> None:
+    _management_request('POST', f"definitions/{quote(VHOST, safe='')}", json=definitions)
+
+
+@observe_broker_call
+def apply_subscriptions_topology(subscriptions: Iterable[Subscription], chunk_size: Optional[int] = None) -> None:
+    """
+    Creates the queues and bindings of the given subscriptions with a few uploads of definitions (one per chunk of
+    subscriptions) instead of one management API call per queue and per binding. Existing queues and bindings are left
+    untouched, so it is safe to apply the topology of subscriptions that already exist in the broker.
+
+    :param subscriptions:
+    :param chunk_size: the number of subscriptions per upload, defaults to BROKER.definitions_chunk_size
+    """
+    for chunk in _chunks(subscriptions, _get_definitions_chunk_size(chunk_size)):
+        _upload_definitions(get_subscriptions_definitions(chunk))
+
+
+@observe_broker_call
+def apply_subscriptions_topology_per_chunk(subscriptions: List[Subscription],
+                                           chunk_size: Optional[int] = None) -> Dict[str, BrokerError]:
+    """
+    Same as apply_subscriptions_topology but a failed upload does not prevent the next ones
+
+    :param subscriptions:
+    :param chunk_size: the number of subscriptions per upload, defaults to BROKER.definitions_chunk_size
+    :return: the error of each subscription whose topology could not be applied keyed by its queue
+    """
+    errors = {}
+
+    for chunk in _chunks(subscriptions, _get_definitions_chunk_size(chunk_size)):
+        try:
+            _upload_definitions(get_subscriptions_definitions(chunk))
+        except BrokerError as e:
+            errors.update({subscription.queue: e for subscription in chunk})
+
+    return errors
+
+
+@observe_broker_call
+def apply_definitions(queues: Dict[str, bool], bindings: Iterable[Tuple[str, str]], chunk_size: Optional[int] = None):
+    """
+    Creates the given queues and bindings with a few uploads of definitions. The queues are uploaded before the
+    bindings so that the destination of each binding exists by the time it is created.
+
+    :param queues: the durability of each queue keyed by its name
+    :param bindings: (queue, topic) pairs
+    :param chunk_size: the number of queues or bindings per upload, defaults to BROKER.definitions_chunk_size
+    """
+    chunk_size = _get_definitions_chunk_size(chunk_size)
+
+    for chunk in _chunks(queues.items(), chunk_size):
+        _upload_definitions({'queues': [_queue_definition(queue, durable) for queue, durable in chunk]})
+
+    for chunk in _chunks(bindings, chunk_size):
+        _upload_definitions({'bindings': [_binding_definition(queue, topic) for queue, topic in chunk]})
+
+
+@observe_broker_call
+def get_queues() -> Dict[str, bool]:
+    """
+    Retrieves all the queues of the broker with a single call
+
+    :return: the durability of each queue keyed by its name
+    """
+    queues = _management_request('GET', f"queues/{quote(VHOST, safe='')}", params={'columns': 'name,durable'})
+
+    return {queue['name']: queue['durable'] for queue in queues}
+
+
+@observe_broker_call
+def get_topic_bindings() -> Set[Tuple[str, str]]:
+    """
+    Retrieves all the bindings of queues with topics with a single call
+
+    :return: (queue, topic) pairs
+    """
+    bindings = _management_request('GET', f"exchanges/{quote(VHOST, safe='')}/{TOPICS_EXCHANGE}/bindings/source")
+
+    return {(binding['destination'], binding['routing_key'])
+            for binding in bindings if binding['destination_type'] == 'queue'}
+
+
+def _is_not_found(error: APIError) -> bool:
+    return getattr(error, 'status_code', None) == 404
+
+
+@observe_broker_call
+def delete_queues(queues: List[str]) -> Dict[str, APIError]:
+    """
+    Deletes concurrently the given queues. Queues that do not exist are considered as deleted.
+
+    :param queues:
+    :return: the error of each queue that could not be deleted keyed by its name
+    """
+    errors = _map_concurrently(broker_client.delete_queue, queues)
+
+    return {queue: error for queue, error in zip(queues, errors) if error is not None and not _is_not_found(error)}
+
+
+@observe_broker_call
+def delete_bindings(bindings: List[Tuple[str, str]]) -> Dict[Tuple[str, str], APIError]:
+    """
+    Deletes concurrently the given bindings. Bindings that do not exist are considered as deleted.
+
+    :param bindings: (queue, topic) pairs
+    :return: the error of each binding that could not be deleted keyed by its (queue, topic) pair
+    """
+    delete_queue_binding = broker_client.delete_queue_binding
+    errors = _map_concurrently(
+        lambda binding: delete_queue_binding(binding[0], topic=TOPICS_EXCHANGE, key=binding[1]),
+        bindings
+    )
+
+    return {binding: error
+            for binding, error in zip(bindings, errors) if error is not None and not _is_not_found(error)}
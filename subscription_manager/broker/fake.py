@@ -0,0 +1,255 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import random
+import threading
+import time
+import typing as t
+from urllib.parse import unquote
+
+from rest_client.errors import APIError
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+class FakeBroker:
+    """
+    In memory stand-in of the RabbitMQ management API. It implements the calls of RabbitMQRestClient that the project
+    uses along with the endpoints that broker.py accesses directly (definitions upload, queues and bindings listing).
+
+    Every call can be delayed by a fixed latency, in order to emulate the round trip to a real broker, and can fail
+    randomly with a 500 error at the given rate. The latency is spent outside of the lock that guards the state, so
+    concurrent calls overlap as they would against a real broker. Missing resources result in 404 errors.
+    """
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, exchanges: t.Iterable[str] = ('default',)):
+        """
+        :param latency: seconds each call waits before being served
+        :param failure_rate: probability (0-1) of each call to fail
+        :param exchanges: the exchanges that exist from the start, i.e. the one the topics are routed through
+        """
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self._default_exchanges = list(exchanges)
+        self._lock = threading.Lock()
+        self._random = random.Random()
+        self.reset()
+
+    def configure(self, latency: float = 0.0, failure_rate: float = 0.0, seed: t.Optional[int] = None) -> None:
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._random.seed(seed)
+
+    def reset(self) -> None:
+        """
+        Drops all the state apart from the default exchanges
+        """
+        with self._lock:
+            self.calls = 0
+            self.exchanges: t.Dict[str, bool] = {name: True for name in self._default_exchanges}
+            self.queues: t.Dict[str, bool] = {}
+            # (exchange, queue, routing key)
+            self.bindings: t.Set[t.Tuple[str, str, str]] = set()
+            self.policies: t.Dict[str, t.Dict[str, t.Any]] = {}
+            self.users: t.Dict[str, t.Dict[str, t.Any]] = {}
+
+    def _call(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self._lock:
+            self.calls += 1
+            failed = self.failure_rate and self._random.random() < self.failure_rate
+
+        if failed:
+            raise APIError('Injected failure', 500)
+
+    @staticmethod
+    def _not_found(kind: str, name: str) -> APIError:
+        return APIError(f'{kind} {name} not found', 404)
+
+    # #########
+    # Exchanges
+    # #########
+
+    def create_topic(self, name: str, durable: bool = False) -> None:
+        self._call()
+        with self._lock:
+            self.exchanges.setdefault(name, durable)
+
+    def delete_topic(self, name: str) -> None:
+        self._call()
+        with self._lock:
+            if self.exchanges.pop(name, None) is None:
+                raise self._not_found('exchange', name)
+
+            self.bindings = {binding for binding in self.bindings if binding[0] != name}
+
+    # ######
+    # Queues
+    # ######
+
+    def create_queue(self, name: str, durable: bool = True) -> None:
+        self._call()
+        with self._lock:
+            self.queues.setdefault(name, durable)
+
+    def get_queue(self, name: str) -> t.Dict[str, t.Any]:
+        self._call()
+        with self._lock:
+            if name not in self.queues:
+                raise self._not_found('queue', name)
+
+            return {'name': name, 'durable': self.queues[name]}
+
+    def delete_queue(self, name: str) -> None:
+        self._call()
+        with self._lock:
+            if self.queues.pop(name, None) is None:
+                raise self._not_found('queue', name)
+
+            self.bindings = {binding for binding in self.bindings if binding[1] != name}
+
+    # ########
+    # Bindings
+    # ########
+
+    def bind_queue_to_topic(self, queue: str, topic: str, key: t.Optional[str] = None, durable: bool = False) -> None:
+        self._call()
+        with self._lock:
+            if topic not in self.exchanges:
+                raise self._not_found('exchange', topic)
+            if queue not in self.queues:
+                raise self._not_found('queue', queue)
+
+            self.bindings.add((topic, queue, key or ''))
+
+    def delete_queue_binding(self, queue: str, topic: str, key: t.Optional[str] = None) -> None:
+        self._call()
+        with self._lock:
+            binding = (topic, queue, key or '')
+
+            if binding not in self.bindings:
+                raise self._not_found('binding', f'{topic}/{queue}/{key}')
+
+            self.bindings.remove(binding)
+
+    # ########
+    # Policies
+    # ########
+
+    def create_policy(self, name: str, pattern: str, priority: int, apply_to: str,
+                      definitions: t.Dict[str, t.Any]) -> None:
+        self._call()
+        with self._lock:
+            self.policies[name] = {'name': name, 'pattern': pattern, 'priority': priority, 'apply-to': apply_to,
+                                   'definition': definitions}
+
+    def delete_policy(self, name: str) -> None:
+        self._call()
+        with self._lock:
+            if self.policies.pop(name, None) is None:
+                raise self._not_found('policy', name)
+
+    # #####
+    # Users
+    # #####
+
+    def user_exists(self, name: str) -> bool:
+        self._call()
+        with self._lock:
+            return name in self.users
+
+    def add_user(self, name: str, password: str, permissions: t.Any = None, tags: t.Optional[t.List[str]] = None):
+        self._call()
+        with self._lock:
+            self.users[name] = {'name': name, 'permissions': permissions, 'tags': tags or []}
+
+    def delete_user(self, name: str) -> None:
+        self._call()
+        with self._lock:
+            if self.users.pop(name, None) is None:
+                raise self._not_found('user', name)
+
+    # ###############################
+    # Endpoints accessed by broker.py
+    # ###############################
+
+    def _upload_definitions(self, definitions: t.Dict[str, t.List[t.Dict[str, t.Any]]]) -> None:
+        with self._lock:
+            for queue in definitions.get('queues', []):
+                self.queues.setdefault(queue['name'], queue['durable'])
+
+            for binding in definitions.get('bindings', []):
+                if binding['source'] not in self.exchanges or binding['destination'] not in self.queues:
+                    raise APIError(f"Binding of {binding['destination']} refers to a missing resource", 400)
+
+                self.bindings.add((binding['source'], binding['destination'], binding['routing_key']))
+
+    def _get_queues(self) -> t.List[t.Dict[str, t.Any]]:
+        with self._lock:
+            return [{'name': name, 'durable': durable} for name, durable in self.queues.items()]
+
+    def _get_bindings(self, exchange: str) -> t.List[t.Dict[str, t.Any]]:
+        with self._lock:
+            if exchange not in self.exchanges:
+                raise self._not_found('exchange', exchange)
+
+            return [{'source': source, 'destination': queue, 'destination_type': 'queue', 'routing_key': key}
+                    for source, queue, key in self.bindings if source == exchange]
+
+    def management_request(self, method: str, path: str, params: t.Optional[t.Dict[str, t.Any]] = None,
+                           json: t.Optional[t.Any] = None) -> t.Any:
+        """
+        Serves the requests that broker.py sends directly to the management API
+
+        :param method: the HTTP method
+        :param path: the path of the endpoint below /api/
+        :param params: the query parameters (ignored)
+        :param json: the body of the request
+        :return: the decoded JSON body of the response if any
+        """
+        self._call()
+
+        parts = [unquote(part) for part in path.split('/')]
+
+        if method == 'POST' and parts[0] == 'definitions':
+            return self._upload_definitions(json or {})
+
+        if method == 'GET' and parts[0] == 'queues':
+            return self._get_queues()
+
+        if method == 'GET' and parts[0] == 'exchanges' and parts[3:] == ['bindings', 'source']:
+            return self._get_bindings(parts[2])
+
+        raise self._not_found('endpoint', f'{method} {path}')
+
+
+fake_broker = FakeBroker()
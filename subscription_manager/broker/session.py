@@ -0,0 +1,174 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import os
+import threading
+import typing as t
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from subscription_manager.metrics import BROKER_CONNECTIONS, BROKER_REQUESTS
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+Timeout = t.Tuple[float, float]
+
+
+class _TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter applying a default timeout to the requests that do not define one. After each request it records in the
+    metrics the connections and the requests its pools have counted since the previous one, so that the reuse of the
+    connections can be followed.
+    """
+
+    def __init__(self, timeout: Timeout, *args, **kwargs) -> None:
+        self.timeout = timeout
+        self._recorded_counts = (0, 0)
+        self._record_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        try:
+            return super().send(request, timeout=timeout or self.timeout, **kwargs)
+        finally:
+            self._record_counts()
+
+    def _counts(self) -> t.Tuple[int, int]:
+        """
+        :return: the number of connections that have been opened and of requests that have been sent by the pools
+        """
+        connections, requests_ = 0, 0
+
+        pools = self.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                connections += pool.num_connections
+                requests_ += pool.num_requests
+
+        return connections, requests_
+
+    def _record_counts(self) -> None:
+        with self._record_lock:
+            connections, requests_ = self._counts()
+            recorded_connections, recorded_requests = self._recorded_counts
+
+            # the counts drop if a pool is discarded by the pool manager
+            BROKER_CONNECTIONS.inc(max(connections - recorded_connections, 0))
+            BROKER_REQUESTS.inc(max(requests_ - recorded_requests, 0))
+
+            self._recorded_counts = (connections, requests_)
+
+
+class BrokerSessionPool:
+    """
+    Process wide holder of a keep-alive HTTP session towards the management API of the broker. The session keeps a
+    bounded pool of open connections which is shared among threads and app contexts, so that consecutive calls reuse
+    connections instead of going through a TCP (and TLS) handshake every time.
+
+    The session is bound to the process that created it: after a fork the child discards it (without closing the
+    sockets that are still in use by the parent) and lazily opens its own connections.
+    """
+
+    def __init__(self,
+                 pool_size: int = 10,
+                 connect_timeout: float = 5,
+                 read_timeout: float = 30,
+                 auth: t.Optional[t.Tuple[str, str]] = None,
+                 verify: t.Union[bool, str] = True) -> None:
+        """
+        :param pool_size: the max number of connections kept open per host
+        :param connect_timeout: seconds to wait for a connection to be established
+        :param read_timeout: seconds to wait for a response once the request has been sent
+        :param auth: (username, password) used for basic authentication
+        :param verify: the path of a CA bundle or whether to verify the server certificate
+        """
+        self.pool_size = pool_size
+        self.timeout: Timeout = (connect_timeout, read_timeout)
+        self.auth = auth
+        self.verify = verify
+        self._session: t.Optional[requests.Session] = None
+        self._pid: t.Optional[int] = None
+        self._lock = threading.Lock()
+
+    def configure(self,
+                  pool_size: int,
+                  connect_timeout: float,
+                  read_timeout: float,
+                  auth: t.Optional[t.Tuple[str, str]],
+                  verify: t.Union[bool, str]) -> None:
+        with self._lock:
+            self.pool_size = pool_size
+            self.timeout = (connect_timeout, read_timeout)
+            self.auth = auth
+            self.verify = verify
+            self._close()
+
+    def _create_session(self) -> requests.Session:
+        adapter = _TimeoutHTTPAdapter(timeout=self.timeout,
+                                      pool_connections=1,
+                                      pool_maxsize=self.pool_size,
+                                      pool_block=False)
+        session = requests.Session()
+        session.auth = self.auth
+        session.verify = self.verify
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        return session
+
+    def get_session(self) -> requests.Session:
+        with self._lock:
+            if self._pid != os.getpid():
+                # inherited from the parent process (or not created yet): the underlying sockets must not be shared
+                self._session = None
+
+            if self._session is None:
+                self._session = self._create_session()
+                self._pid = os.getpid()
+
+            return self._session
+
+    def _close(self) -> None:
+        if self._session is not None and self._pid == os.getpid():
+            self._session.close()
+
+        self._session, self._pid = None, None
+
+    def reset(self) -> None:
+        """
+        Drops the current session along with its connections. Meant to be called after a fork or a config change.
+        """
+        with self._lock:
+            self._close()
+
+
+broker_session_pool = BrokerSessionPool()
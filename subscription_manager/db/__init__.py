@@ -30,4 +30,5 @@ Details on EUROCONTROL: http://www.eurocontrol.int
 
 __author__ = "EUROCONTROL (SWIM)"
 
-from subscription_manager.db.models import Topic, Subscription, User
+from subscription_manager.db.models import Topic, Subscription, User, Token, OutboxMessage, OutboxStatus, \
+    TableChange, TableVersion
@@ -0,0 +1,172 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import logging
+import time
+import typing as t
+import weakref
+
+from flask import Flask, current_app as app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+__author__ = "EUROCONTROL (SWIM)"
+
+_logger = logging.getLogger(__name__)
+
+STATEMENT_COUNT_HEADER = 'X-DB-Statement-Count'
+DB_TIME_HEADER = 'X-DB-Time-Ms'
+
+DEFAULT_SLOW_QUERY_THRESHOLD = 0.5
+
+# the statements are truncated in the logs
+MAX_LOGGED_STATEMENT_LENGTH = 1000
+
+_START_TIMES_KEY = 'instrumentation_start_times'
+
+# the observers of the statements of each engine
+_observers: 't.MutableMapping[Engine, t.List[t.Callable[[str, float], None]]]' = weakref.WeakKeyDictionary()
+
+
+class DBStats:
+    """
+    The statements executed within an app context (i.e. a request) and the total time spent on them
+    """
+
+    def __init__(self) -> None:
+        self.statements = 0
+        self.duration = 0.0
+
+    def add(self, duration: float) -> None:
+        self.statements += 1
+        self.duration += duration
+
+
+def get_db_stats() -> DBStats:
+    """
+    :return: the DB stats of the current app context
+    """
+    if 'db_stats' not in g:
+        g.db_stats = DBStats()
+
+    return g.db_stats
+
+
+def _config() -> t.Dict[str, t.Any]:
+    return app.config.get('DB_INSTRUMENTATION') or {}
+
+
+def _endpoint() -> str:
+    return f'{request.method} {request.path}' if has_request_context() else 'no request'
+
+
+def _after_statement(statement: str, duration: float) -> None:
+    # statements issued outside of an app context (e.g. by the migrations) are not accounted
+    if not has_app_context():
+        return
+
+    get_db_stats().add(duration)
+
+    if duration >= _config().get('slow_query_threshold', DEFAULT_SLOW_QUERY_THRESHOLD):
+        _logger.warning(f"Slow query ({duration * 1000:.1f}ms) issued by {_endpoint()}: "
+                        f"{statement[:MAX_LOGGED_STATEMENT_LENGTH]}")
+
+
+def observe_statements(engine: Engine, observer: t.Callable[[str, float], None]) -> None:
+    """
+    Calls the given observer with every statement executed by the given engine and its duration in seconds. The
+    statements are timed by a single set of listeners per engine, whichever the number of observers. Failed statements
+    are not observed.
+
+    :param engine:
+    :param observer: a function accepting the statement and its duration
+    """
+    if engine in _observers:
+        _observers[engine].append(observer)
+        return
+
+    observers = _observers[engine] = [observer]
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(_START_TIMES_KEY, []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info[_START_TIMES_KEY].pop()
+
+        for statement_observer in observers:
+            statement_observer(statement, duration)
+
+    @event.listens_for(engine, 'handle_error')
+    def handle_error(exception_context):
+        start_times = exception_context.connection.info.get(_START_TIMES_KEY) \
+            if exception_context.connection is not None else None
+
+        if start_times:
+            start_times.pop()
+
+
+def init_app(app: Flask, engine: Engine) -> None:
+    """
+    Enables the instrumentation if DB_INSTRUMENTATION.enabled is set:
+        - every statement slower than DB_INSTRUMENTATION.slow_query_threshold (seconds) is logged along with the
+          endpoint that issued it
+        - a warning is logged for requests that issue more than DB_INSTRUMENTATION.max_statements_per_request
+          statements, which typically reveals N+1 patterns
+        - in debug mode the number of statements and the DB time of each request are returned in the response headers
+
+    :param app:
+    :param engine: the engine of the DB
+    """
+    config = app.config.get('DB_INSTRUMENTATION') or {}
+
+    if not config.get('enabled', False):
+        return
+
+    observe_statements(engine, _after_statement)
+
+    @app.before_request
+    def reset_db_stats():
+        g.db_stats = DBStats()
+
+    @app.after_request
+    def report_db_stats(response):
+        stats = get_db_stats()
+
+        max_statements = _config().get('max_statements_per_request')
+        if max_statements is not None and stats.statements > max_statements:
+            _logger.warning(f"{_endpoint()} issued {stats.statements} statements "
+                            f"({stats.duration * 1000:.1f}ms), more than {max_statements}")
+
+        if app.debug:
+            response.headers[STATEMENT_COUNT_HEADER] = str(stats.statements)
+            response.headers[DB_TIME_HEADER] = f'{stats.duration * 1000:.1f}'
+
+        return response
@@ -30,6 +30,7 @@ Details on EUROCONTROL: http://www.eurocontrol.int
 import enum
 from datetime import datetime, timezone
 
+from sqlalchemy import DDL, event
 from swim_backend.db import db
 
 __author__ = "EUROCONTROL (SWIM)"
@@ -54,10 +55,27 @@ class User(db.Model):
     is_admin = db.Column(db.Boolean, nullable=False, default=False)
 
 
+class Token(db.Model):
+
+    __tablename__ = 'tokens'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey(User.id), nullable=False, index=True)
+
+    token_hash = db.Column(db.String(64), nullable=False, unique=True)
+    created_at = db.Column(db.DateTime(), nullable=False, default=created_at_default)
+    expires_at = db.Column(db.DateTime(), nullable=False)
+    revoked = db.Column(db.Boolean, nullable=False, default=False)
+
+    user = db.relationship("User")
+
+
 topic_subscriptions_table = db.Table(
     'topic_subscriptions', db.Model.metadata,
-    db.Column('topic_id', db.Integer, db.ForeignKey('topics.id')),
-    db.Column('subscription_id', db.Integer, db.ForeignKey('subscriptions.id'))
+    # the primary key serves the lookups by topic and the extra index the ones by subscription
+    db.Column('topic_id', db.Integer, db.ForeignKey('topics.id'), primary_key=True),
+    db.Column('subscription_id', db.Integer, db.ForeignKey('subscriptions.id'), primary_key=True),
+    db.Index('ix_topic_subscriptions_subscription_id', 'subscription_id')
 )
 
 
@@ -66,7 +84,7 @@ class Topic(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False, unique=True)
-    user_id = db.Column(db.Integer, db.ForeignKey(User.id), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey(User.id), nullable=False, index=True)
 
     user = db.relationship("User", backref='topics')
     subscriptions = db.relationship("Subscription",
@@ -88,7 +106,7 @@ class Subscription(db.Model):
     __tablename__ = 'subscriptions'
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey(User.id), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey(User.id), nullable=False, index=True)
 
     queue = db.Column(db.String(128), nullable=False, unique=True)
     active = db.Column(db.Boolean, nullable=False, default=True)
@@ -100,3 +118,90 @@ class Subscription(db.Model):
     @property
     def topic_names(self):
         return [topic.name for topic in self.topics]
+
+
+class OutboxStatus(enum.Enum):
+    PENDING = "PENDING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+    @classmethod
+    def all(cls):
+        return [e.value for e in cls]
+
+
+class OutboxMessage(db.Model):
+    """
+    A broker side effect recorded in the same transaction as the DB change that requires it, to be applied
+    asynchronously by the outbox worker. It also serves as the status of the operation towards the client.
+    """
+    __tablename__ = 'outbox'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey(User.id, ondelete='SET NULL'), nullable=True)
+
+    action = db.Column(db.String(50), nullable=False)
+    # messages with the same key (the queue) are applied in the order they were recorded
+    key = db.Column(db.String(128), nullable=False, index=True)
+    payload = db.Column(db.JSON, nullable=False)
+
+    status = db.Column(db.Enum(OutboxStatus), nullable=False, default=OutboxStatus.PENDING.value, index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+
+    created_at = db.Column(db.DateTime(), nullable=False, default=created_at_default)
+    available_at = db.Column(db.DateTime(), nullable=False, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime())
+
+
+class TableChange(db.Model):
+    """
+    A statement that changed a table, recorded by a DB trigger whichever the code path (ORM, bulk statements, outbox
+    worker). Writers only insert new rows, so they never wait on each other. A row becomes visible along with the
+    change once the transaction commits, hence the number of rows of a table only grows with every committed change,
+    regardless of the order the transactions commit in.
+    """
+    __tablename__ = 'table_changes'
+
+    id = db.Column(db.BigInteger, primary_key=True)
+    name = db.Column(db.String(64), nullable=False)
+
+
+class TableVersion(db.Model):
+    """
+    The number of changes of a table that have been compacted out of table_changes. Along with the number of the
+    remaining changes it gives the version of the data of the table. It is only written upon compaction, never by the
+    writers of the table.
+    """
+    __tablename__ = 'table_versions'
+
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+VERSIONED_TABLES = ('topics', 'subscriptions', 'topic_subscriptions')
+
+RECORD_TABLE_CHANGE_FUNCTION = """
+CREATE OR REPLACE FUNCTION record_table_change() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO table_changes (name) VALUES (TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def record_table_change_trigger(table_name):
+    return f"""
+CREATE TRIGGER {table_name}_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table_name}
+FOR EACH STATEMENT EXECUTE PROCEDURE record_table_change()
+"""
+
+
+# the same triggers are created by the migrations; these cover the schemas created via create_all (e.g. tests)
+event.listen(db.Model.metadata, 'after_create', DDL(RECORD_TABLE_CHANGE_FUNCTION).execute_if(dialect='postgresql'))
+for _table_name in VERSIONED_TABLES:
+    event.listen(db.Model.metadata, 'after_create',
+                 DDL(f"DROP TRIGGER IF EXISTS {_table_name}_version ON {_table_name}").execute_if(dialect='postgresql'))
+    event.listen(db.Model.metadata, 'after_create',
+                 DDL(record_table_change_trigger(_table_name)).execute_if(dialect='postgresql'))
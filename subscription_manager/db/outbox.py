@@ -0,0 +1,119 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import typing as t
+from datetime import datetime
+
+from sqlalchemy import and_
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.exc import NoResultFound
+
+from swim_backend.db import db
+from subscription_manager.db.models import OutboxMessage, OutboxStatus
+
+__author__ = "EUROCONTROL (SWIM)"
+
+INSERT_CHUNK_SIZE = 1000
+
+
+def get_outbox_message_by_id(message_id: int, user_id: t.Optional[int] = None) -> t.Union[OutboxMessage, None]:
+    filters = {
+        'id': message_id
+    }
+
+    if user_id:
+        filters['user_id'] = user_id
+
+    try:
+        result = OutboxMessage.query.filter_by(**filters).one()
+    except NoResultFound:
+        result = None
+
+    return result
+
+
+def add_outbox_message(message: OutboxMessage) -> OutboxMessage:
+    """
+    Adds the message in the current session without committing, so that it is saved in the same transaction as the
+    change that requires it.
+    """
+    db.session.add(message)
+
+    return message
+
+
+def add_outbox_messages(messages: t.List[t.Dict[str, t.Any]]) -> None:
+    """
+    Inserts the given messages with one multi-row INSERT (per chunk) in the current transaction without committing. It
+    is meant for large fan-outs where creating an instance per message would be too costly.
+
+    :param messages: the column values of each message; the unset columns get their default values
+    """
+    now = datetime.utcnow()
+    defaults = {'user_id': None, 'status': OutboxStatus.PENDING, 'attempts': 0, 'created_at': now, 'available_at': now}
+    table = OutboxMessage.__table__
+
+    for start in range(0, len(messages), INSERT_CHUNK_SIZE):
+        rows = [dict(defaults, **message) for message in messages[start:start + INSERT_CHUNK_SIZE]]
+        db.session.execute(table.insert().values(rows))
+
+
+def claim_outbox_messages(batch_size: int) -> t.List[OutboxMessage]:
+    """
+    Locks and returns the pending messages that are due, skipping the ones already locked by other workers. A message
+    is claimed only if there is no earlier pending message with the same key, so that the changes of the same queue
+    are applied in order even with several workers.
+
+    The lock holds until the current transaction is committed.
+
+    :param batch_size: the max number of messages to be claimed
+    """
+    earlier = aliased(OutboxMessage)
+    earlier_pending_exists = db.session.query(earlier.id).filter(
+        and_(earlier.key == OutboxMessage.key,
+             earlier.id < OutboxMessage.id,
+             earlier.status == OutboxStatus.PENDING)
+    ).exists()
+
+    return OutboxMessage.query \
+        .filter(OutboxMessage.status == OutboxStatus.PENDING,
+                OutboxMessage.available_at <= datetime.utcnow(),
+                ~earlier_pending_exists) \
+        .order_by(OutboxMessage.id) \
+        .limit(batch_size) \
+        .with_for_update(skip_locked=True) \
+        .all()
+
+
+def commit() -> None:
+    db.session.commit()
+
+
+def rollback() -> None:
+    db.session.rollback()
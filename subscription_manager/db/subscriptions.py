@@ -28,11 +28,15 @@ http://opensource.org/licenses/BSD-3-Clause
 Details on EUROCONTROL: http://www.eurocontrol.int
 """
 import typing as t
+from sqlalchemy import text, bindparam
+from sqlalchemy.orm import selectinload, load_only, Query
+from sqlalchemy.orm.util import identity_key
 from sqlalchemy.orm.exc import NoResultFound
 
 from swim_backend.db import db_save, db, db_delete
-from subscription_manager.db import Subscription
-from subscription_manager.db.utils import generate_queue
+from subscription_manager.db import Subscription, Topic
+from subscription_manager.db.models import topic_subscriptions_table
+from subscription_manager.db.utils import generate_queue, paginate
 
 __author__ = "EUROCONTROL (SWIM)"
 
@@ -69,7 +73,10 @@ def get_subscription_by_queue(queue: str, user_id: t.Optional[int] = None) -> t.
     return result
 
 
-def get_subscriptions(queue: t.Optional[str] = None, user_id: t.Optional[int] = None) -> t.List[Subscription]:
+def _get_subscriptions_query(queue: t.Optional[str] = None,
+                             user_id: t.Optional[int] = None,
+                             limit: t.Optional[int] = None,
+                             cursor: t.Optional[int] = None) -> Query:
     filters = {}
 
     if user_id:
@@ -78,7 +85,46 @@ def get_subscriptions(queue: t.Optional[str] = None, user_id: t.Optional[int] =
     if queue:
         filters['queue'] = queue
 
-    return Subscription.query.filter_by(**filters).all()
+    # the topics of all the subscriptions are loaded with one extra query instead of one per subscription
+    query = Subscription.query.filter_by(**filters).options(selectinload(Subscription.topics))
+
+    return paginate(query, Subscription.id, limit=limit, cursor=cursor)
+
+
+def get_subscriptions(queue: t.Optional[str] = None,
+                      user_id: t.Optional[int] = None,
+                      limit: t.Optional[int] = None,
+                      cursor: t.Optional[int] = None) -> t.List[Subscription]:
+    return _get_subscriptions_query(queue=queue, user_id=user_id, limit=limit, cursor=cursor).all()
+
+
+def iter_subscriptions(queue: t.Optional[str] = None,
+                       user_id: t.Optional[int] = None,
+                       limit: t.Optional[int] = None,
+                       cursor: t.Optional[int] = None,
+                       batch_size: int = 1000) -> t.Iterator[Subscription]:
+    """
+    Same as get_subscriptions but the rows are fetched lazily through a server side cursor in batches of the given
+    size, so that the memory needed does not depend on the number of the returned subscriptions.
+    """
+    query = _get_subscriptions_query(queue=queue, user_id=user_id, limit=limit, cursor=cursor)
+
+    return iter(query.yield_per(batch_size))
+
+
+def iter_subscriptions_topology(batch_size: int = 10000) -> t.Iterator[t.Tuple[str, bool, bool, t.Optional[str]]]:
+    """
+    Yields a (queue, durable, active, topic name) row per subscription and topic, or a single row with no topic name for
+    the subscriptions without topics. Only the needed columns are fetched and no object is loaded in the session, so
+    that the topology of all the subscriptions can be read with a single query.
+
+    :param batch_size: the number of rows fetched per round trip
+    """
+    query = db.session.query(Subscription.queue, Subscription.durable, Subscription.active, Topic.name) \
+        .outerjoin(Subscription.topics) \
+        .order_by(Subscription.id)
+
+    return iter(query.yield_per(batch_size))
 
 
 def create_subscription(subscription: Subscription) -> Subscription:
@@ -88,6 +134,197 @@ def create_subscription(subscription: Subscription) -> Subscription:
     return db_save(db.session, subscription)
 
 
+def _column_value(subscription: Subscription, column: str) -> t.Any:
+    """
+    The value of the column in the given instance or its default, the way the ORM would have set it upon flush
+    """
+    value = getattr(subscription, column)
+    table_column = Subscription.__table__.c[column]
+
+    if value is None and table_column.default is not None:
+        value = table_column.default.arg
+
+    enum_class = getattr(table_column.type, 'enum_class', None)
+    if enum_class is not None and isinstance(value, str):
+        value = enum_class(value)
+
+    return value
+
+
+def create_subscriptions(subscriptions: t.List[Subscription]) -> t.List[Subscription]:
+    """
+    Saves the given subscriptions with one multi-row INSERT for the subscriptions, one for their topic associations and
+    a single commit, instead of one flush and commit per subscription. The ids are set on the given instances which are
+    kept out of the session.
+
+    :param subscriptions: new subscriptions with their topics already persisted
+    :return:
+    """
+    if not subscriptions:
+        return subscriptions
+
+    for subscription in subscriptions:
+        if subscription.queue is None:
+            subscription.queue = generate_queue()
+
+        # the instances may have been added to the session by the backref cascade of their topics, in which case the ORM
+        # would insert them once more upon commit
+        if subscription in db.session:
+            db.session.expunge(subscription)
+
+    for topic in {topic for subscription in subscriptions for topic in subscription.topics}:
+        db.session.expire(topic, ['subscriptions'])
+
+    table = Subscription.__table__
+    columns = ('user_id', 'queue', 'active', 'qos', 'durable')
+
+    rows = []
+    for subscription in subscriptions:
+        row = {column: _column_value(subscription, column) for column in columns}
+        for column, value in row.items():
+            setattr(subscription, column, value)
+        rows.append(row)
+
+    result = db.session.execute(table.insert().values(rows).returning(table.c.id, table.c.queue))
+    id_by_queue = {queue: subscription_id for subscription_id, queue in result}
+
+    for subscription in subscriptions:
+        subscription.id = id_by_queue[subscription.queue]
+
+    associations = [{'topic_id': topic.id, 'subscription_id': subscription.id}
+                    for subscription in subscriptions for topic in subscription.topics]
+    if associations:
+        db.session.execute(topic_subscriptions_table.insert().values(associations))
+
+    db.session.commit()
+
+    return subscriptions
+
+
+def get_subscriptions_by_ids_or_user(subscription_ids: t.Optional[t.List[int]] = None,
+                                     user_id: t.Optional[int] = None) -> t.List[Subscription]:
+    """
+    Retrieves with one query the subscriptions matching all the given filters, loading only what is needed in order to
+    delete them (id, queue).
+
+    :param subscription_ids:
+    :param user_id:
+    :return:
+    """
+    query = Subscription.query.options(load_only('id', 'queue', 'user_id'))
+
+    if subscription_ids is not None:
+        query = query.filter(Subscription.id.in_(subscription_ids))
+
+    if user_id:
+        query = query.filter_by(user_id=user_id)
+
+    return query.order_by(Subscription.id).all()
+
+
+def _get_topic_subscriptions_query(topic_id: int) -> Query:
+    return Subscription.query \
+        .join(topic_subscriptions_table, topic_subscriptions_table.c.subscription_id == Subscription.id) \
+        .filter(topic_subscriptions_table.c.topic_id == topic_id)
+
+
+def get_topic_subscriptions(topic_id: int, limit: t.Optional[int] = None) -> t.List[Subscription]:
+    """
+    Retrieves with one query the subscriptions of the given topic, loading only what is needed in order to delete them
+    (id, queue).
+
+    :param topic_id:
+    :param limit: the max number of subscriptions to be returned
+    :return:
+    """
+    query = _get_topic_subscriptions_query(topic_id) \
+        .options(load_only('id', 'queue', 'user_id')) \
+        .order_by(Subscription.id)
+
+    if limit is not None:
+        query = query.limit(limit)
+
+    return query.all()
+
+
+def count_topic_subscriptions(topic_id: int) -> int:
+    return _get_topic_subscriptions_query(topic_id).count()
+
+
+_DELETE_TOPIC_SUBSCRIPTIONS = """
+    WITH affected AS (
+        SELECT subscription_id AS id FROM topic_subscriptions WHERE topic_id = :topic_id {subscription_ids_filter}
+    ), deleted_associations AS (
+        DELETE FROM topic_subscriptions WHERE subscription_id IN (SELECT id FROM affected)
+    )
+    DELETE FROM subscriptions WHERE id IN (SELECT id FROM affected) RETURNING id, queue
+"""
+
+
+def delete_topic_subscriptions(topic_id: int,
+                               subscription_ids: t.Optional[t.List[int]] = None) -> t.List[t.Tuple[int, str]]:
+    """
+    Deletes with one statement the subscriptions of the given topic (optionally only the given ones) along with all
+    their topic associations. The change is not committed, so that it goes in the same transaction as the deletion of
+    the topic itself.
+
+    :param topic_id:
+    :param subscription_ids: restricts the deletion to these subscriptions of the topic
+    :return: the (id, queue) of each deleted subscription
+    """
+    params: t.Dict[str, t.Any] = {'topic_id': topic_id}
+    statement = text(_DELETE_TOPIC_SUBSCRIPTIONS.format(subscription_ids_filter=''))
+
+    if subscription_ids is not None:
+        if not subscription_ids:
+            return []
+
+        params['subscription_ids'] = subscription_ids
+        statement = text(_DELETE_TOPIC_SUBSCRIPTIONS.format(
+            subscription_ids_filter='AND subscription_id IN :subscription_ids'
+        )).bindparams(bindparam('subscription_ids', expanding=True))
+
+    deleted = [(subscription_id, queue) for subscription_id, queue in db.session.execute(statement, params)]
+
+    # the subscriptions of the topic that may be loaded in the session are stale after the statement
+    topic = db.session.identity_map.get(identity_key(Topic, topic_id))
+    if topic is not None:
+        db.session.expire(topic, ['subscriptions'])
+
+    return deleted
+
+
+def delete_subscriptions_by_ids(subscription_ids: t.List[int]) -> int:
+    """
+    Deletes the given subscriptions along with their topic associations with two DELETE statements and one commit
+
+    :param subscription_ids:
+    :return: the number of deleted subscriptions
+    """
+    if not subscription_ids:
+        return 0
+
+    db.session.execute(topic_subscriptions_table.delete()
+                       .where(topic_subscriptions_table.c.subscription_id.in_(subscription_ids)))
+    deleted = Subscription.query.filter(Subscription.id.in_(subscription_ids)).delete(synchronize_session=False)
+
+    db.session.commit()
+
+    return deleted
+
+
+def get_topic_names(subscription: Subscription) -> t.List[str]:
+    """
+    Loads the names of the topics of the subscription without flushing its pending changes first, so that its row is
+    neither written nor locked before the subscription is saved, e.g. while the broker is being called.
+
+    :param subscription:
+    :return:
+    """
+    with db.session.no_autoflush:
+        return subscription.topic_names
+
+
 def update_subscription(subscription: Subscription) -> Subscription:
     return db_save(db.session, subscription)
 
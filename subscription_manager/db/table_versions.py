@@ -0,0 +1,89 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import typing as t
+
+from sqlalchemy import bindparam, text
+
+from swim_backend.db import db
+
+__author__ = "EUROCONTROL (SWIM)"
+
+# the recorded changes are compacted once they reach this number, so that counting them stays cheap
+COMPACTION_THRESHOLD = 1000
+
+# an arbitrary key of the advisory lock that prevents concurrent compactions
+COMPACTION_LOCK_KEY = 7240001
+
+# one statement, hence one snapshot, so that a concurrent compaction is either fully visible or not at all
+_GET_TABLE_VERSIONS = text("""
+    SELECT name, sum(version) AS version, sum(changes) AS changes FROM (
+        SELECT name, version, 0 AS changes FROM table_versions WHERE name IN :table_names
+        UNION ALL
+        SELECT name, count(*), count(*) FROM table_changes WHERE name IN :table_names GROUP BY name
+    ) AS versions GROUP BY name
+""").bindparams(bindparam('table_names', expanding=True))
+
+_COMPACT_TABLE_CHANGES = text("""
+    WITH compacted AS (
+        DELETE FROM table_changes RETURNING name
+    )
+    INSERT INTO table_versions (name, version)
+    SELECT name, count(*) FROM compacted GROUP BY name
+    ON CONFLICT (name) DO UPDATE SET version = table_versions.version + EXCLUDED.version
+""")
+
+
+def get_table_versions(table_names: t.Iterable[str]) -> t.Dict[str, int]:
+    """
+    Retrieves the current versions of the given tables with one query, i.e. the number of the statements that changed
+    each table (see db.models.TableChange). Tables that have not changed since the creation of the triggers have version 0. The
+    changes are compacted first if they have piled up.
+    """
+    table_names = list(table_names)
+
+    rows = db.session.execute(_GET_TABLE_VERSIONS, {'table_names': table_names}).fetchall()
+
+    if sum(changes for _, _, changes in rows) >= COMPACTION_THRESHOLD:
+        compact_table_changes()
+
+    versions = {name: int(version) for name, version, _ in rows}
+
+    return {name: versions.get(name, 0) for name in table_names}
+
+
+def compact_table_changes() -> None:
+    """
+    Moves the recorded changes into the counters of table_versions without altering the versions. It runs in its own
+    short transaction, so that the counters are locked only for the time of the statement and never by the writers of
+    the tables. It is skipped if another compaction is in progress.
+    """
+    with db.engine.begin() as connection:
+        if connection.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), key=COMPACTION_LOCK_KEY).scalar():
+            connection.execute(_COMPACT_TABLE_CHANGES)
@@ -0,0 +1,89 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import typing as t
+from datetime import datetime
+
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.exc import NoResultFound
+
+from swim_backend.db import db_save, db
+from subscription_manager.db.models import Token
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+def get_token_by_id(token_id: int, user_id: t.Optional[int] = None) -> t.Union[Token, None]:
+    filters = {
+        'id': token_id
+    }
+
+    if user_id:
+        filters['user_id'] = user_id
+
+    try:
+        result = Token.query.filter_by(**filters).one()
+    except NoResultFound:
+        result = None
+
+    return result
+
+
+def get_valid_token_by_hash(token_hash: str) -> t.Union[Token, None]:
+    """
+    Retrieves a token which is neither revoked nor expired along with its user in one query
+
+    :param token_hash: the hash of the requested token
+    :return:
+    """
+    try:
+        result = Token.query \
+            .options(joinedload(Token.user)) \
+            .filter_by(token_hash=token_hash, revoked=False) \
+            .filter(Token.expires_at > datetime.utcnow()) \
+            .one()
+    except NoResultFound:
+        result = None
+
+    return result
+
+
+def create_token(token: Token) -> Token:
+    return db_save(db.session, token)
+
+
+def revoke_token(token: Token) -> Token:
+    token.revoked = True
+
+    return db_save(db.session, token)
+
+
+def revoke_user_tokens(user_id: int) -> None:
+    Token.query.filter_by(user_id=user_id, revoked=False).update({'revoked': True}, synchronize_session=False)
+    db.session.commit()
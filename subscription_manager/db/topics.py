@@ -29,10 +29,12 @@ Details on EUROCONTROL: http://www.eurocontrol.int
 """
 import typing as t
 
+from sqlalchemy.orm import Query
 from sqlalchemy.orm.exc import NoResultFound
 
 from swim_backend.db import db_save, db, db_delete
 from subscription_manager.db import Topic
+from subscription_manager.db.utils import paginate
 
 __author__ = "EUROCONTROL (SWIM)"
 
@@ -67,10 +69,38 @@ def get_topic_by_name(topic_name: str, user_id: t.Optional[int] = None) -> t.Uni
     return result
 
 
-def get_topics(user_id: t.Optional[int] = None) -> t.List[Topic]:
+def get_topics_by_names(topic_names: t.List[str]) -> t.List[Topic]:
+    """
+    Retrieves the topics with the given names with one query. Names that do not exist are ignored.
+    """
+    if not topic_names:
+        return []
+
+    return Topic.query.filter(Topic.name.in_(set(topic_names))).all()
+
+
+def _get_topics_query(user_id: t.Optional[int] = None,
+                      limit: t.Optional[int] = None,
+                      cursor: t.Optional[int] = None) -> Query:
     filters = {'user_id': user_id} if user_id else {}
 
-    return Topic.query.filter_by(**filters).all()
+    return paginate(Topic.query.filter_by(**filters), Topic.id, limit=limit, cursor=cursor)
+
+
+def get_topics(user_id: t.Optional[int] = None,
+               limit: t.Optional[int] = None,
+               cursor: t.Optional[int] = None) -> t.List[Topic]:
+    return _get_topics_query(user_id=user_id, limit=limit, cursor=cursor).all()
+
+
+def iter_topics(user_id: t.Optional[int] = None,
+                limit: t.Optional[int] = None,
+                cursor: t.Optional[int] = None,
+                batch_size: int = 1000) -> t.Iterator[Topic]:
+    """
+    Same as get_topics but the rows are fetched lazily through a server side cursor in batches of the given size.
+    """
+    return iter(_get_topics_query(user_id=user_id, limit=limit, cursor=cursor).yield_per(batch_size))
 
 
 def create_topic(topic: Topic) -> Topic:
@@ -83,3 +113,11 @@ def update_topic(topic: Topic) -> Topic:
 
 def delete_topic(topic: Topic) -> None:
     db_delete(db.session, topic)
+
+
+def delete_topic_by_id(topic_id: int) -> None:
+    """
+    Deletes the topic with one statement without committing, so that it goes in the same transaction as the deletion
+    of its last subscriptions. Its subscriptions are expected to be deleted already.
+    """
+    Topic.query.filter_by(id=topic_id).delete(synchronize_session=False)
@@ -32,6 +32,7 @@ import typing as t
 from sqlalchemy.orm.exc import NoResultFound, MultipleResultsFound
 
 from subscription_manager.db.models import User
+from subscription_manager.db.utils import paginate
 from swim_backend.db import db_save, db
 
 __author__ = "EUROCONTROL (SWIM)"
@@ -65,8 +66,8 @@ def get_user_by_username(username: str) -> t.Union[User, None]:
     return result
 
 
-def get_users() -> t.List[User]:
-    return User.query.all()
+def get_users(limit: t.Optional[int] = None, cursor: t.Optional[int] = None) -> t.List[User]:
+    return paginate(User.query, User.id, limit=limit, cursor=cursor).all()
 
 
 def save_user(user: User) -> User:
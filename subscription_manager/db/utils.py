@@ -27,9 +27,14 @@ http://opensource.org/licenses/BSD-3-Clause
 
 Details on EUROCONTROL: http://www.eurocontrol.int
 """
+import hashlib
+import secrets
+import typing as t
 import uuid
 
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Query
+from sqlalchemy.orm.attributes import InstrumentedAttribute
 
 __author__ = "EUROCONTROL (SWIM)"
 
@@ -41,6 +46,46 @@ def generate_queue() -> str:
     return uuid.uuid4().hex
 
 
+def generate_token() -> str:
+    """
+    :return: a URL safe random string of 256 bits of entropy
+    """
+    return secrets.token_urlsafe(32)
+
+
+def hash_token(token: str) -> str:
+    """
+    Tokens are random enough to be stored as plain SHA256 digests, which keeps their validation to a single indexed
+    lookup without the cost of a key derivation function.
+    :param token:
+    :return: the hex digest of the token
+    """
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def paginate(query: Query, key: InstrumentedAttribute, limit: t.Optional[int] = None,
+             cursor: t.Optional[int] = None) -> Query:
+    """
+    Applies keyset pagination on the given query, i.e. the items are ordered by the given unique key and only the ones
+    after the cursor are returned. Both the filtering and the limit are done in SQL so that the cost of fetching a page
+    does not depend on its position.
+    :param query:
+    :param key: a unique (and indexed) column of the queried model, typically its primary key
+    :param limit: the max number of items to be returned
+    :param cursor: the key of the last item of the previous page
+    :return:
+    """
+    if cursor is not None:
+        query = query.filter(key > cursor)
+
+    query = query.order_by(key)
+
+    if limit is not None:
+        query = query.limit(limit)
+
+    return query
+
+
 def is_duplicate_record_error(error: SQLAlchemyError) -> bool:
     """
     Determines whether the error comes from the PostgreSQL error of duplicate record saving attempt
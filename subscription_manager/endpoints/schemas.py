@@ -29,12 +29,12 @@ Details on EUROCONTROL: http://www.eurocontrol.int
 """
 
 from marshmallow import post_dump, ValidationError, pre_dump, pre_load, post_load
-from marshmallow.fields import Nested, Integer, List, String
+from marshmallow.fields import Nested, Integer, List, String, Method
 from marshmallow_sqlalchemy import ModelSchemaOpts, ModelSchema
 
 from swim_backend.db import db
-from subscription_manager.db.models import Topic, Subscription, User
-from subscription_manager.db.topics import get_topic_by_id, get_topic_by_name
+from subscription_manager.db.models import Topic, Subscription, User, Token, OutboxMessage
+from subscription_manager.db.topics import get_topics_by_names
 
 __author__ = "EUROCONTROL (SWIM)"
 
@@ -87,20 +87,39 @@ class SubscriptionPostSchema(BaseSchema):
 
     topics = Nested(TopicSchema, many=True)
 
-    @staticmethod
-    def _validate_topic_exists(topic_name):
-        topic = get_topic_by_name(topic_name)
+    def _validate_topics_exist(self, topic_names):
+        """
+        Retrieves all the requested topics with one query and keeps them in the context of the schema in order to be
+        reused upon post_load. The query is skipped if the topics have been prefetched in the context (bulk loading).
+        Duplicate names are ignored since a subscription is bound to each topic once.
+        """
+        topic_names = list(dict.fromkeys(topic_names))
 
-        if topic is None:
-            raise ValidationError(f"No topic found with name '{topic_name}'", field_name='topics')
+        prefetched_topics_by_name = self.context.get('prefetched_topics_by_name')
 
-        return {'name': topic_name}
+        if prefetched_topics_by_name is not None:
+            topics_by_name = {name: prefetched_topics_by_name[name]
+                              for name in topic_names if name in prefetched_topics_by_name}
+        else:
+            topics_by_name = {topic.name: topic for topic in get_topics_by_names(topic_names)}
+
+        missing_topic_names = [name for name in topic_names if name not in topics_by_name]
+
+        if len(missing_topic_names) == 1:
+            raise ValidationError(f"No topic found with name '{missing_topic_names[0]}'", field_name='topics')
+        elif missing_topic_names:
+            names = ", ".join(f"'{name}'" for name in missing_topic_names)
+            raise ValidationError(f"No topics found with names {names}", field_name='topics')
+
+        self.context['topics_by_name'] = topics_by_name
+
+        return [{'name': topic_name} for topic_name in topic_names]
 
     def _handle_topics(self, data, **kwargs):
         if not data['topics']:
             raise ValidationError(f"No topics were provided", field_name='topics')
 
-        data['topics'] = [self._validate_topic_exists(topic_name) for topic_name in data['topics']]
+        data['topics'] = self._validate_topics_exist(data['topics'])
 
         return data
 
@@ -110,7 +129,11 @@ class SubscriptionPostSchema(BaseSchema):
 
     @post_load
     def post(self, item, **kwargs):
-        item.topics = [get_topic_by_name(topic.name) for topic in item.topics]
+        topics_by_name = self.context.get('topics_by_name')
+
+        # no topics were provided in case of update so the existing ones are kept
+        if topics_by_name is not None:
+            item.topics = [topics_by_name[topic.name] for topic in item.topics]
 
         return item
 
@@ -118,7 +141,7 @@ class SubscriptionPostSchema(BaseSchema):
 class SubscriptionPutSchema(SubscriptionPostSchema):
     def _handle_topics(self, data, **kwargs):
         if data.get('topics'):
-            data['topics'] = [self._validate_topic_exists(topic_name) for topic_name in data['topics']]
+            data['topics'] = self._validate_topics_exist(data['topics'])
 
         return data
 
@@ -129,4 +152,48 @@ class UserSchema(BaseSchema):
         model = User
         load_only = ("password",)
         dump_only = ("id",)
-        exclude = ('topics', 'subscriptions',)
\ No newline at end of file
+        exclude = ('topics', 'subscriptions',)
+
+
+class TokenSchema(BaseSchema):
+
+    class Meta:
+        model = Token
+        exclude = ('token_hash', 'user',)
+        dump_only = ("id", "user_id", "created_at", "expires_at", "revoked")
+
+    # the plain token is only available right after its creation
+    token = String(dump_only=True)
+
+
+class OperationSchema(BaseSchema):
+
+    class Meta:
+        model = OutboxMessage
+        exclude = ('key', 'payload', 'available_at',)
+        dump_only = ("id", "user_id", "action", "status", "attempts", "error", "created_at", "completed_at")
+
+    # the queue or the topic the operation applies to
+    queue = Method('get_queue', dump_only=True)
+    topic = Method('get_topic', dump_only=True)
+    progress = Method('get_progress', dump_only=True)
+
+    def get_queue(self, operation):
+        return (operation.payload or {}).get('queue')
+
+    def get_topic(self, operation):
+        return (operation.payload or {}).get('topic')
+
+    def get_progress(self, operation):
+        payload = operation.payload or {}
+
+        if 'total' not in payload:
+            return None
+
+        return {'total': payload['total'], 'deleted': payload['deleted']}
+
+    @post_dump
+    def serialize_status(self, operation_data, **kwargs):
+        operation_data['status'] = operation_data['status'].value
+
+        return operation_data
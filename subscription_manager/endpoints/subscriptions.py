@@ -30,40 +30,62 @@ Details on EUROCONTROL: http://www.eurocontrol.int
 import typing as t
 from copy import deepcopy
 
-from flask import request
+from flask import request, Response
 from marshmallow import ValidationError
 from sqlalchemy.exc import SQLAlchemyError
 
-from swim_backend.errors import ConflictError, NotFoundError, BadRequestError, BadGatewayError
+from swim_backend.errors import ConflictError, NotFoundError, BadRequestError, BadGatewayError, ForbiddenError
 from swim_backend.typing import JSONType
 from subscription_manager.broker import broker
+from subscription_manager import outbox
 from subscription_manager.db import subscriptions as db, Subscription
+from subscription_manager.db.topics import get_topics_by_names
 from subscription_manager.db.utils import is_duplicate_record_error
 from subscription_manager.endpoints.schemas import SubscriptionSchema, SubscriptionPostSchema, SubscriptionPutSchema
+from subscription_manager.endpoints.utils import set_next_cursor, stream_json, deferred_status_code, conditional_get
 from swim_backend.marshal import marshal_with
 
 from subscription_manager.events import events
 
 __author__ = "EUROCONTROL (SWIM)"
 
+# the subscriptions are returned along with their topics
+SUBSCRIPTIONS_TABLES = ('subscriptions', 'topic_subscriptions', 'topics')
 
-@marshal_with(SubscriptionSchema, many=True)
-def get_subscriptions() -> t.List[Subscription]:
+
+@conditional_get(*SUBSCRIPTIONS_TABLES)
+def get_subscriptions(queue: t.Optional[str] = None,
+                      limit: t.Optional[int] = None,
+                      cursor: t.Optional[int] = None,
+                      stream: bool = False) -> t.Union[t.List[Subscription], Response]:
     """
     GET /subscriptions/
 
     :raises: backend.errors.UnauthorizedError (HTTP error 401)
              backend.errors.ForbiddenError (HTTP error 403)
     """
-    params = request.args.to_dict()
+    params = {'queue': queue, 'limit': limit, 'cursor': cursor}
 
     user = request.user
     if not user.is_admin:
         params.update({'user_id': user.id})
 
-    return db.get_subscriptions(**params)
+    if stream:
+        return stream_json(SubscriptionSchema(), db.iter_subscriptions(**params))
+
+    return _get_subscriptions(**params)
+
+
+@marshal_with(SubscriptionSchema, many=True)
+def _get_subscriptions(**params) -> t.List[Subscription]:
+    result = db.get_subscriptions(**params)
+
+    set_next_cursor(result, params.get('limit'))
+
+    return result
 
 
+@conditional_get(*SUBSCRIPTIONS_TABLES)
 @marshal_with(SubscriptionSchema)
 def get_subscription(subscription_id: int) -> Subscription:
     """
@@ -110,11 +132,107 @@ def post_subscription() -> t.Tuple[Subscription, int]:
             raise ConflictError("Subscription with same data already exists in DB")
         raise
 
-    return subscription, 201
+    return subscription, deferred_status_code(201)
+
+
+def post_subscriptions_bulk() -> t.Tuple[t.List[JSONType], int]:
+    """
+    POST /subscriptions/bulk
+
+    Creates many subscriptions at once: the topics of all the items are retrieved with one query, the valid items are
+    saved with one commit and their topology is applied to the broker with a few definitions uploads. The result of
+    each item is returned in the same order as the items.
+
+    :raises: backend.errors.UnauthorizedError (HTTP error 401)
+             backend.errors.ForbiddenError (HTTP error 403)
+             backend.errors.ConflictError (HTTP error 409)
+    """
+    items = request.get_json()
+
+    schema = SubscriptionPostSchema()
+    topic_names = [name for item in items for name in item.get('topics') or []]
+    schema.context['prefetched_topics_by_name'] = {topic.name: topic for topic in get_topics_by_names(topic_names)}
+
+    results: t.List[t.Optional[JSONType]] = [None] * len(items)
+    subscriptions: t.List[t.Tuple[int, Subscription]] = []
+
+    for index, item in enumerate(items):
+        try:
+            subscription = schema.load(data=item)
+        except ValidationError as e:
+            results[index] = {'status': 400, 'detail': str(e)}
+            continue
+
+        subscription.user_id = request.user.id
+        subscriptions.append((index, subscription))
+
+    broker_errors: t.Dict[str, str] = {}
+    try:
+        events.create_subscriptions_event([subscription for _, subscription in subscriptions], broker_errors)
+    except SQLAlchemyError as e:
+        if is_duplicate_record_error(e):
+            raise ConflictError("Subscription with same data already exists in DB")
+        raise
+
+    created_status = 202 if outbox.is_enabled() else 201
+    subscription_schema = SubscriptionSchema()
+
+    for index, subscription in subscriptions:
+        if subscription.queue in broker_errors:
+            results[index] = {
+                'status': 502,
+                'detail': f"Error while accessing the broker: {broker_errors[subscription.queue]}"
+            }
+        else:
+            results[index] = {'status': created_status, 'subscription': subscription_schema.dump(subscription)}
+
+    return results, 200
+
+
+def delete_subscriptions_bulk(ids: t.Optional[t.List[int]] = None,
+                              user_id: t.Optional[int] = None) -> t.Tuple[JSONType, int]:
+    """
+    DELETE /subscriptions/bulk
+
+    Deletes at once the subscriptions matching all the given filters: their queues are deleted concurrently and the
+    subscriptions whose queue was deleted are removed from DB with one statement. Non admin users can only delete
+    their own subscriptions.
+
+    :raises: backend.errors.UnauthorizedError (HTTP error 401)
+             backend.errors.ForbiddenError (HTTP error 403)
+             backend.errors.BadRequestError (HTTP error 400)
+    """
+    if ids is None and user_id is None:
+        raise BadRequestError("At least one of ids or user_id should be provided")
+
+    user = request.user
+    if not user.is_admin:
+        if user_id not in (None, user.id):
+            raise ForbiddenError("Non admin users can only delete their own subscriptions")
+        user_id = user.id
+
+    subscriptions = db.get_subscriptions_by_ids_or_user(subscription_ids=ids, user_id=user_id)
+
+    broker_errors: t.Dict[str, str] = {}
+    events.delete_subscriptions_event(subscriptions, broker_errors)
+
+    result = {
+        'deleted': [subscription.id for subscription in subscriptions if subscription.queue not in broker_errors],
+        'failed': [
+            {
+                'id': subscription.id,
+                'queue': subscription.queue,
+                'detail': f"Error while accessing the broker: {broker_errors[subscription.queue]}"
+            }
+            for subscription in subscriptions if subscription.queue in broker_errors
+        ]
+    }
+
+    return result, 202 if outbox.is_enabled() and subscriptions else 200
 
 
 @marshal_with(SubscriptionSchema)
-def put_subscription(subscription_id: int) -> JSONType:
+def put_subscription(subscription_id: int) -> t.Tuple[Subscription, int]:
     """
     PUT /subscriptions/{subscription_id}
 
@@ -148,7 +266,7 @@ def put_subscription(subscription_id: int) -> JSONType:
             raise ConflictError("Subscription with same data already exists in DB")
         raise
 
-    return updated_subscription
+    return updated_subscription, deferred_status_code(200)
 
 
 def delete_subscription(subscription_id: int) -> t.Tuple[None, int]:
@@ -171,4 +289,4 @@ def delete_subscription(subscription_id: int) -> t.Tuple[None, int]:
     except broker.BrokerError as e:
         raise BadGatewayError(f"Error while accessing broker: {str(e)}")
 
-    return None, 204
+    return None, deferred_status_code(204)
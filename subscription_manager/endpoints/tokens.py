@@ -0,0 +1,84 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import typing as t
+from datetime import datetime, timedelta
+
+from flask import request, current_app as app
+
+from swim_backend.errors import NotFoundError
+from swim_backend.marshal import marshal_with
+from swim_backend.typing import JSONType
+from subscription_manager.db import tokens as db, Token
+from subscription_manager.db.utils import generate_token, hash_token
+from subscription_manager.endpoints.schemas import TokenSchema
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+@marshal_with(TokenSchema)
+def post_token() -> t.Tuple[JSONType, int]:
+    """
+    POST /tokens/
+
+    :raises: backend.errors.UnauthorizedError (HTTP error 401)
+    """
+    ttl = app.config.get('AUTH', {}).get('token_ttl', 86400)
+    value = generate_token()
+
+    token = Token(
+        user_id=request.user.id,
+        token_hash=hash_token(value),
+        expires_at=datetime.utcnow() + timedelta(seconds=ttl)
+    )
+
+    token_created = db.create_token(token)
+    token_created.token = value
+
+    return token_created, 201
+
+
+def delete_token(token_id: int) -> t.Tuple[None, int]:
+    """
+    DELETE /tokens/{token_id}
+
+    :raises: backend.errors.UnauthorizedError (HTTP error 401)
+             backend.errors.NotFoundError (HTTP error 404)
+    """
+    user = request.user
+    params = {} if user.is_admin else {'user_id': user.id}
+
+    token = db.get_token_by_id(token_id, **params)
+
+    if token is None:
+        raise NotFoundError(f"Token with id {token_id} does not exist")
+
+    db.revoke_token(token)
+
+    return None, 204
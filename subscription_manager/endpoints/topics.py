@@ -29,40 +29,67 @@ Details on EUROCONTROL: http://www.eurocontrol.int
 """
 import typing as t
 
-from flask import request
+from flask import request, Response
 from marshmallow import ValidationError
 from sqlalchemy.exc import SQLAlchemyError
-from swim_backend.errors import NotFoundError, ConflictError, BadRequestError
+from swim_backend.errors import NotFoundError, ConflictError, BadRequestError, BadGatewayError
 from swim_backend.typing import JSONType
+from subscription_manager import outbox
+from subscription_manager.broker import broker
 from subscription_manager.db import topics as db
 from subscription_manager.db.utils import is_duplicate_record_error
 from subscription_manager.endpoints.schemas import TopicSchema
+from subscription_manager.endpoints.utils import set_next_cursor, stream_json, deferred_status_code, conditional_get
 from swim_backend.marshal import marshal_with
 from subscription_manager.events import events
 
 __author__ = "EUROCONTROL (SWIM)"
 
 
-@marshal_with(TopicSchema, many=True)
-def get_topics_own() -> JSONType:
+@conditional_get('topics')
+def get_topics_own(limit: t.Optional[int] = None,
+                   cursor: t.Optional[int] = None,
+                   stream: bool = False) -> t.Union[JSONType, Response]:
     """
-    GET /topics/
+    GET /topics/own
 
     :raises: backend.errors.UnauthorizedError (HTTP error 401)
     """
-    return db.get_topics(user_id=request.user.id)
+    params = {'user_id': request.user.id, 'limit': limit, 'cursor': cursor}
 
+    if stream:
+        return stream_json(TopicSchema(), db.iter_topics(**params))
 
-@marshal_with(TopicSchema, many=True)
-def get_topics() -> JSONType:
+    return _get_topics(**params)
+
+
+@conditional_get('topics')
+def get_topics(limit: t.Optional[int] = None,
+               cursor: t.Optional[int] = None,
+               stream: bool = False) -> t.Union[JSONType, Response]:
     """
     GET /topics/
 
     :raises: backend.errors.UnauthorizedError (HTTP error 401)
     """
-    return db.get_topics()
+    params = {'limit': limit, 'cursor': cursor}
+
+    if stream:
+        return stream_json(TopicSchema(), db.iter_topics(**params))
+
+    return _get_topics(**params)
+
+
+@marshal_with(TopicSchema, many=True)
+def _get_topics(**params) -> JSONType:
+    result = db.get_topics(**params)
 
+    set_next_cursor(result, params.get('limit'))
 
+    return result
+
+
+@conditional_get('topics')
 @marshal_with(TopicSchema)
 def get_topic(topic_id: int) -> JSONType:
     """
@@ -136,12 +163,17 @@ def post_topic() -> t.Tuple[JSONType, int]:
 #     return updated_topic
 
 
-def delete_topic(topic_id: int) -> t.Tuple[None, int]:
+def delete_topic(topic_id: int, background: bool = False) -> t.Tuple[None, int]:
     """
     DELETE /topics/{topic_id}
 
+    In background mode the topic and its subscriptions are deleted chunk by chunk by the outbox worker and the progress
+    can be followed via the operation in the Location header.
+
     :raises: backend.errors.UnauthorizedError (HTTP error 401)
              backend.errors.NotFoundError (HTTP error 404)
+             backend.errors.BadRequestError (HTTP error 400)
+             backend.errors.BadGatewayError (HTTP error 502)
     """
     user = request.user
     params = {} if user.is_admin else {'user_id': user.id}
@@ -151,6 +183,17 @@ def delete_topic(topic_id: int) -> t.Tuple[None, int]:
     if topic is None:
         raise NotFoundError(f"Topic with id {topic_id} does not exist")
 
-    events.delete_topic_event(topic)
+    if background:
+        if not outbox.is_enabled():
+            raise BadRequestError("Deleting a topic in background requires the outbox to be enabled")
+
+        events.delete_topic_in_background_event(topic)
+
+        return None, deferred_status_code(204)
+
+    try:
+        events.delete_topic_event(topic)
+    except broker.BrokerError as e:
+        raise BadGatewayError(str(e))
 
     return None, 204
@@ -39,9 +39,12 @@ from swim_backend.db import property_has_changed
 from swim_backend.errors import NotFoundError, ConflictError, BadRequestError
 from swim_backend.marshal import marshal_with
 from swim_backend.typing import JSONType
+from subscription_manager.auth import credentials_cache
 from subscription_manager.db import users as user_service
+from subscription_manager.db import tokens as token_service
 from subscription_manager.db.models import User
 from subscription_manager.endpoints.schemas import UserSchema
+from subscription_manager.endpoints.utils import set_next_cursor
 
 __author__ = "EUROCONTROL (SWIM)"
 
@@ -52,7 +55,7 @@ def _admin_required_callback(user):
 
 @admin_required(callback=_admin_required_callback)
 @marshal_with(UserSchema, many=True)
-def get_users() -> JSONType:
+def get_users(limit: t.Optional[int] = None, cursor: t.Optional[int] = None) -> JSONType:
     """
     GET /users/ endpoint
 
@@ -60,7 +63,11 @@ def get_users() -> JSONType:
              backend.errors.ForbiddenError (HTTP error 403)
     """
 
-    return user_service.get_users()
+    result = user_service.get_users(limit=limit, cursor=cursor)
+
+    set_next_cursor(result, limit)
+
+    return result
 
 
 @admin_required(callback=_admin_required_callback)
@@ -129,11 +136,15 @@ def put_user(user_id: int) -> JSONType:
     if user is None:
         raise NotFoundError(f"User with id {user_id} does not exist")
 
+    username = user.username
+
     try:
         user = UserSchema().load(data=request.get_json(), instance=user, partial=True)
     except ValidationError as e:
         raise BadRequestError(str(e))
 
+    credentials_changed = _password_has_changed(user) or _has_been_deactivated(user)
+
     # in case the user has provided a new password then it needs to be hashed
     if _password_has_changed(user):
 
@@ -147,6 +158,10 @@ def put_user(user_id: int) -> JSONType:
     except IntegrityError:
         raise ConflictError("Error while saving user in DB")
 
+    if credentials_changed:
+        credentials_cache.invalidate(username)
+        token_service.revoke_user_tokens(user_updated.id)
+
     return user_updated
 
 
@@ -155,3 +170,10 @@ def _password_has_changed(user: User) -> bool:
     Indicates whether the password of the user has changed after being loaded from DB
     """
     return property_has_changed(user, 'password')
+
+
+def _has_been_deactivated(user: User) -> bool:
+    """
+    Indicates whether the user has been deactivated after being loaded from DB
+    """
+    return property_has_changed(user, 'active') and not user.active
@@ -0,0 +1,163 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import hashlib
+import typing as t
+from functools import wraps
+
+from flask import after_this_request, json, request, Response, stream_with_context
+from marshmallow import Schema
+
+from subscription_manager import BASE_PATH, outbox
+from subscription_manager.db.table_versions import get_table_versions
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+# the serialized items are sent in chunks of (at least) this size instead of one write per item
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def set_next_cursor(items: t.List[t.Any], limit: t.Optional[int] = None) -> None:
+    """
+    Adds the cursor of the next page in the headers of the response in case the current page is full, meaning that
+    more items may follow. The cursor is the id of the last item of the page.
+    :param items: the items of the current page
+    :param limit: the requested page size
+    """
+    if limit is None or len(items) < limit:
+        return
+
+    next_cursor = items[-1].id
+
+    @after_this_request
+    def add_next_cursor_header(response):
+        response.headers[NEXT_CURSOR_HEADER] = str(next_cursor)
+        return response
+
+
+def stream_json(schema: Schema, items: t.Iterable[t.Any]) -> Response:
+    """
+    Serializes the given items one by one as a JSON array which is written in the response while it is being built,
+    so that the memory needed and the time to first byte do not depend on the number of the items.
+    :param schema: the schema to serialize each item with
+    :param items: typically an iterator over a server side DB cursor
+    :return:
+    """
+    def generate():
+        chunk = ['[']
+        chunk_size = 1
+
+        for index, item in enumerate(items):
+            data = json.dumps(schema.dump(item))
+            chunk.append(f',{data}' if index else data)
+            chunk_size += len(data) + 1
+
+            if chunk_size >= STREAM_CHUNK_SIZE:
+                yield ''.join(chunk)
+                chunk, chunk_size = [], 0
+
+        chunk.append(']')
+        yield ''.join(chunk)
+
+    # the request context is kept alive while streaming so that the DB session stays open
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
+def deferred_status_code(status_code: int) -> int:
+    """
+    In case the broker side effects of the request have been deferred to the outbox, the request is only accepted: the
+    Location header then points to the status of the operation and 202 is returned instead of the given status code.
+    :param status_code: the status code of the synchronous mode
+    :return:
+    """
+    messages = outbox.get_enqueued_messages()
+
+    if not messages:
+        return status_code
+
+    location = f'{BASE_PATH}/operations/{messages[-1].id}'
+
+    @after_this_request
+    def add_location_header(response):
+        response.headers['Location'] = location
+        return response
+
+    return 202
+
+
+def _etag(versions: t.Dict[str, int]) -> str:
+    # the same URL may return different data per user (e.g. the subscriptions of non admin users)
+    key = f'{sorted(versions.items())}:{request.user.id}:{request.full_path}'
+
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def _set_etag(response: Response, etag: str) -> Response:
+    response.set_etag(etag, weak=True)
+    response.vary.add('Authorization')
+
+    return response
+
+
+def conditional_get(*table_names: str) -> t.Callable:
+    """
+    Adds a weak ETag in the responses of a GET endpoint, derived from the versions of the tables its data comes from
+    (see db.table_versions) along with the user and the URL. If the ETag of the request (If-None-Match) is still
+    current then 304 is returned before the endpoint runs, i.e. without reading or serializing any row.
+
+    :param table_names: the tables the response of the endpoint is built from
+    :return:
+    """
+    def decorator(endpoint: t.Callable) -> t.Callable:
+
+        @wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            # the versions are read before the rows: a change in between may mark newer data with an older ETag, which
+            # only costs a full response on the next request, whereas the opposite order could mark stale data as
+            # current
+            etag = _etag(get_table_versions(table_names))
+
+            # '*' is ignored since it would match resources that do not exist
+            if not request.if_none_match.star_tag and request.if_none_match.contains_weak(etag):
+                return _set_etag(Response(status=304), etag)
+
+            @after_this_request
+            def add_etag_header(response):
+                if response.status_code == 200:
+                    _set_etag(response, etag)
+                return response
+
+            return endpoint(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
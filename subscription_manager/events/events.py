@@ -30,9 +30,9 @@ Details on EUROCONTROL: http://www.eurocontrol.int
 from swim_backend.events import Event
 from swim_backend.local import LazyProxy
 from subscription_manager.events.subscription_handlers import create_subscription_handler, update_subscription_handler,\
-    delete_subscription_handler
+    delete_subscription_handler, create_subscriptions_handler, delete_subscriptions_handler
 from subscription_manager.events.topic_handlers import create_topic_handler, delete_topic_handler, \
-    delete_topic_subscriptions_handler
+    delete_topic_subscriptions_handler, delete_topic_in_background_handler
 
 __author__ = "EUROCONTROL (SWIM)"
 
@@ -45,10 +45,18 @@ class DeleteTopicEvent(Event):
     _type = 'Delete topic'
 
 
+class DeleteTopicInBackgroundEvent(Event):
+    _type = 'Delete topic in background'
+
+
 class CreateSubscription(Event):
     _type = 'Create subscription'
 
 
+class CreateSubscriptions(Event):
+    _type = 'Create subscriptions'
+
+
 class UpdateSubscription(Event):
     _type = 'Update subscription'
 
@@ -57,6 +65,10 @@ class DeleteSubscription(Event):
     _type = 'Delete subscription'
 
 
+class DeleteSubscriptions(Event):
+    _type = 'Delete subscriptions'
+
+
 # ############
 # Topic events
 # ############
@@ -68,6 +80,9 @@ delete_topic_event = LazyProxy(lambda: DeleteTopicEvent())
 delete_topic_event.append(delete_topic_subscriptions_handler)
 delete_topic_event.append(delete_topic_handler)
 
+delete_topic_in_background_event = LazyProxy(lambda: DeleteTopicInBackgroundEvent())
+delete_topic_in_background_event.append(delete_topic_in_background_handler)
+
 
 # ###################
 # Subscription events
@@ -76,8 +91,14 @@ delete_topic_event.append(delete_topic_handler)
 create_subscription_event = LazyProxy(lambda: CreateSubscription())
 create_subscription_event.append(create_subscription_handler)
 
+create_subscriptions_event = LazyProxy(lambda: CreateSubscriptions())
+create_subscriptions_event.append(create_subscriptions_handler)
+
 update_subscription_event = LazyProxy(lambda: UpdateSubscription())
 update_subscription_event.append(update_subscription_handler)
 
 delete_subscription_event = LazyProxy(lambda: DeleteSubscription())
 delete_subscription_event.append(delete_subscription_handler)
+
+delete_subscriptions_event = LazyProxy(lambda: DeleteSubscriptions())
+delete_subscriptions_event.append(delete_subscriptions_handler)
@@ -27,7 +27,9 @@ http://opensource.org/licenses/BSD-3-Clause
 
 Details on EUROCONTROL: http://www.eurocontrol.int
 """
+import typing as t
 
+from subscription_manager import outbox
 from subscription_manager.broker import broker
 from subscription_manager.db import subscriptions as db, Subscription
 from subscription_manager.db.utils import generate_queue
@@ -41,33 +43,80 @@ def create_subscription_handler(subscription: Subscription) -> None:
         - saves the subscription in DB
         - creates a queue for its assigned topics
 
+    In outbox mode the queue creation is recorded in the same transaction as the subscription and applied later.
+
     :param subscription:
     """
     subscription.queue = generate_queue()
 
+    if outbox.is_enabled():
+        outbox.enqueue_apply_topology(subscription)
+        db.create_subscription(subscription)
+        return
+
     db.create_subscription(subscription)
 
     broker.create_queue_for_topics(subscription.queue, subscription.topic_names)
 
 
+def create_subscriptions_handler(subscriptions: t.List[Subscription], broker_errors: t.Dict[str, str]) -> None:
+    """
+    Handler to be used upon the event of creating subscriptions in bulk:
+        - saves all the subscriptions in DB at once
+        - creates their queues and bindings with a few definitions uploads
+
+    The subscriptions whose topology could not be applied are deleted from DB and their errors are added in the given
+    dict keyed by their queue. In outbox mode the topology is recorded in the same transaction as the subscriptions.
+
+    :param subscriptions:
+    :param broker_errors:
+    """
+    for subscription in subscriptions:
+        subscription.queue = generate_queue()
+
+    if outbox.is_enabled():
+        for subscription in subscriptions:
+            outbox.enqueue_apply_topology(subscription)
+        db.create_subscriptions(subscriptions)
+        return
+
+    db.create_subscriptions(subscriptions)
+
+    errors = broker.apply_subscriptions_topology_per_chunk(subscriptions)
+
+    if errors:
+        db.delete_subscriptions_by_ids([subscription.id for subscription in subscriptions
+                                        if subscription.queue in errors])
+        broker_errors.update({queue: str(error) for queue, error in errors.items()})
+
+
 def update_subscription_handler(current_subscription: Subscription, updated_subscription: Subscription) -> None:
     """
         Handler to be used upon  the event of updating a subscription and more specifically when it's state is changed (PAUSE/RESUME):
-            - if it becomes active then the existing queue is again bound with its topics in the broker
+            - if it becomes active then the existing queue is again bound with its topics in the broker (in one upload)
             - if it becomes inactive then the queue will be deleted in the broker
+        In outbox mode the broker changes are recorded in the same transaction as the subscription and applied later.
     :param current_subscription:
     :param updated_subscription:
     """
+    if outbox.is_enabled():
+        if current_subscription.active != updated_subscription.active:
+            if not updated_subscription.active:
+                outbox.enqueue_delete_bindings(updated_subscription)
+            else:
+                outbox.enqueue_apply_topology(updated_subscription)
+
+        db.update_subscription(updated_subscription)
+        return
+
     if current_subscription.active != updated_subscription.active:
+        # the topics are loaded upfront so that the update of the subscription is not flushed during the broker calls
+        topic_names = db.get_topic_names(updated_subscription)
+
         if not updated_subscription.active:
-            for topic_name in updated_subscription.topic_names:
-                broker.delete_queue_binding(queue=updated_subscription.queue,
-                                            topic=topic_name)
+            broker.unbind_queue_from_topics(queue=updated_subscription.queue, topics=topic_names)
         else:
-            for topic_name in updated_subscription.topic_names:
-                broker.bind_queue_to_topic(queue=updated_subscription.queue,
-                                           topic=topic_name,
-                                           durable=updated_subscription.durable)
+            broker.apply_subscriptions_topology([updated_subscription])
 
     db.update_subscription(updated_subscription)
 
@@ -77,7 +126,39 @@ def delete_subscription_handler(subscription: Subscription) -> None:
     Handler to be used upon  the event of deleting a subscription by:
         - deletes the queue from the broker
         - deletes the subscription from DB
+    In outbox mode the queue deletion is recorded in the same transaction as the subscription deletion.
     :param subscription:
     """
+    if outbox.is_enabled():
+        outbox.enqueue_delete_queue(subscription)
+        db.delete_subscription(subscription)
+        return
+
     broker.delete_queue(subscription.queue)
     db.delete_subscription(subscription)
+
+
+def delete_subscriptions_handler(subscriptions: t.List[Subscription], broker_errors: t.Dict[str, str]) -> None:
+    """
+    Handler to be used upon the event of deleting subscriptions in bulk:
+        - deletes their queues from the broker concurrently
+        - deletes from DB at once the subscriptions whose queue was deleted
+
+    The subscriptions whose queue could not be deleted are kept and their errors are added in the given dict keyed by
+    their queue. In outbox mode the queue deletions are recorded in the same transaction as the subscription deletion.
+
+    :param subscriptions:
+    :param broker_errors:
+    """
+    if outbox.is_enabled():
+        for subscription in subscriptions:
+            outbox.enqueue_delete_queue(subscription)
+        db.delete_subscriptions_by_ids([subscription.id for subscription in subscriptions])
+        return
+
+    errors = broker.delete_queues([subscription.queue for subscription in subscriptions])
+
+    db.delete_subscriptions_by_ids([subscription.id for subscription in subscriptions
+                                    if subscription.queue not in errors])
+
+    broker_errors.update({queue: str(error) for queue, error in errors.items()})
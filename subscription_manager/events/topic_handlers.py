@@ -27,8 +27,9 @@ http://opensource.org/licenses/BSD-3-Clause
 
 Details on EUROCONTROL: http://www.eurocontrol.int
 """
-from subscription_manager.db import topics as db, Topic
-from subscription_manager.events.subscription_handlers import delete_subscription_handler
+from subscription_manager import outbox
+from subscription_manager.broker import broker
+from subscription_manager.db import topics as db, subscriptions as subscriptions_db, outbox as outbox_db, Topic
 
 __author__ = "EUROCONTROL (SWIM)"
 
@@ -54,8 +55,41 @@ def delete_topic_handler(topic: Topic) -> None:
 def delete_topic_subscriptions_handler(topic: Topic) -> None:
     """
     Handler to be used upon the event of deleting a topic:
-        - triggers the handler of subscription deletion
+        - deletes the queues of all its subscriptions concurrently
+        - deletes the subscriptions along with their topic associations with one statement which is committed along
+          with the deletion of the topic
+
+    If any queue cannot be deleted nothing is deleted from DB. Since queues that do not exist are considered deleted,
+    the deletion of the topic can simply be retried.
+
+    In outbox mode the deletion of the queues is recorded in the same transaction as the deletion of the subscriptions.
+    :param topic:
+    """
+    if outbox.is_enabled():
+        deleted = subscriptions_db.delete_topic_subscriptions(topic.id)
+        outbox.enqueue_delete_queues([queue for _, queue in deleted])
+        return
+
+    subscriptions = subscriptions_db.get_topic_subscriptions(topic.id)
+
+    errors = broker.delete_queues([subscription.queue for subscription in subscriptions])
+
+    if errors:
+        queue, error = next(iter(errors.items()))
+        raise broker.BrokerError(f"Error while deleting {len(errors)} queue(s) of topic {topic.name}, "
+                                 f"e.g. {queue}: {str(error)}")
+
+    # only the subscriptions whose queue was deleted, leaving the ones added in the meantime with their queue
+    subscriptions_db.delete_topic_subscriptions(topic.id,
+                                                subscription_ids=[subscription.id for subscription in subscriptions])
+
+
+def delete_topic_in_background_handler(topic: Topic) -> None:
+    """
+    Handler to be used upon the event of deleting a topic in background:
+        - records the deletion of the topic in the outbox; the outbox worker deletes its subscriptions and their queues
+          chunk by chunk, reporting the progress, and the topic itself at the end
     :param topic:
     """
-    for subscription in topic.subscriptions:
-        delete_subscription_handler(subscription)
+    outbox.enqueue_delete_topic(topic, total=subscriptions_db.count_topic_subscriptions(topic.id))
+    outbox_db.commit()
@@ -0,0 +1,138 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import multiprocessing
+import os
+import shutil
+
+__author__ = "EUROCONTROL (SWIM)"
+
+DESCRIPTION = """
+Gunicorn config of the production deployment:
+
+    gunicorn -c python:subscription_manager.gunicorn_config
+
+The app is created once in the master (preload_app) so that the workers are forked with connexion, the spec and the
+rest of the app already loaded. The resources that hold sockets (DB pool, broker HTTP session) are reset after the
+fork, so that no two processes ever share a connection.
+
+With the gevent worker class the standard library and psycopg2 are patched as soon as this config is loaded, i.e.
+before the app is preloaded, so that no module of the app binds the blocking implementations. psycogreen is required
+in this case.
+
+The handlers are blocking (Flask, psycopg2 and the REST client of the broker), so the number of requests in flight
+per worker is set by the worker class. gthread and gevent are the supported modes to keep many slow, broker-bound
+requests in flight; each of those requests holds a DB connection, so GUNICORN_THREADS (or the requests that actually
+reach the DB with gevent) should not exceed pool_size + max_overflow of SQLALCHEMY_ENGINE_OPTIONS.
+
+The settings can be tuned via environment variables:
+    GUNICORN_BIND            default 0.0.0.0:8080
+    GUNICORN_WORKERS         default 2 * CPUs + 1
+    GUNICORN_WORKER_CLASS    sync (default): one request per worker at a time, the safest choice for CPU bound loads
+                             gthread: GUNICORN_THREADS requests per worker, suits the I/O bound (DB, broker) endpoints
+                             gevent: GUNICORN_WORKER_CONNECTIONS greenlets per worker, requires gevent and psycogreen
+    GUNICORN_THREADS         default 4 (gthread)
+    GUNICORN_WORKER_CONNECTIONS  default 100 (gevent)
+    GUNICORN_TIMEOUT         default 60
+    PROMETHEUS_MULTIPROC_DIR default /tmp/subscription-manager-metrics, emptied on start
+"""
+
+wsgi_app = 'subscription_manager.wsgi:app'
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8080')
+
+workers = int(os.environ.get('GUNICORN_WORKERS', 2 * multiprocessing.cpu_count() + 1))
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+
+
+def _patch_for_gevent():
+    from gevent import monkey
+    monkey.patch_all()
+
+    try:
+        from psycogreen.gevent import patch_psycopg
+    except ImportError:
+        raise ImportError('psycogreen is required by the gevent worker class, otherwise the DB queries block the '
+                          'workers') from None
+
+    patch_psycopg()
+
+
+if worker_class == 'gevent':
+    _patch_for_gevent()
+
+threads = int(os.environ.get('GUNICORN_THREADS', 4)) if worker_class == 'gthread' else 1
+
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+
+keepalive = 5
+
+preload_app = True
+
+# recycles the workers every now and then in order to bound the effect of any memory leak
+max_requests = 10000
+max_requests_jitter = 1000
+
+DEFAULT_METRICS_DIR = '/tmp/subscription-manager-metrics'
+
+# the metrics of all the workers are aggregated through this directory. It is prepared here because the config is
+# loaded before the app, whose metrics are created along with their files in the master (preload_app)
+metrics_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', DEFAULT_METRICS_DIR)
+shutil.rmtree(metrics_dir, ignore_errors=True)
+os.makedirs(metrics_dir)
+
+
+def _dispose_db_engine():
+    from swim_backend.db import db
+    from subscription_manager.wsgi import app
+
+    with app.app_context():
+        db.engine.dispose()
+
+
+def pre_fork(server, worker):
+    # the connections opened while loading the app are closed by the process that owns them
+    _dispose_db_engine()
+
+
+def post_fork(server, worker):
+    from subscription_manager.broker.session import broker_session_pool
+
+    # the worker starts with an empty DB pool and broker session, so it never uses a socket of the master
+    _dispose_db_engine()
+    broker_session_pool.reset()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,210 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import functools
+import os
+import time
+import typing as t
+
+from flask import Flask, current_app as app, g, request, Response
+from prometheus_client import CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import multiprocess
+from sqlalchemy.engine import Engine
+
+from subscription_manager.db.instrumentation import observe_statements
+
+__author__ = "EUROCONTROL (SWIM)"
+
+# gunicorn workers share their metrics through the files of this directory, which has to be set (and emptied) before
+# the app is started
+MULTIPROC_DIR_ENV_VARS = ('PROMETHEUS_MULTIPROC_DIR', 'prometheus_multiproc_dir')
+
+DB_BUCKETS = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0)
+
+PASSWORD_HASH_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1.0, 2.5)
+
+REQUEST_LATENCY = Histogram(
+    'subscription_manager_request_duration_seconds',
+    'Duration of the handling of the HTTP requests',
+    ['operation_id', 'method', 'status']
+)
+
+SQL_LATENCY = Histogram(
+    'subscription_manager_sql_duration_seconds',
+    'Duration of the SQL statements',
+    ['statement'],
+    buckets=DB_BUCKETS
+)
+
+BROKER_CALL_LATENCY = Histogram(
+    'subscription_manager_broker_call_duration_seconds',
+    'Duration of the calls to the management API of the broker',
+    ['function', 'outcome']
+)
+
+PASSWORD_HASH_LATENCY = Histogram(
+    'subscription_manager_password_hash_duration_seconds',
+    'Duration of the password hash checks',
+    buckets=PASSWORD_HASH_BUCKETS
+)
+
+CREDENTIALS_CACHE_HITS = Counter(
+    'subscription_manager_credentials_cache_hits',
+    'Credentials found verified in the cache, sparing the password hash check'
+)
+
+CREDENTIALS_CACHE_MISSES = Counter(
+    'subscription_manager_credentials_cache_misses',
+    'Credentials not found verified in the cache'
+)
+
+CREDENTIALS_CACHE_EVICTIONS = Counter(
+    'subscription_manager_credentials_cache_evictions',
+    'Entries evicted from the credentials cache',
+    ['reason']
+)
+
+BROKER_CONNECTIONS = Counter(
+    'subscription_manager_broker_connections',
+    'Connections opened to the management API of the broker'
+)
+
+BROKER_REQUESTS = Counter(
+    'subscription_manager_broker_requests',
+    'Requests sent to the management API of the broker, over a new or an already open connection'
+)
+
+UNMATCHED_OPERATION = 'unmatched'
+
+
+def is_multiprocess() -> bool:
+    return any(os.environ.get(name) for name in MULTIPROC_DIR_ENV_VARS)
+
+
+def observe_broker_call(func: t.Callable) -> t.Callable:
+    """
+    Decorator that records the duration of the given broker function labelled by its name and by whether it raised.
+    It is applied only to the functions that are not called by other decorated ones, so that each call is recorded once.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            result = func(*args, **kwargs)
+            outcome = 'success'
+            return result
+        finally:
+            BROKER_CALL_LATENCY.labels(function=func.__name__.lstrip('_'), outcome=outcome) \
+                .observe(time.perf_counter() - start)
+
+    return wrapper
+
+
+def _statement_type(statement: str) -> str:
+    words = statement.lstrip().split(None, 1)
+
+    return words[0].upper() if words else 'UNKNOWN'
+
+
+def _observe_statement(statement: str, duration: float) -> None:
+    SQL_LATENCY.labels(statement=_statement_type(statement)).observe(duration)
+
+
+def _get_operation_ids(api) -> t.Dict[str, str]:
+    """
+    Maps the Flask endpoints registered by connexion to the operationIds of the spec they derive from
+    """
+    return {
+        operation['operationId'].replace('.', '_'): operation['operationId']
+        for methods in api.specification['paths'].values()
+        for operation in methods.values()
+        if isinstance(operation, dict) and 'operationId' in operation
+    }
+
+
+def metrics_view() -> Response:
+    if not (app.config.get('METRICS') or {}).get('public', False):
+        # imported here because auth records its own metrics
+        from subscription_manager.auth import authenticate_admin
+
+        is_admin = authenticate_admin(request)
+
+        if is_admin is None:
+            return Response('Invalid credentials', status=401, headers={'WWW-Authenticate': 'Basic realm="metrics"'})
+        if not is_admin:
+            return Response('Admin rights required', status=403)
+
+    if is_multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_app(app: Flask, api, engine: Engine) -> None:
+    """
+    Exposes the metrics in Prometheus format under METRICS.path and starts recording the latency of the requests per
+    operationId and of the SQL statements. The metrics are served to admin users via basic or bearer authentication,
+    unless METRICS.public is set.
+
+    :param app:
+    :param api: the connexion API the operationIds are taken from
+    :param engine: the engine of the DB
+    """
+    config = app.config.get('METRICS') or {}
+
+    if not config.get('enabled', True):
+        return
+
+    operation_ids = _get_operation_ids(api)
+
+    @app.before_request
+    def start_timer():
+        g.metrics_request_start = time.perf_counter()
+
+    @app.after_request
+    def observe_request(response):
+        start = g.pop('metrics_request_start', None)
+
+        if start is not None and request.endpoint != 'metrics':
+            # the endpoints of connexion are registered within the blueprint of the API
+            endpoint = request.endpoint.rsplit('.', 1)[-1] if request.endpoint else UNMATCHED_OPERATION
+            operation_id = operation_ids.get(endpoint, endpoint)
+
+            REQUEST_LATENCY.labels(operation_id=operation_id, method=request.method, status=response.status_code) \
+                .observe(time.perf_counter() - start)
+
+        return response
+
+    app.add_url_rule(config.get('path', '/metrics'), 'metrics', metrics_view)
+
+    observe_statements(engine, _observe_statement)
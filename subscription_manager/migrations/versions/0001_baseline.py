@@ -0,0 +1,69 @@
+"""baseline
+
+The schema as created by db.create_all() before the migrations were introduced, i.e. the users, topics, subscriptions
+and topic_subscriptions tables only. The tables added since then have their own revisions.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_baseline'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=50), nullable=False),
+        sa.Column('password', sa.String(length=256), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('active', sa.Boolean(), nullable=False),
+        sa.Column('is_admin', sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('username')
+    )
+    op.create_table(
+        'topics',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name')
+    )
+    op.create_table(
+        'subscriptions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('queue', sa.String(length=128), nullable=False),
+        sa.Column('active', sa.Boolean(), nullable=False),
+        sa.Column('qos', sa.Enum('AT_LEAST_ONCE', 'AT_MOST_ONCE', 'EXACTLY_ONCE', name='qos'), nullable=False),
+        sa.Column('durable', sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('queue')
+    )
+    op.create_table(
+        'topic_subscriptions',
+        sa.Column('topic_id', sa.Integer(), nullable=True),
+        sa.Column('subscription_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['subscription_id'], ['subscriptions.id']),
+        sa.ForeignKeyConstraint(['topic_id'], ['topics.id'])
+    )
+
+
+def downgrade():
+    op.drop_table('topic_subscriptions')
+    op.drop_table('subscriptions')
+    op.drop_table('topics')
+    op.drop_table('users')
+    sa.Enum(name='qos').drop(op.get_bind(), checkfirst=True)
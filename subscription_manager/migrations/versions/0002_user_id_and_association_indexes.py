@@ -0,0 +1,46 @@
+"""indexes on the user_id foreign keys and primary key of topic_subscriptions
+
+Revision ID: 0002_user_id_and_association_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_user_id_and_association_indexes'
+down_revision = '0001_baseline'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_topics_user_id', 'topics', ['user_id'], unique=False)
+    op.create_index('ix_subscriptions_user_id', 'subscriptions', ['user_id'], unique=False)
+
+    # without a primary key the association table may contain incomplete or duplicate rows which have to go before
+    # the key can be created
+    op.execute("DELETE FROM topic_subscriptions WHERE topic_id IS NULL OR subscription_id IS NULL")
+    op.execute("""
+        DELETE FROM topic_subscriptions a
+        USING topic_subscriptions b
+        WHERE a.ctid < b.ctid AND a.topic_id = b.topic_id AND a.subscription_id = b.subscription_id
+    """)
+
+    op.alter_column('topic_subscriptions', 'topic_id', existing_type=sa.Integer(), nullable=False)
+    op.alter_column('topic_subscriptions', 'subscription_id', existing_type=sa.Integer(), nullable=False)
+    op.create_primary_key('topic_subscriptions_pkey', 'topic_subscriptions', ['topic_id', 'subscription_id'])
+    op.create_index('ix_topic_subscriptions_subscription_id', 'topic_subscriptions', ['subscription_id'],
+                    unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_topic_subscriptions_subscription_id', table_name='topic_subscriptions')
+    op.drop_constraint('topic_subscriptions_pkey', 'topic_subscriptions', type_='primary')
+    op.alter_column('topic_subscriptions', 'subscription_id', existing_type=sa.Integer(), nullable=True)
+    op.alter_column('topic_subscriptions', 'topic_id', existing_type=sa.Integer(), nullable=True)
+
+    op.drop_index('ix_subscriptions_user_id', table_name='subscriptions')
+    op.drop_index('ix_topics_user_id', table_name='topics')
@@ -0,0 +1,58 @@
+"""table_changes recorded by triggers upon every change of the topics and subscriptions, and their table_versions
+counters
+
+Revision ID: 0003_table_versions
+Revises: 0002_user_id_and_association_indexes
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_table_versions'
+down_revision = '0002_user_id_and_association_indexes'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = ('topics', 'subscriptions', 'topic_subscriptions')
+
+
+def upgrade():
+    op.create_table(
+        'table_changes',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'table_versions',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION record_table_change() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO table_changes (name) VALUES (TG_TABLE_NAME);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    for table_name in VERSIONED_TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table_name}_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table_name}
+            FOR EACH STATEMENT EXECUTE PROCEDURE record_table_change()
+        """)
+
+
+def downgrade():
+    for table_name in VERSIONED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table_name}_version ON {table_name}")
+    op.execute("DROP FUNCTION IF EXISTS record_table_change()")
+
+    op.drop_table('table_versions')
+    op.drop_table('table_changes')
@@ -0,0 +1,44 @@
+"""outbox of the broker side effects
+
+Revision ID: 0005_outbox
+Revises: 0004_tokens
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_outbox'
+down_revision = '0004_tokens'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('action', sa.String(length=50), nullable=False),
+        sa.Column('key', sa.String(length=128), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('status', sa.Enum('PENDING', 'DONE', 'FAILED', name='outboxstatus'), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('available_at', sa.DateTime(), nullable=False),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_outbox_key', 'outbox', ['key'], unique=False)
+    op.create_index('ix_outbox_status', 'outbox', ['status'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_outbox_status', table_name='outbox')
+    op.drop_index('ix_outbox_key', table_name='outbox')
+    op.drop_table('outbox')
+    sa.Enum(name='outboxstatus').drop(op.get_bind(), checkfirst=True)
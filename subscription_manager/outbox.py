@@ -0,0 +1,298 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import logging
+import time
+import typing as t
+from datetime import datetime, timedelta
+
+from flask import current_app as app, g, has_request_context, request
+
+from subscription_manager.broker import broker
+from subscription_manager.db import outbox as db, subscriptions as subscriptions_db, topics as topics_db, \
+    OutboxMessage, OutboxStatus, Subscription, Topic
+
+__author__ = "EUROCONTROL (SWIM)"
+
+_logger = logging.getLogger(__name__)
+
+APPLY_TOPOLOGY = 'apply_topology'
+DELETE_BINDINGS = 'delete_bindings'
+DELETE_QUEUE = 'delete_queue'
+DELETE_TOPIC = 'delete_topic'
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_MAX_ATTEMPTS = 10
+DEFAULT_RETRY_DELAY = 5
+MAX_RETRY_DELAY = 600
+DEFAULT_POLL_INTERVAL = 1
+DEFAULT_TOPIC_DELETION_CHUNK_SIZE = 1000
+
+
+def _config() -> t.Dict[str, t.Any]:
+    return app.config.get('OUTBOX') or {}
+
+
+def is_enabled() -> bool:
+    """
+    Whether the broker side effects are applied asynchronously through the outbox instead of within the request
+    """
+    return bool(_config().get('enabled', False))
+
+
+def _enqueue(action: str, key: str, payload: t.Dict[str, t.Any]) -> OutboxMessage:
+    message = OutboxMessage(
+        action=action,
+        key=key,
+        payload=payload,
+        user_id=request.user.id if has_request_context() and hasattr(request, 'user') else None
+    )
+
+    db.add_outbox_message(message)
+
+    if has_request_context():
+        g.setdefault('outbox_messages', []).append(message)
+
+    return message
+
+
+def get_enqueued_messages() -> t.List[OutboxMessage]:
+    """
+    :return: the messages enqueued while handling the current request
+    """
+    return g.get('outbox_messages', [])
+
+
+def enqueue_apply_topology(subscription: Subscription) -> OutboxMessage:
+    """
+    Records the creation of the queue of the subscription and, if it is active, of its bindings with its topics
+    """
+    # the message is recorded before the subscription is flushed, so unset flags stand for their defaults (True)
+    return _enqueue(APPLY_TOPOLOGY, key=subscription.queue, payload={
+        'queue': subscription.queue,
+        'durable': subscription.durable is not False,
+        'topics': subscription.topic_names if subscription.active is not False else []
+    })
+
+
+def enqueue_delete_bindings(subscription: Subscription) -> OutboxMessage:
+    """
+    Records the deletion of the bindings of the queue of the subscription with its topics
+    """
+    return _enqueue(DELETE_BINDINGS, key=subscription.queue, payload={
+        'queue': subscription.queue,
+        'topics': subscription.topic_names
+    })
+
+
+def enqueue_delete_queue(subscription: Subscription) -> OutboxMessage:
+    """
+    Records the deletion of the queue of the subscription
+    """
+    return _enqueue(DELETE_QUEUE, key=subscription.queue, payload={
+        'queue': subscription.queue
+    })
+
+
+def enqueue_delete_queues(queues: t.List[str]) -> None:
+    """
+    Records at once the deletion of the given queues without creating an instance per message
+    """
+    user_id = request.user.id if has_request_context() and hasattr(request, 'user') else None
+
+    db.add_outbox_messages([{'action': DELETE_QUEUE, 'key': queue, 'payload': {'queue': queue}, 'user_id': user_id}
+                            for queue in queues])
+
+
+def enqueue_delete_topic(topic: Topic, total: int) -> OutboxMessage:
+    """
+    Records the deletion of the topic along with its subscriptions and their queues. The payload keeps track of the
+    progress of the deletion which is done chunk by chunk.
+
+    :param topic:
+    :param total: the number of subscriptions of the topic
+    """
+    return _enqueue(DELETE_TOPIC, key=f'topic:{topic.id}', payload={
+        'topic_id': topic.id,
+        'topic': topic.name,
+        'total': total,
+        'deleted': 0,
+        'finished': False
+    })
+
+
+def _apply_topology(messages: t.List[OutboxMessage]) -> t.Dict[int, str]:
+    # all the queues and bindings of the batch go in a few definitions uploads which are idempotent
+    queues = {message.payload['queue']: message.payload['durable'] for message in messages}
+    bindings = [(message.payload['queue'], topic) for message in messages for topic in message.payload['topics']]
+
+    try:
+        broker.apply_definitions(queues, bindings)
+    except broker.BrokerError as e:
+        return {message.id: str(e) for message in messages}
+
+    return {}
+
+
+def _delete_bindings(messages: t.List[OutboxMessage]) -> t.Dict[int, str]:
+    message_by_binding = {(message.payload['queue'], topic): message
+                          for message in messages for topic in message.payload['topics']}
+
+    errors = broker.delete_bindings(list(message_by_binding))
+
+    return {message_by_binding[binding].id: str(error) for binding, error in errors.items()}
+
+
+def _delete_queues(messages: t.List[OutboxMessage]) -> t.Dict[int, str]:
+    message_by_queue = {message.payload['queue']: message for message in messages}
+
+    errors = broker.delete_queues(list(message_by_queue))
+
+    return {message_by_queue[queue].id: str(error) for queue, error in errors.items()}
+
+
+def _delete_topics(messages: t.List[OutboxMessage]) -> t.Dict[int, str]:
+    # one chunk of subscriptions per message and batch; the message stays pending until the topic is deleted
+    chunk_size = _config().get('topic_deletion_chunk_size', DEFAULT_TOPIC_DELETION_CHUNK_SIZE)
+
+    # all the queues are deleted before any row, since the deleted rows stay locked until the commit of the batch
+    chunks = []
+    for message in messages:
+        subscriptions = subscriptions_db.get_topic_subscriptions(message.payload['topic_id'], limit=chunk_size)
+
+        queue_errors = broker.delete_queues([subscription.queue for subscription in subscriptions])
+
+        chunks.append((message, subscriptions, queue_errors))
+
+    errors = {}
+    for message, subscriptions, queue_errors in chunks:
+        topic_id = message.payload['topic_id']
+
+        deleted_ids = [subscription.id for subscription in subscriptions if subscription.queue not in queue_errors]
+        deleted = subscriptions_db.delete_topic_subscriptions(topic_id, subscription_ids=deleted_ids)
+
+        finished = len(subscriptions) < chunk_size and not queue_errors
+        if finished:
+            topics_db.delete_topic_by_id(topic_id)
+
+        # the payload is reassigned as a whole so that the change is detected
+        message.payload = dict(message.payload, deleted=message.payload['deleted'] + len(deleted), finished=finished)
+
+        if queue_errors:
+            queue, error = next(iter(queue_errors.items()))
+            errors[message.id] = f"Error while deleting {len(queue_errors)} queue(s), e.g. {queue}: {str(error)}"
+
+    return errors
+
+
+# the actions are applied in this order; DELETE_TOPIC, the only one that changes topics and subscriptions, goes last so
+# that its changes are committed right after they are made instead of being held during the broker calls of the others
+_ACTIONS: t.Dict[str, t.Callable[[t.List[OutboxMessage]], t.Dict[int, str]]] = {
+    APPLY_TOPOLOGY: _apply_topology,
+    DELETE_BINDINGS: _delete_bindings,
+    DELETE_QUEUE: _delete_queues,
+    DELETE_TOPIC: _delete_topics,
+}
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    delay = _config().get('retry_delay', DEFAULT_RETRY_DELAY) * 2 ** (attempts - 1)
+
+    return timedelta(seconds=min(delay, MAX_RETRY_DELAY))
+
+
+def _mark(message: OutboxMessage, error: t.Optional[str]) -> None:
+    if error is None and message.payload.get('finished') is False:
+        # a chunked action that made progress is due again right away without counting an attempt
+        message.available_at = datetime.utcnow()
+        return
+
+    message.attempts += 1
+
+    if error is None:
+        message.status = OutboxStatus.DONE
+        message.error = None
+        message.completed_at = datetime.utcnow()
+    elif message.attempts >= _config().get('max_attempts', DEFAULT_MAX_ATTEMPTS):
+        message.status = OutboxStatus.FAILED
+        message.error = error
+        message.completed_at = datetime.utcnow()
+        _logger.error(f"Outbox message {message.id} ({message.action} {message.key}) failed: {error}")
+    else:
+        message.error = error
+        message.available_at = datetime.utcnow() + _retry_delay(message.attempts)
+
+
+def process_batch(batch_size: t.Optional[int] = None) -> int:
+    """
+    Claims a batch of due messages and applies them to the broker grouped by action, so that a batch costs a few
+    management API calls regardless of its size. Failed messages are retried with exponential backoff until they
+    reach the max number of attempts. All the actions are idempotent, so applying a message twice (e.g. after a crash
+    right before the commit) is harmless.
+
+    :param batch_size: defaults to OUTBOX.batch_size
+    :return: the number of processed messages
+    """
+    messages = db.claim_outbox_messages(batch_size or _config().get('batch_size', DEFAULT_BATCH_SIZE))
+
+    errors: t.Dict[int, str] = {}
+    for action, action_func in _ACTIONS.items():
+        action_messages = [message for message in messages if message.action == action]
+        if action_messages:
+            errors.update(action_func(action_messages))
+
+    for message in messages:
+        if message.action not in _ACTIONS:
+            errors[message.id] = f"Unknown action {message.action}"
+
+        _mark(message, errors.get(message.id))
+
+    db.commit()
+
+    return len(messages)
+
+
+def run_worker(stop: t.Callable[[], bool] = lambda: False) -> None:
+    """
+    Drains the outbox continuously; it sleeps only when there is nothing due.
+
+    :param stop: checked before each batch to stop the worker
+    """
+    poll_interval = _config().get('poll_interval', DEFAULT_POLL_INTERVAL)
+
+    while not stop():
+        try:
+            processed = process_batch()
+        except Exception as e:
+            _logger.exception(f"Error while processing the outbox: {str(e)}")
+            db.rollback()
+            processed = 0
+
+        if not processed:
+            time.sleep(poll_interval)
@@ -0,0 +1,139 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+import typing as t
+
+from flask import Flask, current_app as app, g, request, Response
+
+from subscription_manager.auth import authenticate_admin
+
+__author__ = "EUROCONTROL (SWIM)"
+
+_logger = logging.getLogger(__name__)
+
+# 'file' stores the profile in PROFILING.dir and returns its name in PROFILE_FILE_HEADER; 'text' returns the stats as
+# the body of the response instead of the actual one
+PROFILE_HEADER = 'X-Profile'
+PROFILE_FILE_HEADER = 'X-Profile-File'
+PROFILED_STATUS_HEADER = 'X-Profiled-Status'
+
+FILE_MODE = 'file'
+TEXT_MODE = 'text'
+
+DEFAULT_DIR = '/tmp/subscription-manager-profiles'
+
+DEFAULT_TEXT_LIMIT = 50
+
+
+def _config() -> t.Dict[str, t.Any]:
+    return app.config.get('PROFILING') or {}
+
+
+def _save(profiler: cProfile.Profile) -> str:
+    directory = _config().get('dir', DEFAULT_DIR)
+    os.makedirs(directory, exist_ok=True)
+
+    endpoint = (request.endpoint or 'unmatched').rsplit('.', 1)[-1]
+    filename = f'{time.strftime("%Y%m%dT%H%M%S")}-{os.getpid()}-{request.method}-{endpoint}.prof'
+
+    profiler.dump_stats(os.path.join(directory, filename))
+
+    return filename
+
+
+def _to_text(profiler: cProfile.Profile) -> str:
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative') \
+        .print_stats(_config().get('text_limit', DEFAULT_TEXT_LIMIT))
+
+    return stream.getvalue()
+
+
+def start_profiler() -> None:
+    if not _config().get('enabled', False) or request.headers.get(PROFILE_HEADER) not in (FILE_MODE, TEXT_MODE):
+        return
+
+    # the header of any other client is ignored, so that it cannot impose the overhead of the profiler
+    # authenticated here since the authentication of connexion takes place within the handler, i.e. after the profiler
+    # would have to start
+    if not authenticate_admin(request):
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # another profiler is already active in this thread
+        _logger.warning(f"Request could not be profiled: {str(e)}")
+        return
+
+    g.profiler = profiler
+
+
+def stop_profiler(response: Response) -> Response:
+    profiler = g.pop('profiler', None)
+
+    if profiler is None:
+        return response
+
+    profiler.disable()
+
+    if request.headers[PROFILE_HEADER] == TEXT_MODE:
+        text_response = Response(_to_text(profiler), mimetype='text/plain')
+        text_response.headers[PROFILED_STATUS_HEADER] = str(response.status_code)
+        return text_response
+
+    filename = _save(profiler)
+    _logger.info(f"Profile of {request.method} {request.path} saved in {filename}")
+    response.headers[PROFILE_FILE_HEADER] = filename
+
+    return response
+
+
+def init_app(app: Flask) -> None:
+    """
+    Enables the profiling of single requests on demand, if PROFILING.enabled is set. Requests of admin users that carry
+    the X-Profile header are profiled with cProfile from the start of the Flask handling up to the response, thus
+    including the validation of connexion, the authentication, the (de)serialization of marshmallow and the events
+    handlers. The user is authenticated before the profiler starts and the header is ignored for any other user. Calls
+    that run in other threads (i.e. the concurrent broker calls) are not captured.
+
+    X-Profile: file -> the profile is stored in PROFILING.dir (pstats format) and its name is returned in X-Profile-File
+    X-Profile: text -> the top PROFILING.text_limit functions by cumulative time are returned instead of the response
+
+    :param app:
+    """
+    app.before_request(start_profiler)
+    app.after_request(stop_profiler)
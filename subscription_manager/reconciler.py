@@ -0,0 +1,187 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import logging
+import re
+import typing as t
+
+from subscription_manager.broker import broker
+from subscription_manager.db import subscriptions as db
+
+__author__ = "EUROCONTROL (SWIM)"
+
+_logger = logging.getLogger(__name__)
+
+# the queues created by the subscription manager are named after a UUID hex (see db.utils.generate_queue); any other
+# queue of the broker is not managed by it and is never touched
+MANAGED_QUEUE_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+Binding = t.Tuple[str, str]
+
+
+class Topology:
+    """
+    The queues and the bindings of queues with topics either expected by the DB or found in the broker
+    """
+
+    def __init__(self, queues: t.Optional[t.Dict[str, bool]] = None, bindings: t.Optional[t.Set[Binding]] = None):
+        """
+        :param queues: the durability of each queue keyed by its name
+        :param bindings: (queue, topic) pairs
+        """
+        self.queues = queues or {}
+        self.bindings = bindings or set()
+
+
+class ReconciliationReport:
+    """
+    The differences between the expected and the actual topology along with the errors that occurred while repairing
+    them.
+    """
+
+    def __init__(self,
+                 missing_queues: t.Dict[str, bool],
+                 missing_bindings: t.Set[Binding],
+                 orphan_queues: t.Set[str],
+                 stale_bindings: t.Set[Binding]) -> None:
+        """
+        :param missing_queues: queues of subscriptions that do not exist in the broker
+        :param missing_bindings: bindings of active subscriptions that do not exist in the broker
+        :param orphan_queues: managed queues that do not belong to any subscription
+        :param stale_bindings: bindings of managed queues that do not correspond to an active subscription
+        """
+        self.missing_queues = missing_queues
+        self.missing_bindings = missing_bindings
+        self.orphan_queues = orphan_queues
+        self.stale_bindings = stale_bindings
+        self.errors: t.List[str] = []
+
+    @property
+    def has_drift(self) -> bool:
+        return bool(self.missing_queues or self.missing_bindings or self.orphan_queues or self.stale_bindings)
+
+    def to_dict(self) -> t.Dict[str, t.Any]:
+        return {
+            'missing_queues': sorted(self.missing_queues),
+            'missing_bindings': sorted(self.missing_bindings),
+            'orphan_queues': sorted(self.orphan_queues),
+            'stale_bindings': sorted(self.stale_bindings),
+            'errors': self.errors
+        }
+
+    def __str__(self) -> str:
+        return f"missing queues: {len(self.missing_queues)}, missing bindings: {len(self.missing_bindings)}, " \
+               f"orphan queues: {len(self.orphan_queues)}, stale bindings: {len(self.stale_bindings)}, " \
+               f"errors: {len(self.errors)}"
+
+
+def is_managed_queue(queue: str) -> bool:
+    return MANAGED_QUEUE_PATTERN.match(queue) is not None
+
+
+def get_expected_topology() -> Topology:
+    """
+    Loads the topology implied by the subscriptions in DB with a single query
+    """
+    topology = Topology()
+
+    for queue, durable, active, topic_name in db.iter_subscriptions_topology():
+        topology.queues[queue] = durable
+
+        if active and topic_name is not None:
+            topology.bindings.add((queue, topic_name))
+
+    return topology
+
+
+def get_actual_topology() -> Topology:
+    """
+    Loads the managed queues and their bindings from the broker with two calls of the management API
+    """
+    queues = {queue: durable for queue, durable in broker.get_queues().items() if is_managed_queue(queue)}
+    bindings = {(queue, topic) for queue, topic in broker.get_topic_bindings() if is_managed_queue(queue)}
+
+    return Topology(queues=queues, bindings=bindings)
+
+
+def diff(expected: Topology, actual: Topology) -> ReconciliationReport:
+    """
+    :param expected:
+    :param actual:
+    :return:
+    """
+    orphan_queues = set(actual.queues) - set(expected.queues)
+
+    return ReconciliationReport(
+        missing_queues={queue: durable for queue, durable in expected.queues.items() if queue not in actual.queues},
+        missing_bindings=expected.bindings - actual.bindings,
+        orphan_queues=orphan_queues,
+        # the bindings of the orphan queues go away along with them
+        stale_bindings={binding for binding in actual.bindings - expected.bindings if binding[0] not in orphan_queues}
+    )
+
+
+def reconcile(dry_run: bool = False) -> ReconciliationReport:
+    """
+    Detects the drift between the subscriptions in DB and the topology of the broker and repairs it with the minimal
+    set of changes:
+        - missing queues and bindings are created with a few uploads of definitions
+        - orphan queues and stale bindings are deleted concurrently
+
+    The broker is read before the DB: a subscription created in the meantime may then be found missing from the
+    broker and be (idempotently) created again, whereas its queue can never be mistaken for an orphan one and deleted.
+
+    :param dry_run: if True the drift is only reported
+    :return:
+    """
+    actual = get_actual_topology()
+    expected = get_expected_topology()
+
+    report = diff(expected, actual)
+
+    _logger.info(f"Broker drift: {report}")
+
+    if dry_run or not report.has_drift:
+        return report
+
+    try:
+        broker.apply_definitions(report.missing_queues, sorted(report.missing_bindings))
+    except broker.BrokerError as e:
+        report.errors.append(str(e))
+
+    for binding, error in broker.delete_bindings(sorted(report.stale_bindings)).items():
+        report.errors.append(f"Error while deleting binding of queue {binding[0]} with topic {binding[1]}: {error}")
+
+    for queue, error in broker.delete_queues(sorted(report.orphan_queues)).items():
+        report.errors.append(f"Error while deleting queue {queue}: {error}")
+
+    for error in report.errors:
+        _logger.error(error)
+
+    return report
@@ -0,0 +1,166 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import typing as t
+from pathlib import Path
+
+import connexion
+import yaml
+from connexion.apis.abstract import AbstractAPI
+from connexion.spec import OpenAPISpecification
+
+__author__ = "EUROCONTROL (SWIM)"
+
+_logger = logging.getLogger(__name__)
+
+SPEC_FILE = Path(__file__).parent / 'openapi.yml'
+
+DESCRIPTION = """
+Parses and validates the OpenAPI spec once and stores the spec as processed by connexion in a JSON artifact keyed on
+the hash of the spec, so that the workers load it without parsing the YAML, which is the bulk of the loading time.
+connexion still validates the spec in every worker as it offers no way to skip it. It is meant to run at build time:
+
+    python -m subscription_manager.spec_cache [--dir /path/to/cache]
+"""
+
+
+def spec_hash(spec_file: Path = SPEC_FILE) -> str:
+    """
+    The hash of the content of the spec along with the version of connexion, which determines the validation rules
+    """
+    digest = hashlib.sha256(spec_file.read_bytes())
+    digest.update(connexion.__version__.encode('utf-8'))
+
+    return digest.hexdigest()
+
+
+def artifact_path(spec_file: Path = SPEC_FILE, cache_dir: t.Optional[str] = None) -> Path:
+    """
+    :param spec_file:
+    :param cache_dir: defaults to the directory of the spec
+    :return:
+    """
+    directory = Path(cache_dir) if cache_dir else spec_file.parent
+
+    return directory / f'.{spec_file.stem}.{spec_hash(spec_file)}.json'
+
+
+def _parse(spec_file: Path) -> t.Dict[str, t.Any]:
+    with spec_file.open('rb') as f:
+        return yaml.safe_load(f)
+
+
+def _write(path: Path, spec: t.Dict[str, t.Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # the artifact is written aside and renamed so that concurrent workers never read a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(spec, f)
+        os.replace(tmp_path, str(path))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def build(spec_file: Path = SPEC_FILE, cache_dir: t.Optional[str] = None) -> Path:
+    """
+    Parses and validates the spec and stores it as an artifact
+
+    :raises: connexion.exceptions.InvalidSpecification
+    :return: the path of the artifact
+    """
+    spec = OpenAPISpecification(_parse(spec_file)).raw
+
+    path = artifact_path(spec_file, cache_dir)
+    _write(path, spec)
+
+    return path
+
+
+def load(spec_file: Path = SPEC_FILE, cache_dir: t.Optional[str] = None) -> t.Optional[t.Dict[str, t.Any]]:
+    """
+    :return: the parsed spec from the artifact that matches the current spec or None if there is no such artifact
+    """
+    try:
+        with artifact_path(spec_file, cache_dir).open() as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def add_api(connexion_app: connexion.App,
+            spec_file: Path = SPEC_FILE,
+            cache_dir: t.Optional[str] = None,
+            enabled: bool = True,
+            **kwargs) -> AbstractAPI:
+    """
+    Adds the API of the spec to the app. The spec is taken from its artifact if it exists, which spares the parsing of
+    the YAML. Otherwise it is parsed as usual and the artifact is stored for the next workers, if the cache directory is
+    writable.
+
+    :param connexion_app:
+    :param spec_file:
+    :param cache_dir: defaults to the directory of the spec
+    :param enabled: if False the spec is always parsed from the YAML
+    :param kwargs: passed to connexion_app.add_api
+    :return:
+    """
+    if not enabled:
+        return connexion_app.add_api(spec_file, **kwargs)
+
+    spec = load(spec_file, cache_dir)
+
+    if spec is not None:
+        return connexion_app.add_api(spec, **kwargs)
+
+    api = connexion_app.add_api(_parse(spec_file), **kwargs)
+
+    try:
+        _write(artifact_path(spec_file, cache_dir), api.specification.raw)
+    except OSError as e:
+        _logger.warning(f"The spec artifact could not be stored: {str(e)}")
+
+    return api
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=DESCRIPTION, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--spec', default=str(SPEC_FILE))
+    parser.add_argument('--dir', help='the directory of the artifact, defaults to the directory of the spec')
+    args = parser.parse_args()
+
+    print(build(Path(args.spec), args.dir))
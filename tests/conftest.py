@@ -27,6 +27,8 @@ http://opensource.org/licenses/BSD-3-Clause
 
 Details on EUROCONTROL: http://www.eurocontrol.int
 """
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
 from uuid import uuid4
 
 import pytest
@@ -40,6 +42,34 @@ from tests.subscription_manager.utils import make_basic_auth_header
 DEFAULT_LOGIN_PASS = 'password'
 
 
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args, **kwargs):
+        pass
+
+
+@pytest.fixture
+def http_server():
+    """
+    :return: the URL of a local HTTP/1.1 server replying with an empty JSON object to any GET request
+    """
+    server = HTTPServer(('localhost', 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield 'http://{}:{}'.format(*server.server_address[:2])
+
+    server.shutdown()
+    server.server_close()
+
+
 @pytest.yield_fixture(scope='session')
 def app():
     config_file = resource_filename(__name__, 'test_config.yml')
@@ -0,0 +1,145 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+from unittest import mock
+
+import pytest
+from rest_client.errors import APIError
+
+from subscription_manager.broker import broker
+from subscription_manager.broker.broker import BrokerError
+from tests.subscription_manager.utils import make_subscription, make_topic
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+@mock.patch('subscription_manager.broker.broker.broker_client')
+def test_create_queue_for_topics__queue_is_created_and_bound_to_all_topics(mock_broker_client):
+    topics = [f'topic{i}' for i in range(20)]
+
+    broker.create_queue_for_topics('queue', topics)
+
+    mock_broker_client.create_queue.assert_called_once_with(name='queue')
+    assert {mock.call(queue='queue', topic='default', key=topic) for topic in topics} == \
+        set(mock_broker_client.bind_queue_to_topic.call_args_list)
+    mock_broker_client.delete_queue_binding.assert_not_called()
+
+
+@mock.patch('subscription_manager.broker.broker.broker_client')
+def test_create_queue_for_topics__queue_creation_fails__raises_broker_error(mock_broker_client):
+    mock_broker_client.create_queue.side_effect = APIError('error', 500)
+
+    with pytest.raises(BrokerError):
+        broker.create_queue_for_topics('queue', ['topic1', 'topic2'])
+
+    mock_broker_client.bind_queue_to_topic.assert_not_called()
+
+
+@mock.patch('subscription_manager.broker.broker.broker_client')
+def test_create_queue_for_topics__binding_fails__successful_bindings_are_rolled_back(mock_broker_client):
+    def bind_queue_to_topic(queue, topic, key):
+        if key == 'topic2':
+            raise APIError('error', 500)
+
+    mock_broker_client.bind_queue_to_topic.side_effect = bind_queue_to_topic
+
+    with pytest.raises(BrokerError) as e:
+        broker.create_queue_for_topics('queue', ['topic1', 'topic2', 'topic3'])
+
+    assert "Error while creating queue queue for topics ['topic1', 'topic2', 'topic3']" == str(e.value)
+    assert {mock.call('queue', topic='default', key='topic1'), mock.call('queue', topic='default', key='topic3')} == \
+        set(mock_broker_client.delete_queue_binding.call_args_list)
+
+
+@mock.patch('subscription_manager.broker.broker.RabbitMQRestClient')
+def test_create_queue_for_topics__concurrent_bindings_share_the_client_of_the_calling_context(mock_client_class, app):
+    topics = [f'topic{i}' for i in range(20)]
+
+    with app.app_context():
+        broker.create_queue_for_topics('queue', topics)
+
+    mock_client_class.assert_called_once()
+    assert len(topics) == mock_client_class.return_value.bind_queue_to_topic.call_count
+
+
+def _make_subscription(topic_names, active=True, durable=True):
+    subscription = make_subscription(topics=[make_topic(name) for name in topic_names])
+    subscription.active = active
+    subscription.durable = durable
+
+    return subscription
+
+
+def test_get_subscriptions_definitions__queues_for_all_and_bindings_for_active_subscriptions_only():
+    active_subscription = _make_subscription(['topic1', 'topic2'])
+    paused_subscription = _make_subscription(['topic3'], active=False, durable=False)
+
+    definitions = broker.get_subscriptions_definitions([active_subscription, paused_subscription])
+
+    assert [(active_subscription.queue, True), (paused_subscription.queue, False)] == \
+        [(queue['name'], queue['durable']) for queue in definitions['queues']]
+    assert [('default', active_subscription.queue, 'topic1'), ('default', active_subscription.queue, 'topic2')] == \
+        [(binding['source'], binding['destination'], binding['routing_key']) for binding in definitions['bindings']]
+
+
+@mock.patch('subscription_manager.broker.broker._upload_definitions')
+def test_apply_subscriptions_topology__definitions_are_uploaded_in_chunks(mock_upload_definitions):
+    subscriptions = [_make_subscription(['topic1']) for _ in range(5)]
+
+    broker.apply_subscriptions_topology(subscriptions, chunk_size=2)
+
+    assert [2, 2, 1] == [len(c[0][0]['queues']) for c in mock_upload_definitions.call_args_list]
+    assert [s.queue for s in subscriptions] == \
+        [queue['name'] for c in mock_upload_definitions.call_args_list for queue in c[0][0]['queues']]
+
+
+@mock.patch('subscription_manager.broker.broker.broker_session_pool')
+def test_apply_subscriptions_topology__upload_fails__raises_broker_error(mock_broker_session_pool):
+    mock_broker_session_pool.get_session.return_value.request.return_value = mock.Mock(ok=False, status_code=400,
+                                                                                        text='bad request')
+
+    with pytest.raises(BrokerError) as e:
+        broker.apply_subscriptions_topology([_make_subscription(['topic1'])])
+
+    assert 'Error while accessing definitions/%2F: 400 bad request' == str(e.value)
+
+
+@mock.patch('subscription_manager.broker.broker.broker_client')
+def test_delete_queues__not_found_queues_are_considered_deleted(mock_broker_client):
+    def delete_queue(queue):
+        if queue == 'missing':
+            raise APIError('not found', 404)
+        if queue == 'failing':
+            raise APIError('error', 500)
+
+    mock_broker_client.delete_queue.side_effect = delete_queue
+
+    errors = broker.delete_queues(['queue', 'missing', 'failing'])
+
+    assert ['failing'] == list(errors)
@@ -0,0 +1,130 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+from unittest import mock
+
+import pytest
+from rest_client.errors import APIError
+
+from subscription_manager.broker import broker
+from subscription_manager.broker.fake import FakeBroker, fake_broker
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+@pytest.fixture
+def fake():
+    return FakeBroker()
+
+
+@pytest.fixture
+def fake_mode(app):
+    fake_broker.reset()
+
+    # the client of the app context may have been created already
+    with mock.patch.dict(app.config['BROKER'], fake=True), \
+            mock.patch('subscription_manager.broker.broker.broker_client', fake_broker):
+        yield fake_broker
+
+    fake_broker.reset()
+
+
+def test_fake_broker__queue_is_created_bound_and_deleted_along_with_its_bindings(fake):
+    fake.create_queue('queue')
+    fake.bind_queue_to_topic('queue', topic='default', key='topic')
+
+    assert {'name': 'queue', 'durable': True} == fake.get_queue('queue')
+    assert {('default', 'queue', 'topic')} == fake.bindings
+
+    fake.delete_queue('queue')
+
+    assert {} == fake.queues
+    assert set() == fake.bindings
+
+
+@pytest.mark.parametrize('call', [
+    lambda fake: fake.get_queue('missing'),
+    lambda fake: fake.delete_queue('missing'),
+    lambda fake: fake.delete_queue_binding('missing', topic='default', key='topic'),
+    lambda fake: fake.bind_queue_to_topic('missing', topic='default', key='topic'),
+    lambda fake: fake.delete_topic('missing'),
+])
+def test_fake_broker__missing_resources__raise_404(fake, call):
+    with pytest.raises(APIError) as e:
+        call(fake)
+
+    assert 404 == e.value.status_code
+
+
+def test_fake_broker__failures_are_injected_at_the_given_rate(fake):
+    fake.configure(failure_rate=1)
+
+    with pytest.raises(APIError) as e:
+        fake.create_queue('queue')
+
+    assert 500 == e.value.status_code
+    assert {} == fake.queues
+
+
+def test_fake_broker__latency_is_injected(fake):
+    fake.configure(latency=0.01)
+
+    with mock.patch('subscription_manager.broker.fake.time.sleep') as mock_sleep:
+        fake.create_queue('queue')
+
+    mock_sleep.assert_called_once_with(0.01)
+
+
+def test_fake_broker__policies_and_users(fake):
+    fake.create_policy(name='max-queue-length', pattern='.*', priority=1, apply_to='queues',
+                       definitions={'max-length': 100})
+    fake.add_user('user', 'password', tags=['management'])
+
+    assert 'max-queue-length' in fake.policies
+    assert fake.user_exists('user')
+
+
+def test_broker__fake_mode__the_client_is_the_fake_broker(fake_mode):
+    assert fake_broker is broker._get_rabbitmq_rest_client()
+
+
+def test_broker__fake_mode__topology_is_applied_to_the_fake_broker(fake_mode):
+    broker.create_queue_for_topics('queue1', ['topic1', 'topic2'])
+    broker.apply_definitions({'queue2': False}, [('queue2', 'topic1')])
+
+    assert {'queue1': True, 'queue2': False} == broker.get_queues()
+    assert {('queue1', 'topic1'), ('queue1', 'topic2'), ('queue2', 'topic1')} == broker.get_topic_bindings()
+
+    assert {} == broker.delete_queues(['queue1', 'queue2', 'missing'])
+    assert {} == fake_mode.queues
+
+
+def test_broker__fake_mode__failed_definitions_upload_raises_broker_error(fake_mode):
+    with pytest.raises(broker.BrokerError):
+        broker.apply_definitions({}, [('missing', 'topic1')])
@@ -0,0 +1,93 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+from unittest import mock
+
+from prometheus_client import REGISTRY
+
+from subscription_manager.broker.session import BrokerSessionPool
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+def _counts():
+    return (REGISTRY.get_sample_value('subscription_manager_broker_connections_total'),
+            REGISTRY.get_sample_value('subscription_manager_broker_requests_total'))
+
+
+def test_get_session__the_same_session_is_returned_within_the_same_process():
+    pool = BrokerSessionPool()
+
+    assert pool.get_session() is pool.get_session()
+
+
+def test_get_session__session_is_recreated_after_fork():
+    pool = BrokerSessionPool()
+
+    with mock.patch('os.getpid', return_value=1):
+        session = pool.get_session()
+
+    with mock.patch('os.getpid', return_value=2):
+        assert pool.get_session() is not session
+
+
+def test_configure__session_is_recreated_with_the_new_settings():
+    pool = BrokerSessionPool()
+    session = pool.get_session()
+
+    pool.configure(pool_size=4, connect_timeout=1, read_timeout=2, auth=('user', 'pass'), verify='/ca.pem')
+
+    new_session = pool.get_session()
+    assert new_session is not session
+    assert ('user', 'pass') == new_session.auth
+    assert '/ca.pem' == new_session.verify
+    assert (1, 2) == new_session.get_adapter('https://localhost').timeout
+    assert 4 == new_session.get_adapter('https://localhost')._pool_maxsize
+
+
+def test_session__connections_are_reused_and_recorded_in_the_metrics(http_server):
+    pool = BrokerSessionPool()
+    connections, requests_ = _counts()
+
+    session = pool.get_session()
+    for _ in range(5):
+        session.get(http_server).raise_for_status()
+
+    assert (connections + 1, requests_ + 5) == _counts()
+
+
+def test_reset__a_new_connection_is_opened(http_server):
+    pool = BrokerSessionPool()
+    pool.get_session().get(http_server)
+    connections, requests_ = _counts()
+
+    pool.reset()
+    pool.get_session().get(http_server)
+
+    assert (connections + 1, requests_ + 1) == _counts()
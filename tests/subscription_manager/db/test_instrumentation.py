@@ -0,0 +1,124 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import logging
+from unittest import mock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import DBAPIError
+
+from swim_backend.db import db
+from subscription_manager import BASE_PATH
+from subscription_manager.db.instrumentation import STATEMENT_COUNT_HEADER, DB_TIME_HEADER, observe_statements, \
+    _START_TIMES_KEY
+from tests.conftest import basic_auth_header
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+@pytest.fixture
+def debug_mode(app):
+    with mock.patch.object(app, 'debug', True):
+        yield
+
+
+def test_db_stats__debug_mode__are_returned_in_the_headers(debug_mode, test_client, test_user):
+    response = test_client.get(f'{BASE_PATH}/topics/', headers=basic_auth_header(test_user))
+
+    assert 200 == response.status_code
+    # at least the user and the topics have been queried
+    assert int(response.headers[STATEMENT_COUNT_HEADER]) >= 2
+    assert float(response.headers[DB_TIME_HEADER]) >= 0
+
+
+def test_db_stats__not_in_debug_mode__are_not_returned_in_the_headers(test_client, test_user):
+    response = test_client.get(f'{BASE_PATH}/topics/', headers=basic_auth_header(test_user))
+
+    assert 200 == response.status_code
+    assert STATEMENT_COUNT_HEADER not in response.headers
+    assert DB_TIME_HEADER not in response.headers
+
+
+def test_slow_queries_are_logged_along_with_the_endpoint(app, test_client, test_user, caplog):
+    url = f'{BASE_PATH}/topics/'
+
+    with mock.patch.dict(app.config['DB_INSTRUMENTATION'], slow_query_threshold=0), \
+            caplog.at_level(logging.WARNING, logger='subscription_manager.db.instrumentation'):
+        test_client.get(url, headers=basic_auth_header(test_user))
+
+    assert any('Slow query' in message and f'GET {url}' in message and 'topics' in message
+               for message in caplog.messages)
+
+
+def test_requests_with_too_many_statements_are_logged(app, test_client, test_user, caplog):
+    url = f'{BASE_PATH}/topics/'
+
+    with mock.patch.dict(app.config['DB_INSTRUMENTATION'], max_statements_per_request=0), \
+            caplog.at_level(logging.WARNING, logger='subscription_manager.db.instrumentation'):
+        test_client.get(url, headers=basic_auth_header(test_user))
+
+    assert any(f'GET {url} issued' in message for message in caplog.messages)
+
+
+def _make_engine():
+    engine = create_engine(db.engine.url)
+    # the statements of the dialect initialization are issued upon the first connection
+    engine.connect().close()
+
+    return engine
+
+
+def test_observe_statements__all_the_observers_share_the_same_timing(app):
+    engine = _make_engine()
+    observed = []
+
+    observe_statements(engine, lambda statement, duration: observed.append(('first', statement, duration)))
+    observe_statements(engine, lambda statement, duration: observed.append(('second', statement, duration)))
+
+    engine.execute('SELECT 1')
+
+    assert ['first', 'second'] == [observer for observer, _, _ in observed]
+    assert observed[0][1:] == observed[1][1:]
+
+
+def test_observe_statements__failed_statement__its_start_time_is_discarded(app):
+    engine = _make_engine()
+    observed = []
+    observe_statements(engine, lambda statement, duration: observed.append(statement))
+
+    with engine.connect() as connection:
+        with pytest.raises(DBAPIError):
+            connection.execute('SELECT * FROM no_such_table')
+
+        assert [] == connection.info[_START_TIMES_KEY]
+
+        connection.execute('SELECT 1')
+
+    assert ['SELECT 1'] == observed
@@ -0,0 +1,139 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import pytest
+from flask import Flask
+from flask_migrate import Migrate, stamp, upgrade
+from sqlalchemy import Boolean, Column, DateTime, Enum, ForeignKey, Integer, MetaData, String, Table, create_engine, \
+    inspect
+
+from provision.migrate_db import migrate
+from subscription_manager.app import MIGRATIONS_DIR
+from swim_backend.db import db
+
+__author__ = "EUROCONTROL (SWIM)"
+
+MIGRATIONS_SCHEMA = 'migrations_test'
+
+
+def _baseline_metadata() -> MetaData:
+    """
+    The models of the baseline commit, as db.create_all() created them before the migrations were introduced
+    """
+    metadata = MetaData()
+
+    Table('users', metadata,
+          Column('id', Integer, primary_key=True),
+          Column('username', String(50), nullable=False, unique=True),
+          Column('password', String(256), nullable=False),
+          Column('created_at', DateTime(), nullable=False),
+          Column('active', Boolean, nullable=False),
+          Column('is_admin', Boolean, nullable=False))
+    Table('topics', metadata,
+          Column('id', Integer, primary_key=True),
+          Column('name', String(50), nullable=False, unique=True),
+          Column('user_id', Integer, ForeignKey('users.id'), nullable=False))
+    Table('subscriptions', metadata,
+          Column('id', Integer, primary_key=True),
+          Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+          Column('queue', String(128), nullable=False, unique=True),
+          Column('active', Boolean, nullable=False),
+          Column('qos', Enum('AT_LEAST_ONCE', 'AT_MOST_ONCE', 'EXACTLY_ONCE', name='qos'), nullable=False),
+          Column('durable', Boolean, nullable=False))
+    Table('topic_subscriptions', metadata,
+          Column('topic_id', Integer, ForeignKey('topics.id')),
+          Column('subscription_id', Integer, ForeignKey('subscriptions.id')))
+
+    return metadata
+
+
+@pytest.fixture
+def migrations_app(app):
+    """
+    An app whose DB connections use an empty schema of the test DB, so that the migrations run from scratch without
+    touching the tables of the other tests
+    """
+    database_uri = app.config['SQLALCHEMY_DATABASE_URI']
+    engine = create_engine(database_uri)
+    engine.execute(f"DROP SCHEMA IF EXISTS {MIGRATIONS_SCHEMA} CASCADE")
+    engine.execute(f"CREATE SCHEMA {MIGRATIONS_SCHEMA}")
+
+    migrations_app = Flask(__name__)
+    migrations_app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"{database_uri}?options=-csearch_path%3D{MIGRATIONS_SCHEMA}",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False
+    )
+    db.init_app(migrations_app)
+    Migrate(migrations_app, db, directory=MIGRATIONS_DIR)
+
+    with migrations_app.app_context():
+        yield migrations_app
+
+        db.get_engine().dispose()
+
+    engine.execute(f"DROP SCHEMA {MIGRATIONS_SCHEMA} CASCADE")
+    engine.dispose()
+
+
+def _table_names():
+    return set(inspect(db.get_engine()).get_table_names())
+
+
+def test_upgrade__empty_db__all_the_tables_are_created(migrations_app):
+    upgrade(directory=MIGRATIONS_DIR)
+
+    assert set(db.Model.metadata.tables) | {'alembic_version'} == _table_names()
+
+
+def test_upgrade__db_created_by_the_baseline_models_and_stamped__all_the_tables_are_created(migrations_app):
+    _baseline_metadata().create_all(db.get_engine())
+
+    stamp(directory=MIGRATIONS_DIR, revision='0001_baseline')
+    upgrade(directory=MIGRATIONS_DIR)
+
+    assert set(db.Model.metadata.tables) | {'alembic_version'} == _table_names()
+
+
+def test_migrate__db_created_by_the_baseline_models__db_is_stamped_and_upgraded(migrations_app):
+    _baseline_metadata().create_all(db.get_engine())
+
+    migrate()
+
+    assert set(db.Model.metadata.tables) | {'alembic_version'} == _table_names()
+
+
+def test_migrate__unversioned_db_without_some_baseline_tables__raises_and_db_is_not_stamped(migrations_app):
+    metadata = _baseline_metadata()
+    metadata.create_all(db.get_engine(), tables=[metadata.tables['users'], metadata.tables['topics']])
+
+    with pytest.raises(RuntimeError) as e:
+        migrate()
+
+    assert 'subscriptions, topic_subscriptions' in str(e.value)
+    assert {'users', 'topics'} == _table_names()
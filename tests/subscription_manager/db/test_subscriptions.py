@@ -32,7 +32,8 @@ import pytest
 from swim_backend.db import db_save
 from subscription_manager.db import Subscription
 from subscription_manager.db.subscriptions import get_subscription_by_id, get_subscriptions, create_subscription, \
-    update_subscription, delete_subscription, get_subscription_by_queue
+    update_subscription, delete_subscription, get_subscription_by_queue, iter_subscriptions_topology, \
+    create_subscriptions, delete_subscriptions_by_ids, delete_topic_subscriptions, get_topic_subscriptions
 from tests.subscription_manager.utils import make_subscription, make_user, make_topic
 
 __author__ = "EUROCONTROL (SWIM)"
@@ -182,3 +183,84 @@ def test_delete_subscription(generate_subscription, generate_topic):
     delete_subscription(subscription)
 
     assert None is get_subscription_by_id(subscription.id)
+
+
+def test_get_subscriptions__paginated__pages_are_returned_in_order_of_id(generate_subscription, generate_topic):
+    topic = generate_topic()
+    subscriptions = [generate_subscription(topics=[topic]) for _ in range(5)]
+
+    first_page = get_subscriptions(limit=2)
+    second_page = get_subscriptions(limit=2, cursor=first_page[-1].id)
+    last_page = get_subscriptions(limit=2, cursor=second_page[-1].id)
+
+    assert subscriptions == first_page + second_page + last_page
+    assert 1 == len(last_page)
+
+
+def test_iter_subscriptions_topology__a_row_per_subscription_and_topic(session, generate_subscription):
+    topic1 = db_save(session, make_topic(name='topic1'))
+    topic2 = db_save(session, make_topic(name='topic2'))
+    subscription = generate_subscription(topics=[topic1, topic2])
+    subscription_without_topics = generate_subscription(topics=[])
+    subscription_without_topics.active = False
+    db_save(session, subscription_without_topics)
+
+    rows = list(iter_subscriptions_topology())
+
+    assert sorted([
+        (subscription.queue, subscription.durable, True, 'topic1'),
+        (subscription.queue, subscription.durable, True, 'topic2'),
+        (subscription_without_topics.queue, subscription_without_topics.durable, False, None),
+    ], key=str) == sorted([tuple(row) for row in rows], key=str)
+
+
+def test_create_subscriptions__subscriptions_and_topic_associations_are_saved(session):
+    user = db_save(session, make_user())
+    topic1 = db_save(session, make_topic(name='topic1'))
+    topic2 = db_save(session, make_topic(name='topic2'))
+    subscriptions = [Subscription(user_id=user.id, topics=[topic1]),
+                     Subscription(user_id=user.id, topics=[topic1, topic2], active=False)]
+
+    create_subscriptions(subscriptions)
+
+    for subscription in subscriptions:
+        assert subscription not in session
+
+        db_subscription = get_subscription_by_id(subscription.id)
+        assert subscription.queue == db_subscription.queue
+        assert subscription.topic_names == db_subscription.topic_names
+        assert subscription.active == db_subscription.active
+        assert db_subscription.durable is True
+
+
+def test_delete_subscriptions_by_ids(generate_subscription, generate_topic):
+    topic = generate_topic()
+    subscriptions = [generate_subscription(topics=[topic]) for _ in range(3)]
+
+    assert 2 == delete_subscriptions_by_ids([subscriptions[0].id, subscriptions[1].id])
+
+    assert [subscriptions[2].id] == [s.id for s in get_subscriptions()]
+
+
+def test_delete_topic_subscriptions__only_the_subscriptions_of_the_topic_are_deleted(generate_subscription,
+                                                                                     generate_topic, session):
+    topic = generate_topic()
+    other_topic = db_save(session, make_topic('other_topic'))
+    subscriptions = [generate_subscription(topics=[topic]) for _ in range(2)]
+    other_subscription = generate_subscription(topics=[other_topic])
+
+    deleted = delete_topic_subscriptions(topic.id)
+
+    assert sorted((s.id, s.queue) for s in subscriptions) == sorted(deleted)
+    assert [] == get_topic_subscriptions(topic.id)
+    assert [other_subscription.id] == [s.id for s in get_subscriptions()]
+
+
+def test_delete_topic_subscriptions__restricted_to_the_given_subscriptions(generate_subscription, generate_topic):
+    topic = generate_topic()
+    subscriptions = [generate_subscription(topics=[topic]) for _ in range(3)]
+
+    deleted = delete_topic_subscriptions(topic.id, subscription_ids=[subscriptions[0].id])
+
+    assert [(subscriptions[0].id, subscriptions[0].queue)] == deleted
+    assert [s.id for s in subscriptions[1:]] == [s.id for s in get_topic_subscriptions(topic.id)]
@@ -0,0 +1,118 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+from unittest import mock
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from swim_backend.db import db_save
+from subscription_manager.db import Subscription, TableChange, table_versions
+from subscription_manager.db.subscriptions import delete_subscriptions_by_ids
+from subscription_manager.db.table_versions import get_table_versions
+from tests.subscription_manager.utils import make_topic, make_subscription
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+def test_get_table_versions__unknown_table__version_is_zero():
+    assert {'unknown': 0} == get_table_versions(['unknown'])
+
+
+def test_get_table_versions__orm_changes__versions_of_the_changed_tables_are_incremented(session):
+    versions = get_table_versions(['topics', 'subscriptions', 'topic_subscriptions'])
+
+    topic = db_save(session, make_topic())
+
+    new_versions = get_table_versions(['topics', 'subscriptions', 'topic_subscriptions'])
+    assert new_versions['topics'] > versions['topics']
+    assert new_versions['subscriptions'] == versions['subscriptions']
+
+    db_save(session, make_subscription(topics=[topic]))
+
+    newest_versions = get_table_versions(['topics', 'subscriptions', 'topic_subscriptions'])
+    assert newest_versions['topics'] == new_versions['topics']
+    assert newest_versions['subscriptions'] > new_versions['subscriptions']
+    assert newest_versions['topic_subscriptions'] > new_versions['topic_subscriptions']
+
+
+def test_get_table_versions__bulk_delete__version_is_incremented(session):
+    subscription = db_save(session, make_subscription(topics=[make_topic()]))
+
+    versions = get_table_versions(['subscriptions'])
+
+    delete_subscriptions_by_ids([subscription.id])
+
+    assert get_table_versions(['subscriptions'])['subscriptions'] > versions['subscriptions']
+
+
+def test_compaction__versions_do_not_change_and_the_changes_are_removed(session):
+    db_save(session, make_subscription(topics=[make_topic()]))
+    versions = get_table_versions(['topics', 'subscriptions', 'topic_subscriptions'])
+
+    # the compaction is run in the test transaction which holds the changes of the test
+    session.execute(table_versions._COMPACT_TABLE_CHANGES)
+
+    assert 0 == session.query(TableChange).count()
+    assert versions == get_table_versions(['topics', 'subscriptions', 'topic_subscriptions'])
+
+    delete_subscriptions_by_ids([session.query(Subscription).first().id])
+
+    assert get_table_versions(['subscriptions'])['subscriptions'] > versions['subscriptions']
+
+
+def test_get_table_versions__changes_reach_the_threshold__they_are_compacted(session):
+    db_save(session, make_topic())
+
+    with mock.patch.object(table_versions, 'COMPACTION_THRESHOLD', 1), \
+            mock.patch.object(table_versions, 'compact_table_changes') as mock_compact_table_changes:
+        get_table_versions(['topics'])
+
+    mock_compact_table_changes.assert_called_once_with()
+
+
+def test_table_changes__concurrent_writers_do_not_wait_on_each_other(db):
+    first, second = db.engine.connect(), db.engine.connect()
+    first_transaction, second_transaction = first.begin(), second.begin()
+    try:
+        # the statement triggers record a change even though no row matches
+        for table in ('subscriptions', 'topic_subscriptions'):
+            first.execute(f"DELETE FROM {table} WHERE false")
+
+        second.execute("SET LOCAL lock_timeout = '1s'")
+        for table in ('topic_subscriptions', 'subscriptions'):
+            try:
+                second.execute(f"DELETE FROM {table} WHERE false")
+            except OperationalError as e:
+                pytest.fail(f"The change of {table} waited on a concurrent writer: {str(e)}")
+    finally:
+        first_transaction.rollback()
+        second_transaction.rollback()
+        first.close()
+        second.close()
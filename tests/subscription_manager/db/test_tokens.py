@@ -0,0 +1,120 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import pytest
+
+from swim_backend.db import db_save
+from subscription_manager.db import Token
+from subscription_manager.db.tokens import get_token_by_id, get_valid_token_by_hash, create_token, revoke_token, \
+    revoke_user_tokens
+from subscription_manager.db.utils import hash_token
+from tests.subscription_manager.utils import make_token, make_user, unique_id
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+@pytest.fixture
+def generate_token(session):
+    def _generate_token(value=None, user=None, expires_in=3600, revoked=False):
+        token = make_token(value or unique_id(), user=user, expires_in=expires_in, revoked=revoked)
+        return db_save(session, token)
+
+    return _generate_token
+
+
+@pytest.fixture
+def generate_user(session):
+    def _generate_user():
+        user = make_user()
+        return db_save(session, user)
+
+    return _generate_user
+
+
+def test_get_token_by_id__does_not_exist__returns_none():
+    assert get_token_by_id(1111) is None
+
+
+def test_get_token_by_id__does_not_belong_to_the_user__returns_none(generate_token):
+    token1 = generate_token()
+    token2 = generate_token()
+
+    assert get_token_by_id(token1.id, token2.user_id) is None
+    assert get_token_by_id(token2.id, token1.user_id) is None
+
+
+def test_get_valid_token_by_hash__valid_token__is_returned_with_its_user(generate_token):
+    token = generate_token(value='value')
+
+    db_token = get_valid_token_by_hash(hash_token('value'))
+
+    assert isinstance(db_token, Token)
+    assert token.id == db_token.id
+    assert token.user == db_token.user
+
+
+@pytest.mark.parametrize('expires_in, revoked', [
+    (-1, False),
+    (3600, True)
+])
+def test_get_valid_token_by_hash__expired_or_revoked_token__returns_none(generate_token, expires_in, revoked):
+    generate_token(value='value', expires_in=expires_in, revoked=revoked)
+
+    assert get_valid_token_by_hash(hash_token('value')) is None
+
+
+def test_create_token():
+    token = make_token('value')
+
+    db_token = create_token(token)
+
+    assert isinstance(db_token.id, int)
+    assert hash_token('value') == db_token.token_hash
+    assert db_token.revoked is False
+
+
+def test_revoke_token(generate_token):
+    token = generate_token(value='value')
+
+    revoke_token(token)
+
+    assert get_valid_token_by_hash(hash_token('value')) is None
+
+
+def test_revoke_user_tokens__only_the_tokens_of_the_user_are_revoked(generate_token, generate_user):
+    user = generate_user()
+    generate_token(value='value1', user=user)
+    generate_token(value='value2', user=user)
+    generate_token(value='value3')
+
+    revoke_user_tokens(user.id)
+
+    assert get_valid_token_by_hash(hash_token('value1')) is None
+    assert get_valid_token_by_hash(hash_token('value2')) is None
+    assert get_valid_token_by_hash(hash_token('value3')) is not None
@@ -32,7 +32,7 @@ import pytest
 from swim_backend.db import db_save
 from subscription_manager.db import Topic
 from subscription_manager.db.topics import get_topic_by_id, get_topics, create_topic, update_topic, delete_topic, \
-    get_topic_by_name
+    get_topic_by_name, get_topics_by_names
 from tests.subscription_manager.utils import make_topic, make_user
 
 __author__ = "EUROCONTROL (SWIM)"
@@ -150,4 +150,24 @@ def test_delete_topic(generate_topic):
 
     delete_topic(topic)
 
-    assert None is get_topic_by_id(topic.id)
\ No newline at end of file
+    assert None is get_topic_by_id(topic.id)
+
+def test_get_topics__paginated__pages_are_returned_in_order_of_id(generate_topic):
+    topics = [generate_topic(f'test_topic_{i}') for i in range(3)]
+
+    first_page = get_topics(limit=2)
+    last_page = get_topics(limit=2, cursor=first_page[-1].id)
+
+    assert topics == first_page + last_page
+
+
+def test_get_topics_by_names__only_existing_topics_are_returned(generate_topic):
+    topics = [generate_topic('test_topic_1'), generate_topic('test_topic_2'), generate_topic('test_topic_3')]
+
+    db_topics = get_topics_by_names(['test_topic_1', 'test_topic_3', 'invalid name'])
+
+    assert {topics[0], topics[2]} == set(db_topics)
+
+
+def test_get_topics_by_names__no_names__returns_empty_list():
+    assert [] == get_topics_by_names([])
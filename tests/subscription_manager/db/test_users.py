@@ -110,3 +110,12 @@ def test_update_user(generate_user):
 
     assert isinstance(updated_user, User)
     assert 'new username' == updated_user.username
+
+
+def test_get_users__paginated__pages_are_returned_in_order_of_id(generate_user):
+    users = [generate_user() for _ in range(3)]
+
+    first_page = get_users(limit=2)
+    last_page = get_users(limit=2, cursor=first_page[-1].id)
+
+    assert users == first_page + last_page
@@ -0,0 +1,148 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import json
+from unittest import mock
+
+import pytest
+
+from swim_backend.db import db_save
+from subscription_manager import BASE_PATH
+from subscription_manager.db import OutboxMessage, OutboxStatus
+from subscription_manager.db.outbox import get_outbox_message_by_id
+from subscription_manager.db.subscriptions import get_subscription_by_id
+from tests.conftest import basic_auth_header
+from tests.subscription_manager.utils import make_topic, make_subscription
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+@pytest.fixture
+def outbox_enabled():
+    with mock.patch('subscription_manager.outbox.is_enabled', return_value=True):
+        yield
+
+
+@pytest.fixture
+def generate_operation(session):
+    def _generate_operation(user):
+        operation = OutboxMessage(action='delete_queue', key='queue', payload={'queue': 'queue'}, user_id=user.id)
+        return db_save(session, operation)
+
+    return _generate_operation
+
+
+def _operation_id(response):
+    location = response.headers['Location']
+    assert location.startswith(f'{BASE_PATH}/operations/')
+
+    return int(location.rsplit('/', 1)[-1])
+
+
+@mock.patch('subscription_manager.broker.broker.broker_client')
+def test_post_subscription__outbox_enabled__returns_202_and_broker_is_not_called(mock_broker_client, outbox_enabled,
+                                                                                  session, test_client, test_user):
+    topic = db_save(session, make_topic('test_topic', user=test_user))
+
+    response = test_client.post(f'{BASE_PATH}/subscriptions/', data=json.dumps({'topics': [topic.name]}),
+                                content_type='application/json', headers=basic_auth_header(test_user))
+
+    assert 202 == response.status_code
+    mock_broker_client.create_queue.assert_not_called()
+
+    response_data = json.loads(response.data)
+    assert get_subscription_by_id(response_data['id']) is not None
+
+    operation = get_outbox_message_by_id(_operation_id(response))
+    assert 'apply_topology' == operation.action
+    assert OutboxStatus.PENDING == operation.status
+    assert {'queue': response_data['queue'], 'durable': True, 'topics': [topic.name]} == operation.payload
+
+
+@mock.patch('subscription_manager.broker.broker.broker_client')
+def test_put_subscription__outbox_enabled__returns_202(mock_broker_client, outbox_enabled, session, test_client,
+                                                      test_user):
+    topic = db_save(session, make_topic('test_topic', user=test_user))
+    subscription = db_save(session, make_subscription(topics=[topic], user=test_user))
+
+    response = test_client.put(f'{BASE_PATH}/subscriptions/{subscription.id}', data=json.dumps({'active': False}),
+                               content_type='application/json', headers=basic_auth_header(test_user))
+
+    assert 202 == response.status_code
+    mock_broker_client.delete_queue_binding.assert_not_called()
+
+    operation = get_outbox_message_by_id(_operation_id(response))
+    assert 'delete_bindings' == operation.action
+    assert {'queue': subscription.queue, 'topics': [topic.name]} == operation.payload
+
+
+@mock.patch('subscription_manager.broker.broker.broker_client')
+def test_delete_subscription__outbox_enabled__returns_202(mock_broker_client, outbox_enabled, session, test_client,
+                                                         test_user):
+    topic = db_save(session, make_topic('test_topic', user=test_user))
+    subscription = db_save(session, make_subscription(topics=[topic], user=test_user))
+
+    response = test_client.delete(f'{BASE_PATH}/subscriptions/{subscription.id}',
+                                  headers=basic_auth_header(test_user))
+
+    assert 202 == response.status_code
+    mock_broker_client.delete_queue.assert_not_called()
+    assert get_subscription_by_id(subscription.id) is None
+
+    operation = get_outbox_message_by_id(_operation_id(response))
+    assert 'delete_queue' == operation.action
+
+
+def test_get_operation__does_not_exist__returns_404(test_client, test_user):
+    response = test_client.get(f'{BASE_PATH}/operations/123456', headers=basic_auth_header(test_user))
+
+    assert 404 == response.status_code
+
+
+def test_get_operation__of_another_user__returns_404(test_client, test_user, test_admin_user, generate_operation):
+    operation = generate_operation(test_admin_user)
+
+    response = test_client.get(f'{BASE_PATH}/operations/{operation.id}', headers=basic_auth_header(test_user))
+
+    assert 404 == response.status_code
+
+
+def test_get_operation__is_returned(test_client, test_user, generate_operation):
+    operation = generate_operation(test_user)
+
+    response = test_client.get(f'{BASE_PATH}/operations/{operation.id}', headers=basic_auth_header(test_user))
+
+    assert 200 == response.status_code
+
+    response_data = json.loads(response.data)
+    assert operation.id == response_data['id']
+    assert 'delete_queue' == response_data['action']
+    assert 'queue' == response_data['queue']
+    assert 'PENDING' == response_data['status']
+    assert 0 == response_data['attempts']
@@ -31,17 +31,18 @@ import json
 from unittest import mock
 
 import pytest
+from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 
-from swim_backend.db import db_save
+from swim_backend.db import db_save, db
 from subscription_manager import BASE_PATH
 from subscription_manager.broker import broker
 from subscription_manager.broker.broker import BrokerError
-from subscription_manager.db.models import QOS
-from subscription_manager.db.subscriptions import get_subscription_by_id
+from subscription_manager.db.models import QOS, TableChange
+from subscription_manager.db.subscriptions import get_subscription_by_id, get_subscriptions
 from tests.conftest import DEFAULT_LOGIN_PASS, basic_auth_header
 from tests.subscription_manager.utils import make_subscription, make_topic, make_user, \
-    make_basic_auth_header
+    make_basic_auth_header, count_queries
 
 __author__ = "EUROCONTROL (SWIM)"
 
@@ -232,9 +233,160 @@ def test_get_subscriptions__subscriptions_exist_and_are_returned_as_list(
     assert [s.qos.value for s in subscriptions] == [d['qos'] for d in response_data]
 
 
+def test_get_subscriptions__paginated__next_cursor_is_returned_until_the_last_page(
+        test_client, test_user, generate_subscription, generate_topic):
+
+    topic = generate_topic('topic name')
+    subscriptions = [generate_subscription(topics=[topic], user=test_user) for _ in range(3)]
+
+    url = f'{BASE_PATH}/subscriptions/?limit=2'
+
+    response = test_client.get(url, headers=basic_auth_header(test_user))
+
+    assert 200 == response.status_code
+    assert [s.id for s in subscriptions[:2]] == [d['id'] for d in json.loads(response.data)]
+    assert str(subscriptions[1].id) == response.headers['X-Next-Cursor']
+
+    url = f"{BASE_PATH}/subscriptions/?limit=2&cursor={response.headers['X-Next-Cursor']}"
+
+    response = test_client.get(url, headers=basic_auth_header(test_user))
+
+    assert 200 == response.status_code
+    assert [subscriptions[2].id] == [d['id'] for d in json.loads(response.data)]
+    assert 'X-Next-Cursor' not in response.headers
+
+
+def test_get_subscriptions__streamed__same_data_as_the_non_streamed_response_is_returned(
+        test_client, test_user, generate_subscription, generate_topic):
+
+    topic = generate_topic('topic name')
+    for _ in range(3):
+        generate_subscription(topics=[topic], user=test_user)
+
+    url = f'{BASE_PATH}/subscriptions/'
+
+    response = test_client.get(url, headers=basic_auth_header(test_user))
+    streamed_response = test_client.get(f'{url}?stream=true', headers=basic_auth_header(test_user))
+
+    assert 200 == streamed_response.status_code
+    assert 'application/json' == streamed_response.mimetype
+    assert json.loads(response.data) == json.loads(streamed_response.data)
+
+
+def test_get_subscriptions__etag_is_current__returns_304_without_reading_the_subscriptions(
+        test_client, session, test_user, generate_subscription, generate_topic):
+
+    generate_subscription(topics=[generate_topic('topic name')], user=test_user)
+
+    url = f'{BASE_PATH}/subscriptions/'
+
+    response = test_client.get(url, headers=basic_auth_header(test_user))
+    assert 200 == response.status_code
+    etag = response.headers['ETag']
+    assert etag.startswith('W/')
+
+    headers = {**basic_auth_header(test_user), 'If-None-Match': etag}
+    with count_queries(db.engine) as statements:
+        response = test_client.get(url, headers=headers)
+
+    assert 304 == response.status_code
+    assert etag == response.headers['ETag']
+    assert b'' == response.data
+    assert not [statement for statement in statements if 'FROM subscriptions' in statement]
+
+
+def test_get_subscriptions__data_changed__etag_changes_and_returns_200(
+        test_client, test_user, generate_subscription, generate_topic):
+
+    topic = generate_topic('topic name')
+    generate_subscription(topics=[topic], user=test_user)
+
+    url = f'{BASE_PATH}/subscriptions/'
+
+    etag = test_client.get(url, headers=basic_auth_header(test_user)).headers['ETag']
+
+    generate_subscription(topics=[topic], user=test_user)
+
+    response = test_client.get(url, headers={**basic_auth_header(test_user), 'If-None-Match': etag})
+
+    assert 200 == response.status_code
+    assert etag != response.headers['ETag']
+    assert 2 == len(json.loads(response.data))
+
+
+def test_get_subscriptions__etag_depends_on_the_user_and_the_url(
+        test_client, test_user, test_admin_user, generate_subscription, generate_topic):
+
+    generate_subscription(topics=[generate_topic('topic name')], user=test_user)
+
+    url = f'{BASE_PATH}/subscriptions/'
+
+    etag = test_client.get(url, headers=basic_auth_header(test_user)).headers['ETag']
+
+    admin_response = test_client.get(url, headers={**basic_auth_header(test_admin_user), 'If-None-Match': etag})
+    paginated_response = test_client.get(f'{url}?limit=1',
+                                         headers={**basic_auth_header(test_user), 'If-None-Match': etag})
+
+    assert 200 == admin_response.status_code
+    assert 200 == paginated_response.status_code
+
+
+def test_get_subscription__etag_is_current__returns_304(test_client, test_user, generate_subscription,
+                                                         generate_topic):
+    subscription = generate_subscription(topics=[generate_topic('topic name')], user=test_user)
+
+    url = f'{BASE_PATH}/subscriptions/{subscription.id}'
+
+    etag = test_client.get(url, headers=basic_auth_header(test_user)).headers['ETag']
+
+    response = test_client.get(url, headers={**basic_auth_header(test_user), 'If-None-Match': etag})
+
+    assert 304 == response.status_code
+
+
+def test_get_subscription__does_not_exist__no_etag_is_returned(test_client, test_user):
+    url = f'{BASE_PATH}/subscriptions/123456'
+
+    response = test_client.get(url, headers={**basic_auth_header(test_user), 'If-None-Match': '*'})
+
+    assert 404 == response.status_code
+    assert 'ETag' not in response.headers
+
+
+def test_get_subscriptions__number_of_queries_does_not_depend_on_the_number_of_subscriptions(
+        test_client, session, test_user, generate_subscription, generate_topic):
+
+    topics = [generate_topic('topic name 1'), generate_topic('topic name 2')]
+
+    url = f'{BASE_PATH}/subscriptions/'
+
+    def _count_queries_of_listing(expected_length):
+        # make sure that nothing is served from the identity map of the session
+        session.expire_all()
+
+        with count_queries(db.engine) as statements:
+            response = test_client.get(url, headers=basic_auth_header(test_user))
+
+        assert 200 == response.status_code
+        assert expected_length == len(json.loads(response.data))
+
+        return len(statements)
+
+    generate_subscription(topics=topics, user=test_user)
+    queries_for_one_subscription = _count_queries_of_listing(expected_length=1)
+
+    for _ in range(9):
+        generate_subscription(topics=topics, user=test_user)
+    queries_for_ten_subscriptions = _count_queries_of_listing(expected_length=10)
+
+    assert queries_for_one_subscription == queries_for_ten_subscriptions
+
+
 @pytest.mark.parametrize('topics, expected_error_message', [
     ([], "{'topics': ['No topics were provided']}"),
-    (['invalid topic'], """{'topics': ["No topic found with name 'invalid topic'"]}""")
+    (['invalid topic'], """{'topics': ["No topic found with name 'invalid topic'"]}"""),
+    (['invalid topic 1', 'invalid topic 2'],
+     """{'topics': ["No topics found with names 'invalid topic 1', 'invalid topic 2'"]}""")
 ])
 def test_post_subscription__invalid_topics__returns_400(test_client, test_user, topics, expected_error_message):
     subscription_data = {
@@ -255,6 +407,29 @@ def test_post_subscription__invalid_topics__returns_400(test_client, test_user,
     assert expected_error_message == response_data['detail']
 
 
+@mock.patch('subscription_manager.broker.broker.broker_client')
+def test_post_subscription__topics_are_retrieved_with_one_query(mock_broker_client, test_client, test_user,
+                                                                 generate_topic):
+    topics = [generate_topic(f'topic name {i}') for i in range(5)]
+
+    subscription_data = {
+        'topics': [topic.name for topic in topics],
+    }
+
+    url = f'{BASE_PATH}/subscriptions/'
+
+    with count_queries(db.engine) as statements:
+        response = test_client.post(url, data=json.dumps(subscription_data), content_type='application/json',
+                                    headers=basic_auth_header(test_user))
+
+    assert 201 == response.status_code
+    assert [topic.name for topic in topics] == [topic['name'] for topic in json.loads(response.data)['topics']]
+
+    topic_by_name_queries = [s for s in statements if 'WHERE topics.name' in s]
+    assert 1 == len(topic_by_name_queries)
+    assert 'WHERE topics.name IN' in topic_by_name_queries[0]
+
+
 def test_post_subscription__invalid_qos__returns_400(test_client, generate_topic, test_user):
     topic = generate_topic('test_topic')
 
@@ -337,6 +512,22 @@ def test_post_subscription__unauthorized_user__returns_401(test_client, generate
     assert 'Invalid credentials' == response_data['detail']
 
 
+@mock.patch('subscription_manager.broker.broker.broker_client')
+def test_post_subscription__duplicate_topics__subscription_is_bound_once_to_each_topic(mock_broker_client, test_client,
+                                                                                        generate_topic, test_user):
+    topic = generate_topic('test_topic')
+
+    url = f'{BASE_PATH}/subscriptions/'
+
+    response = test_client.post(url, data=json.dumps({'topics': [topic.name, topic.name]}),
+                                content_type='application/json', headers=basic_auth_header(test_user))
+
+    assert 201 == response.status_code
+
+    response_data = json.loads(response.data)
+    assert [topic.name] == get_subscription_by_id(response_data['id']).topic_names
+
+
 @mock.patch('subscription_manager.broker.broker.broker_client')
 def test_post_subscription__subscription_is_saved_in_db(mock_broker_client, test_client, generate_topic, test_user):
     mock_broker_client.create_queue_for_topic = mock.Mock(return_value=None)
@@ -431,11 +622,11 @@ def test_put_subscription__invalid_topic_id__returns_400(test_client, test_user,
     assert '{\'topics\': ["No topic found with name \'invalid topic\'"]}' == response_data['detail']
 
 
-@mock.patch('subscription_manager.broker.broker.delete_queue_binding', return_value=None)
-@mock.patch('subscription_manager.broker.broker.bind_queue_to_topic', return_value=None)
+@mock.patch('subscription_manager.broker.broker.unbind_queue_from_topics', return_value=None)
+@mock.patch('subscription_manager.broker.broker.apply_subscriptions_topology', return_value=None)
 @mock.patch('subscription_manager.db.subscriptions.update_subscription', side_effect=SQLAlchemyError(None, None, None))
-def test_put_subscription__db_error__returns_500(mock_update_subscription, mock_bind_queue_to_topic,
-                                                 mock_delete_queue_binding, test_client, generate_subscription,
+def test_put_subscription__db_error__returns_500(mock_update_subscription, mock_apply_subscriptions_topology,
+                                                 mock_unbind_queue_from_topics, test_client, generate_subscription,
                                                  test_user, generate_topic):
     subscription = generate_subscription(topics=[generate_topic('topic name')], user=test_user)
 
@@ -449,10 +640,10 @@ def test_put_subscription__db_error__returns_500(mock_update_subscription, mock_
     assert 500 == response.status_code
 
 
-@mock.patch('subscription_manager.broker.broker.delete_queue_binding', side_effect=BrokerError('error'))
-@mock.patch('subscription_manager.broker.broker.bind_queue_to_topic', side_effect=BrokerError('error'))
-def test_put_subscription__broker_error__returns_502(mock_bind_queue_to_topic, mock_delete_queue_binding, test_client,
-                                                     generate_subscription, test_user, generate_topic):
+@mock.patch('subscription_manager.broker.broker.unbind_queue_from_topics', side_effect=BrokerError('error'))
+@mock.patch('subscription_manager.broker.broker.apply_subscriptions_topology', side_effect=BrokerError('error'))
+def test_put_subscription__broker_error__returns_502(mock_apply_subscriptions_topology, mock_unbind_queue_from_topics,
+                                                     test_client, generate_subscription, test_user, generate_topic):
     subscription = generate_subscription(topics=[generate_topic('topic name')], user=test_user)
 
     subscription_data = {'active': not subscription.active}
@@ -467,6 +658,44 @@ def test_put_subscription__broker_error__returns_502(mock_bind_queue_to_topic, m
     assert "Error while accessing broker: error" == response_data['detail']
 
 
+@pytest.mark.parametrize('active, broker_call', [
+    (True, 'unbind_queue_from_topics'),
+    (False, 'apply_subscriptions_topology'),
+], ids=['pause', 'resume'])
+def test_put_subscription__nothing_is_written_during_the_broker_calls(test_client, session, generate_subscription,
+                                                                      test_user, generate_topic, active, broker_call):
+    subscription = generate_subscription(topics=[generate_topic('topic name')], user=test_user)
+    subscription.active = active
+    db_save(session, subscription)
+    subscription_id = subscription.id
+    # the subscription is loaded afresh by the request
+    session.expire_all()
+
+    def count_changes():
+        return session.query(TableChange).filter_by(name='subscriptions').count()
+
+    changes = count_changes()
+    during_broker_call = []
+
+    def record_db_state(*args, **kwargs):
+        # a plain statement does not flush the session
+        db_active = session.execute(text("SELECT active FROM subscriptions WHERE id = :id"),
+                                    {'id': subscription_id}).scalar()
+        db_changes = session.execute(text("SELECT count(*) FROM table_changes WHERE name = 'subscriptions'")).scalar()
+        during_broker_call.append((db_active, db_changes))
+
+    url = f'{BASE_PATH}/subscriptions/{subscription_id}'
+
+    with mock.patch(f'subscription_manager.broker.broker.{broker_call}', side_effect=record_db_state):
+        response = test_client.put(url, data=json.dumps({'active': not active}), content_type='application/json',
+                                   headers=basic_auth_header(test_user))
+
+    assert 200 == response.status_code
+    assert [(active, changes)] == during_broker_call
+    assert count_changes() > changes
+    assert (not active) == get_subscription_by_id(subscription_id).active
+
+
 def test_put_subscription__unauthorized_user_returns_401(test_client, generate_subscription, generate_topic):
     subscription = generate_subscription(topics=[generate_topic('topic name')])
 
@@ -595,3 +824,150 @@ def test_delete_subscription__subscription_is_deleted_and_returns_204(mock_broke
     # check that the subscription has been deleted from db
     response = test_client.get(url, headers=basic_auth_header(test_user))
     assert 404 == response.status_code
+
+
+@mock.patch('subscription_manager.broker.broker.apply_subscriptions_topology_per_chunk', return_value={})
+def test_post_subscriptions_bulk__all_items_are_created_with_one_topics_query(mock_apply_topology, test_client,
+                                                                             generate_topic, test_user):
+    topic1, topic2 = generate_topic('topic1'), generate_topic('topic2')
+    items = [{'topics': [topic1.name]}, {'topics': [topic1.name, topic2.name], 'durable': False}]
+
+    with count_queries(db.engine) as statements:
+        response = test_client.post(f'{BASE_PATH}/subscriptions/bulk', data=json.dumps(items),
+                                    content_type='application/json', headers=basic_auth_header(test_user))
+
+    assert 200 == response.status_code
+    assert 1 == len([s for s in statements if 'WHERE topics.name IN' in s])
+
+    results = json.loads(response.data)
+    assert [201, 201] == [result['status'] for result in results]
+
+    for item, result in zip(items, results):
+        db_subscription = get_subscription_by_id(result['subscription']['id'])
+        assert item['topics'] == db_subscription.topic_names
+        assert item.get('durable', True) == db_subscription.durable
+        assert db_subscription.active is True
+        assert test_user.id == db_subscription.user_id
+
+    subscriptions = mock_apply_topology.call_args[0][0]
+    assert [result['subscription']['queue'] for result in results] == [s.queue for s in subscriptions]
+
+
+@mock.patch('subscription_manager.broker.broker.apply_subscriptions_topology_per_chunk', return_value={})
+def test_post_subscriptions_bulk__invalid_items_do_not_prevent_the_valid_ones(mock_apply_topology, test_client,
+                                                                             generate_topic, test_user):
+    topic = generate_topic('topic1')
+    items = [{'topics': ['invalid topic']}, {'topics': [topic.name]}]
+
+    response = test_client.post(f'{BASE_PATH}/subscriptions/bulk', data=json.dumps(items),
+                                content_type='application/json', headers=basic_auth_header(test_user))
+
+    assert 200 == response.status_code
+
+    results = json.loads(response.data)
+    assert 400 == results[0]['status']
+    assert '{\'topics\': ["No topic found with name \'invalid topic\'"]}' == results[0]['detail']
+    assert 201 == results[1]['status']
+    assert get_subscription_by_id(results[1]['subscription']['id']) is not None
+
+
+@mock.patch('subscription_manager.broker.broker.apply_subscriptions_topology_per_chunk', return_value={})
+def test_post_subscriptions_bulk__duplicate_topics__items_are_created(mock_apply_topology, test_client, generate_topic,
+                                                                      test_user):
+    topic1, topic2 = generate_topic('topic1'), generate_topic('topic2')
+    items = [{'topics': [topic1.name, topic1.name]}, {'topics': [topic1.name, topic2.name, topic2.name]}]
+
+    response = test_client.post(f'{BASE_PATH}/subscriptions/bulk', data=json.dumps(items),
+                                content_type='application/json', headers=basic_auth_header(test_user))
+
+    assert 200 == response.status_code
+
+    results = json.loads(response.data)
+    assert [201, 201] == [result['status'] for result in results]
+    assert [topic1.name] == get_subscription_by_id(results[0]['subscription']['id']).topic_names
+    assert [topic1.name, topic2.name] == get_subscription_by_id(results[1]['subscription']['id']).topic_names
+
+
+@mock.patch('subscription_manager.broker.broker.apply_subscriptions_topology_per_chunk')
+def test_post_subscriptions_bulk__broker_error__failed_items_are_removed_from_db(mock_apply_topology, test_client,
+                                                                                generate_topic, test_user):
+    def apply_topology(subscriptions):
+        return {subscriptions[0].queue: BrokerError('error')}
+
+    mock_apply_topology.side_effect = apply_topology
+
+    topic = generate_topic('topic1')
+    items = [{'topics': [topic.name]}, {'topics': [topic.name]}]
+
+    response = test_client.post(f'{BASE_PATH}/subscriptions/bulk', data=json.dumps(items),
+                                content_type='application/json', headers=basic_auth_header(test_user))
+
+    assert 200 == response.status_code
+
+    results = json.loads(response.data)
+    assert 502 == results[0]['status']
+    assert 'Error while accessing the broker: error' == results[0]['detail']
+    assert 201 == results[1]['status']
+    assert [results[1]['subscription']['id']] == [s.id for s in get_subscriptions(user_id=test_user.id)]
+
+
+def test_delete_subscriptions_bulk__no_filter__returns_400(test_client, test_user):
+    response = test_client.delete(f'{BASE_PATH}/subscriptions/bulk', headers=basic_auth_header(test_user))
+
+    assert 400 == response.status_code
+
+
+@mock.patch('subscription_manager.broker.broker.delete_queues', return_value={})
+def test_delete_subscriptions_bulk__by_ids__only_own_subscriptions_are_deleted(mock_delete_queues, test_client,
+                                                                              generate_subscription, generate_topic,
+                                                                              test_user, test_admin_user):
+    topic = generate_topic('topic')
+    own = [generate_subscription(topics=[topic], user=test_user) for _ in range(2)]
+    other = generate_subscription(topics=[topic], user=test_admin_user)
+
+    ids = ','.join(str(s.id) for s in own + [other])
+    response = test_client.delete(f'{BASE_PATH}/subscriptions/bulk?ids={ids}', headers=basic_auth_header(test_user))
+
+    assert 200 == response.status_code
+    assert {'deleted': [s.id for s in own], 'failed': []} == json.loads(response.data)
+    mock_delete_queues.assert_called_once_with([s.queue for s in own])
+
+    assert all(get_subscription_by_id(s.id) is None for s in own)
+    assert get_subscription_by_id(other.id) is not None
+
+
+@mock.patch('subscription_manager.broker.broker.delete_queues')
+def test_delete_subscriptions_bulk__by_user__queue_failures_are_reported(mock_delete_queues, test_client,
+                                                                        generate_subscription, generate_topic,
+                                                                        test_user, test_admin_user):
+    topic = generate_topic('topic')
+    subscriptions = [generate_subscription(topics=[topic], user=test_user) for _ in range(3)]
+    mock_delete_queues.return_value = {subscriptions[1].queue: 'error'}
+
+    response = test_client.delete(f'{BASE_PATH}/subscriptions/bulk?user_id={test_user.id}',
+                                  headers=basic_auth_header(test_admin_user))
+
+    assert 200 == response.status_code
+    assert {
+        'deleted': [subscriptions[0].id, subscriptions[2].id],
+        'failed': [{'id': subscriptions[1].id, 'queue': subscriptions[1].queue,
+                    'detail': 'Error while accessing the broker: error'}]
+    } == json.loads(response.data)
+
+    assert [subscriptions[1].id] == [s.id for s in get_subscriptions(user_id=test_user.id)]
+
+
+def test_delete_subscriptions_bulk__non_admin_user_by_another_user__returns_403(test_client, test_user,
+                                                                                 test_admin_user):
+    response = test_client.delete(f'{BASE_PATH}/subscriptions/bulk?user_id={test_admin_user.id}',
+                                  headers=basic_auth_header(test_user))
+
+    assert 403 == response.status_code
+
+
+def test_delete_subscriptions_bulk__too_many_ids__returns_400(test_client, test_user):
+    ids = ','.join(str(i) for i in range(301))
+
+    response = test_client.delete(f'{BASE_PATH}/subscriptions/bulk?ids={ids}', headers=basic_auth_header(test_user))
+
+    assert 400 == response.status_code
@@ -0,0 +1,137 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import json
+
+import pytest
+
+from swim_backend.db import db_save
+from subscription_manager import BASE_PATH
+from subscription_manager.db.tokens import get_token_by_id
+from tests.conftest import basic_auth_header
+from tests.subscription_manager.utils import make_token, make_bearer_auth_header, make_basic_auth_header, unique_id
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+@pytest.fixture
+def generate_token(session):
+    def _generate_token(value, user=None, expires_in=3600, revoked=False):
+        token = make_token(value, user=user, expires_in=expires_in, revoked=revoked)
+        return db_save(session, token)
+
+    return _generate_token
+
+
+def test_post_token__unauthorized_user__returns_401(test_client):
+    url = f'{BASE_PATH}/tokens/'
+
+    response = test_client.post(url, headers=make_basic_auth_header('fake_username', 'fake_password'))
+
+    assert 401 == response.status_code
+
+
+def test_post_token__bearer_authentication_is_not_accepted__returns_401(test_client, test_user, generate_token):
+    value = unique_id()
+    generate_token(value, user=test_user)
+
+    url = f'{BASE_PATH}/tokens/'
+
+    response = test_client.post(url, headers=make_bearer_auth_header(value))
+
+    assert 401 == response.status_code
+
+
+def test_post_token__token_is_issued_and_can_be_used_for_authentication(test_client, test_user):
+    url = f'{BASE_PATH}/tokens/'
+
+    response = test_client.post(url, headers=basic_auth_header(test_user))
+
+    assert 201 == response.status_code
+
+    response_data = json.loads(response.data)
+    assert isinstance(response_data['id'], int)
+    assert isinstance(response_data['token'], str)
+    assert response_data['revoked'] is False
+
+    response = test_client.get(f'{BASE_PATH}/ping-credentials',
+                               headers=make_bearer_auth_header(response_data['token']))
+
+    assert 200 == response.status_code
+
+
+@pytest.mark.parametrize('expires_in, revoked', [
+    (-1, False),
+    (3600, True)
+])
+def test_bearer_auth__expired_or_revoked_token__returns_401(test_client, test_user, generate_token, expires_in,
+                                                            revoked):
+    value = unique_id()
+    generate_token(value, user=test_user, expires_in=expires_in, revoked=revoked)
+
+    response = test_client.get(f'{BASE_PATH}/ping-credentials', headers=make_bearer_auth_header(value))
+
+    assert 401 == response.status_code
+
+    response_data = json.loads(response.data)
+    assert 'Invalid token' == response_data['detail']
+
+
+def test_delete_token__token_does_not_exist__returns_404(test_client, test_user):
+    url = f'{BASE_PATH}/tokens/123456'
+
+    response = test_client.delete(url, headers=basic_auth_header(test_user))
+
+    assert 404 == response.status_code
+
+
+def test_delete_token__token_of_another_user__returns_404(test_client, test_user, generate_token):
+    token = generate_token(unique_id())
+
+    url = f'{BASE_PATH}/tokens/{token.id}'
+
+    response = test_client.delete(url, headers=basic_auth_header(test_user))
+
+    assert 404 == response.status_code
+
+
+def test_delete_token__token_is_revoked_and_cannot_be_used_anymore(test_client, test_user, generate_token):
+    value = unique_id()
+    token = generate_token(value, user=test_user)
+
+    url = f'{BASE_PATH}/tokens/{token.id}'
+
+    response = test_client.delete(url, headers=make_bearer_auth_header(value))
+
+    assert 204 == response.status_code
+    assert get_token_by_id(token.id).revoked is True
+
+    response = test_client.get(f'{BASE_PATH}/ping-credentials', headers=make_bearer_auth_header(value))
+
+    assert 401 == response.status_code
@@ -36,7 +36,9 @@ from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from swim_backend.db import db_save
 from subscription_manager import BASE_PATH
 from subscription_manager.broker import broker
+from subscription_manager.db.subscriptions import get_topic_subscriptions
 from subscription_manager.db.topics import get_topic_by_id
+from subscription_manager.events.topic_handlers import delete_topic_subscriptions_handler
 from tests.conftest import DEFAULT_LOGIN_PASS, basic_auth_header
 from tests.subscription_manager.utils import make_topic, make_subscription, make_user, \
     make_basic_auth_header
@@ -145,6 +147,64 @@ def test_get_topics__topics_exist_and_are_returned_as_list(test_client, generate
     assert [t.name for t in topics] == [d['name'] for d in response_data]
 
 
+def test_get_topics__streamed__topics_are_returned_as_list(test_client, generate_topic, test_user):
+    topics = [generate_topic('test_topic_1', user=test_user), generate_topic('test_topic_2', user=test_user)]
+
+    url = f'{BASE_PATH}/topics/?stream=true'
+
+    response = test_client.get(url, headers=basic_auth_header(test_user))
+
+    assert 200 == response.status_code
+
+    response_data = json.loads(response.data)
+    assert isinstance(response_data, list)
+    assert [t.name for t in topics] == [d['name'] for d in response_data]
+
+
+def test_get_topics__etag_is_current__returns_304_without_reading_the_topics(test_client, generate_topic, test_user):
+    generate_topic('test_topic_1', user=test_user)
+
+    url = f'{BASE_PATH}/topics/'
+
+    etag = test_client.get(url, headers=basic_auth_header(test_user)).headers['ETag']
+
+    with mock.patch('subscription_manager.db.topics.get_topics') as mock_get_topics:
+        response = test_client.get(url, headers={**basic_auth_header(test_user), 'If-None-Match': etag})
+
+    assert 304 == response.status_code
+    assert etag == response.headers['ETag']
+    mock_get_topics.assert_not_called()
+
+
+def test_get_topics__topic_is_deleted__etag_changes_and_returns_200(test_client, session, generate_topic, test_user):
+    topic = generate_topic('test_topic_1', user=test_user)
+    generate_topic('test_topic_2', user=test_user)
+
+    url = f'{BASE_PATH}/topics/'
+
+    etag = test_client.get(url, headers=basic_auth_header(test_user)).headers['ETag']
+
+    session.delete(topic)
+    session.commit()
+
+    response = test_client.get(url, headers={**basic_auth_header(test_user), 'If-None-Match': etag})
+
+    assert 200 == response.status_code
+    assert ['test_topic_2'] == [d['name'] for d in json.loads(response.data)]
+
+
+def test_get_topic__etag_is_current__returns_304(test_client, generate_topic, test_user):
+    topic = generate_topic('test_topic', user=test_user)
+
+    url = f'{BASE_PATH}/topics/{topic.id}'
+
+    etag = test_client.get(url, headers=basic_auth_header(test_user)).headers['ETag']
+
+    response = test_client.get(url, headers={**basic_auth_header(test_user), 'If-None-Match': etag})
+
+    assert 304 == response.status_code
+
+
 def test_get_topics_own__unauthorized_user__returns_401(test_client, test_user):
     url = f'{BASE_PATH}/topics/own'
 
@@ -381,3 +441,78 @@ def test_delete_topic__topic_is_deleted_and_returns_204(test_client, generate_to
     # check that the broker queues have been deleted
     for subscription in subscriptions:
         assert broker.get_queue(subscription.queue) is None
+
+
+@mock.patch('subscription_manager.events.topic_handlers.broker')
+def test_delete_topic__queues_cannot_be_deleted__returns_502_and_nothing_is_deleted(mock_broker, test_client,
+                                                                                    generate_topic,
+                                                                                    generate_subscription, test_user):
+    mock_broker.BrokerError = broker.BrokerError
+    topic = generate_topic('test_topic', user=test_user)
+    subscription = generate_subscription(topic=topic, user=test_user)
+    mock_broker.delete_queues.return_value = {subscription.queue: 'error'}
+
+    url = f'{BASE_PATH}/topics/{topic.id}'
+
+    response = test_client.delete(url, headers=basic_auth_header(test_user))
+
+    assert 502 == response.status_code
+
+    # check that neither the topic nor its subscriptions have been deleted from db
+    response = test_client.get(url, headers=basic_auth_header(test_user))
+    assert 200 == response.status_code
+    assert [subscription.id] == [s.id for s in get_topic_subscriptions(topic.id)]
+
+
+@mock.patch('subscription_manager.events.topic_handlers.broker')
+def test_delete_topic_subscriptions_handler__subscription_added_meanwhile__is_kept(mock_broker, generate_topic,
+                                                                                  generate_subscription, test_user):
+    topic = generate_topic('test_topic', user=test_user)
+    subscription = generate_subscription(topic=topic, user=test_user)
+    late_subscriptions = []
+
+    def delete_queues(queues):
+        # a subscription is added to the topic while its queues are being deleted
+        late_subscriptions.append(generate_subscription(topic=topic, user=test_user))
+        return {}
+    mock_broker.delete_queues.side_effect = delete_queues
+
+    delete_topic_subscriptions_handler(topic)
+
+    mock_broker.delete_queues.assert_called_once_with([subscription.queue])
+    assert [late_subscriptions[0].id] == [s.id for s in get_topic_subscriptions(topic.id)]
+
+
+def test_delete_topic__in_background_without_outbox__returns_400(test_client, generate_topic, test_user):
+    topic = generate_topic('test_topic', user=test_user)
+
+    url = f'{BASE_PATH}/topics/{topic.id}?background=true'
+
+    response = test_client.delete(url, headers=basic_auth_header(test_user))
+
+    assert 400 == response.status_code
+
+
+def test_delete_topic__in_background__returns_202_with_the_location_of_the_operation(test_client, generate_topic,
+                                                                                     generate_subscription, test_user):
+    topic = generate_topic('test_topic', user=test_user)
+    for _ in range(3):
+        generate_subscription(topic=topic, user=test_user)
+
+    url = f'{BASE_PATH}/topics/{topic.id}?background=true'
+
+    with mock.patch('subscription_manager.outbox.is_enabled', return_value=True):
+        response = test_client.delete(url, headers=basic_auth_header(test_user))
+
+    assert 202 == response.status_code
+
+    # the topic is deleted later by the outbox worker
+    assert get_topic_by_id(topic.id) is not None
+
+    response = test_client.get(response.headers['Location'], headers=basic_auth_header(test_user))
+    assert 200 == response.status_code
+
+    response_data = json.loads(response.data)
+    assert 'delete_topic' == response_data['action']
+    assert 'test_topic' == response_data['topic']
+    assert {'total': 3, 'deleted': 0} == response_data['progress']
@@ -35,10 +35,12 @@ from sqlalchemy.exc import IntegrityError
 from werkzeug.security import check_password_hash
 
 from subscription_manager import BASE_PATH
+from subscription_manager.auth import credentials_cache
 from swim_backend.auth.auth import HASH_METHOD
 from swim_backend.db import db_save
+from subscription_manager.db.tokens import get_token_by_id
 from subscription_manager.db.users import get_user_by_id
-from tests.subscription_manager.utils import make_user, make_basic_auth_header
+from tests.subscription_manager.utils import make_user, make_basic_auth_header, make_token, unique_id
 from tests.conftest import DEFAULT_LOGIN_PASS
 
 __author__ = "EUROCONTROL (SWIM)"
@@ -401,3 +403,58 @@ def test_put_user__new_password_is_updated_and_hashed_correctly(mock_password_is
 
     assert db_user.password.startswith(HASH_METHOD)
     assert check_password_hash(db_user.password, 'new password') is True
+
+
+@mock.patch('swim_backend.auth.passwords.is_strong', return_value=True)
+def test_put_user__new_password__cached_credentials_are_invalidated(mock_password_is_strong, test_client,
+                                                                    generate_user, test_admin_user):
+    user = generate_user()
+    password_hash = user.password
+    credentials_cache.add(user.username, DEFAULT_LOGIN_PASS, password_hash)
+
+    user_data = {
+        'password': 'new password',
+    }
+
+    url = f'{BASE_PATH}/users/{user.id}'
+
+    response = test_client.put(url, data=json.dumps(user_data), content_type='application/json',
+                               headers=basic_auth_header(test_admin_user))
+
+    assert 200 == response.status_code
+    assert credentials_cache.is_verified(user.username, DEFAULT_LOGIN_PASS, password_hash) is False
+
+
+def test_put_user__user_is_deactivated__cached_credentials_are_invalidated(test_client, generate_user,
+                                                                           test_admin_user):
+    user = generate_user()
+    credentials_cache.add(user.username, DEFAULT_LOGIN_PASS, user.password)
+
+    user_data = {
+        'active': False,
+    }
+
+    url = f'{BASE_PATH}/users/{user.id}'
+
+    response = test_client.put(url, data=json.dumps(user_data), content_type='application/json',
+                               headers=basic_auth_header(test_admin_user))
+
+    assert 200 == response.status_code
+    assert credentials_cache.is_verified(user.username, DEFAULT_LOGIN_PASS, user.password) is False
+
+
+def test_put_user__user_is_deactivated__tokens_are_revoked(test_client, session, generate_user, test_admin_user):
+    user = generate_user()
+    token = db_save(session, make_token(unique_id(), user=user))
+
+    user_data = {
+        'active': False,
+    }
+
+    url = f'{BASE_PATH}/users/{user.id}'
+
+    response = test_client.put(url, data=json.dumps(user_data), content_type='application/json',
+                               headers=basic_auth_header(test_admin_user))
+
+    assert 200 == response.status_code
+    assert get_token_by_id(token.id).revoked is True
@@ -0,0 +1,203 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+from unittest import mock
+
+import pytest
+from prometheus_client import REGISTRY
+
+from swim_backend.db import db_save
+from subscription_manager.auth import CredentialsCache, validate_credentials, credentials_cache, authenticate_admin
+from tests.conftest import DEFAULT_LOGIN_PASS, basic_auth_header
+from tests.subscription_manager.utils import make_token, make_bearer_auth_header, make_basic_auth_header, unique_id
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+def _sample_value(name, labels=None):
+    return REGISTRY.get_sample_value(name, labels or {}) or 0
+
+
+@pytest.fixture(autouse=True)
+def clear_credentials_cache():
+    credentials_cache.clear()
+    yield
+    credentials_cache.clear()
+
+
+def test_credentials_cache__credentials_not_added__is_not_verified():
+    cache = CredentialsCache()
+    misses = _sample_value('subscription_manager_credentials_cache_misses_total')
+
+    assert cache.is_verified('username', 'password', 'hash') is False
+    assert 0 == len(cache)
+    assert misses + 1 == _sample_value('subscription_manager_credentials_cache_misses_total')
+
+
+def test_credentials_cache__credentials_added__is_verified():
+    cache = CredentialsCache()
+    cache.add('username', 'password', 'hash')
+    hits = _sample_value('subscription_manager_credentials_cache_hits_total')
+
+    assert cache.is_verified('username', 'password', 'hash') is True
+    assert 1 == len(cache)
+    assert hits + 1 == _sample_value('subscription_manager_credentials_cache_hits_total')
+
+
+@pytest.mark.parametrize('password, password_hash', [
+    ('wrong password', 'hash'),
+    ('password', 'new hash')
+])
+def test_credentials_cache__password_or_stored_hash_differ__is_not_verified(password, password_hash):
+    cache = CredentialsCache()
+    cache.add('username', 'password', 'hash')
+
+    assert cache.is_verified('username', password, password_hash) is False
+
+
+@mock.patch('subscription_manager.auth.time.monotonic')
+def test_credentials_cache__entry_has_expired__is_not_verified_and_is_evicted(mock_monotonic):
+    mock_monotonic.return_value = 100
+    cache = CredentialsCache(ttl=10)
+    cache.add('username', 'password', 'hash')
+
+    mock_monotonic.return_value = 110
+    evictions = _sample_value('subscription_manager_credentials_cache_evictions_total', {'reason': 'expired'})
+
+    assert cache.is_verified('username', 'password', 'hash') is False
+    assert 0 == len(cache)
+    assert evictions + 1 == _sample_value('subscription_manager_credentials_cache_evictions_total',
+                                          {'reason': 'expired'})
+
+
+def test_credentials_cache__max_size_is_reached__least_recently_used_entry_is_evicted():
+    cache = CredentialsCache(max_size=2)
+    cache.add('username1', 'password', 'hash')
+    cache.add('username2', 'password', 'hash')
+    cache.is_verified('username1', 'password', 'hash')
+    evictions = _sample_value('subscription_manager_credentials_cache_evictions_total', {'reason': 'size'})
+
+    cache.add('username3', 'password', 'hash')
+
+    assert evictions + 1 == _sample_value('subscription_manager_credentials_cache_evictions_total', {'reason': 'size'})
+
+    assert cache.is_verified('username1', 'password', 'hash') is True
+    assert cache.is_verified('username2', 'password', 'hash') is False
+    assert cache.is_verified('username3', 'password', 'hash') is True
+
+
+def test_credentials_cache__max_size_is_zero__nothing_is_cached():
+    cache = CredentialsCache(max_size=0)
+    cache.add('username', 'password', 'hash')
+
+    assert cache.is_verified('username', 'password', 'hash') is False
+
+
+def test_credentials_cache__invalidate():
+    cache = CredentialsCache()
+    cache.add('username', 'password', 'hash')
+
+    cache.invalidate('username')
+
+    assert cache.is_verified('username', 'password', 'hash') is False
+
+
+def test_validate_credentials__invalid_password__raises_value_error(test_user):
+    with pytest.raises(ValueError) as e:
+        validate_credentials(test_user.username, 'wrong password')
+
+    assert 'Invalid credentials' == str(e.value)
+    assert 0 == len(credentials_cache)
+
+
+def test_validate_credentials__verified_credentials__password_hash_is_checked_only_once(test_user):
+    hits = _sample_value('subscription_manager_credentials_cache_hits_total')
+
+    with mock.patch('subscription_manager.auth.check_password_hash', return_value=True) as mock_check_password_hash:
+        assert test_user == validate_credentials(test_user.username, DEFAULT_LOGIN_PASS)
+        assert test_user == validate_credentials(test_user.username, DEFAULT_LOGIN_PASS)
+
+    mock_check_password_hash.assert_called_once_with(test_user.password, DEFAULT_LOGIN_PASS)
+    assert hits + 1 == _sample_value('subscription_manager_credentials_cache_hits_total')
+
+
+def test_validate_credentials__inactive_user__raises_value_error(session, test_user):
+    test_user.active = False
+    session.commit()
+
+    with mock.patch('subscription_manager.auth.check_password_hash', return_value=True):
+        with pytest.raises(ValueError) as e:
+            validate_credentials(test_user.username, DEFAULT_LOGIN_PASS)
+
+    assert 'Invalid credentials' == str(e.value)
+
+
+def test_validate_credentials__user_deactivated_after_being_cached__raises_value_error(session, test_user):
+    with mock.patch('subscription_manager.auth.check_password_hash', return_value=True):
+        validate_credentials(test_user.username, DEFAULT_LOGIN_PASS)
+
+    assert 1 == len(credentials_cache)
+
+    # deactivated without going through the API, i.e. without invalidating the cache
+    test_user.active = False
+    session.commit()
+
+    with pytest.raises(ValueError) as e:
+        validate_credentials(test_user.username, DEFAULT_LOGIN_PASS)
+
+    assert 'Invalid credentials' == str(e.value)
+
+
+@pytest.mark.parametrize('admin_user, is_admin', [(True, True), (False, False)])
+def test_authenticate_admin__basic_credentials__returns_whether_the_user_is_admin(app, test_user, test_admin_user,
+                                                                                  admin_user, is_admin):
+    user = test_admin_user if admin_user else test_user
+
+    with app.test_request_context(headers=basic_auth_header(user)) as context:
+        assert is_admin is authenticate_admin(context.request)
+
+
+@pytest.mark.parametrize('admin_user, is_admin', [(True, True), (False, False)])
+def test_authenticate_admin__bearer_token__returns_whether_the_user_is_admin(app, session, test_user, test_admin_user,
+                                                                             admin_user, is_admin):
+    value = unique_id()
+    db_save(session, make_token(value, user=test_admin_user if admin_user else test_user))
+
+    with app.test_request_context(headers=make_bearer_auth_header(value)) as context:
+        assert is_admin is authenticate_admin(context.request)
+
+
+@pytest.mark.parametrize('headers', [
+    {},
+    make_basic_auth_header('fake_username', 'fake_password'),
+    make_bearer_auth_header('invalid'),
+])
+def test_authenticate_admin__no_or_invalid_credentials__returns_none(app, headers):
+    with app.test_request_context(headers=headers) as context:
+        assert authenticate_admin(context.request) is None
@@ -0,0 +1,131 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import importlib
+import os
+import sys
+from unittest import mock
+
+import pytest
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+@pytest.fixture
+def load_config(monkeypatch, tmp_path):
+    metrics_dir = tmp_path / 'metrics'
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(metrics_dir))
+
+    def _load(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+
+        from subscription_manager import gunicorn_config
+        return importlib.reload(gunicorn_config)
+
+    return _load
+
+
+def test_config__app_is_preloaded_and_metrics_dir_is_emptied(load_config, tmp_path):
+    metrics_dir = tmp_path / 'metrics'
+    metrics_dir.mkdir()
+    (metrics_dir / 'histogram_1.db').write_text('stale')
+
+    config = load_config()
+
+    assert config.preload_app is True
+    assert config.wsgi_app == 'subscription_manager.wsgi:app'
+    assert config.metrics_dir == str(metrics_dir)
+    assert metrics_dir.exists()
+    assert list(metrics_dir.iterdir()) == []
+
+
+@pytest.mark.parametrize('worker_class, expected_threads', [
+    ('sync', 1),
+    ('gthread', 8),
+])
+def test_config__worker_class_is_taken_from_env(load_config, worker_class, expected_threads):
+    config = load_config(GUNICORN_WORKER_CLASS=worker_class, GUNICORN_THREADS='8', GUNICORN_WORKERS='3')
+
+    assert config.worker_class == worker_class
+    assert config.threads == expected_threads
+    assert config.workers == 3
+
+
+@pytest.fixture
+def gevent_modules():
+    gevent, psycogreen = mock.Mock(), mock.Mock()
+    modules = {
+        'gevent': gevent,
+        'gevent.monkey': gevent.monkey,
+        'psycogreen': psycogreen,
+        'psycogreen.gevent': psycogreen.gevent
+    }
+
+    with mock.patch.dict(sys.modules, modules):
+        yield modules
+
+
+def test_config__gevent__stdlib_and_psycopg_are_patched_on_load(load_config, gevent_modules):
+    config = load_config(GUNICORN_WORKER_CLASS='gevent')
+
+    assert config.worker_class == 'gevent'
+    assert config.threads == 1
+    assert config.preload_app is True
+    gevent_modules['gevent.monkey'].patch_all.assert_called_once_with()
+    gevent_modules['psycogreen.gevent'].patch_psycopg.assert_called_once_with()
+
+
+def test_config__gevent_without_psycogreen__raises_importerror(load_config, gevent_modules):
+    with mock.patch.dict(sys.modules, {'psycogreen': None, 'psycogreen.gevent': None}):
+        with pytest.raises(ImportError) as e:
+            load_config(GUNICORN_WORKER_CLASS='gevent')
+
+    assert 'psycogreen is required by the gevent worker class' in str(e.value)
+
+
+def test_post_fork__db_pool_and_broker_session_are_reset(load_config):
+    config = load_config()
+
+    with mock.patch.object(config, '_dispose_db_engine') as mock_dispose_db_engine, \
+            mock.patch('subscription_manager.broker.session.broker_session_pool.reset') as mock_reset:
+        config.post_fork(mock.Mock(), mock.Mock())
+
+    mock_dispose_db_engine.assert_called_once_with()
+    mock_reset.assert_called_once_with()
+
+
+def test_child_exit__metrics_of_the_worker_are_marked_dead(load_config):
+    config = load_config()
+    worker = mock.Mock(pid=os.getpid() + 1)
+
+    with mock.patch('prometheus_client.multiprocess.mark_process_dead') as mock_mark_process_dead:
+        config.child_exit(mock.Mock(), worker)
+
+    mock_mark_process_dead.assert_called_once_with(worker.pid)
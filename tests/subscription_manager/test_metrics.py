@@ -0,0 +1,188 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+from unittest import mock
+
+import pytest
+from prometheus_client import REGISTRY
+from prometheus_client.parser import text_string_to_metric_families
+
+from subscription_manager import BASE_PATH
+from subscription_manager.broker import broker
+from subscription_manager.broker.session import broker_session_pool
+from subscription_manager.metrics import observe_broker_call
+from swim_backend.db import db_save
+from tests.conftest import basic_auth_header
+from tests.subscription_manager.utils import make_token, make_bearer_auth_header, unique_id
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+def _broker_call_count(function, outcome):
+    return REGISTRY.get_sample_value('subscription_manager_broker_call_duration_seconds_count',
+                                     {'function': function, 'outcome': outcome}) or 0
+
+
+def _samples(response):
+    return {sample.name: sample.value
+            for family in text_string_to_metric_families(response.data.decode())
+            for sample in family.samples}
+
+
+def test_observe_broker_call__successful_call_is_recorded():
+    @observe_broker_call
+    def get_something():
+        return 'something'
+
+    count = _broker_call_count('get_something', 'success')
+
+    assert 'something' == get_something()
+    assert count + 1 == _broker_call_count('get_something', 'success')
+
+
+def test_observe_broker_call__nested_broker_functions__one_call_is_recorded_once():
+    count = _broker_call_count('get_queues', 'success')
+
+    with mock.patch('subscription_manager.broker.broker._is_fake', return_value=True), \
+            mock.patch('subscription_manager.broker.broker.fake_broker.management_request', return_value=[]):
+        broker.get_queues()
+
+    assert count + 1 == _broker_call_count('get_queues', 'success')
+    assert 0 == _broker_call_count('management_request', 'success')
+
+
+def test_observe_broker_call__failed_call_is_recorded_and_the_error_is_reraised():
+    @observe_broker_call
+    def _fail_something():
+        raise ValueError('error')
+
+    count = _broker_call_count('fail_something', 'error')
+
+    with pytest.raises(ValueError):
+        _fail_something()
+
+    assert count + 1 == _broker_call_count('fail_something', 'error')
+
+
+def test_metrics__request_latency_is_recorded_per_operation_id(test_client, test_user):
+    labels = {'operation_id': 'subscription_manager.endpoints.topics.get_topics', 'method': 'GET', 'status': '200'}
+    count = REGISTRY.get_sample_value('subscription_manager_request_duration_seconds_count', labels) or 0
+
+    response = test_client.get(f'{BASE_PATH}/topics/', headers=basic_auth_header(test_user))
+    assert 200 == response.status_code
+
+    assert count + 1 == REGISTRY.get_sample_value('subscription_manager_request_duration_seconds_count', labels)
+
+
+def test_metrics__are_exposed_in_prometheus_format(test_client, test_admin_user):
+    response = test_client.get('/metrics', headers=basic_auth_header(test_admin_user))
+
+    assert 200 == response.status_code
+    assert response.content_type.startswith('text/plain')
+
+    data = response.data.decode()
+    assert 'subscription_manager_request_duration_seconds' in data
+    assert 'subscription_manager_sql_duration_seconds' in data
+    assert 'subscription_manager_password_hash_duration_seconds' in data
+
+
+def test_metrics__credentials_cache_counters_are_exposed(test_client, test_admin_user):
+    misses = REGISTRY.get_sample_value('subscription_manager_credentials_cache_misses_total')
+    hits = REGISTRY.get_sample_value('subscription_manager_credentials_cache_hits_total')
+
+    # the credentials are verified (or found in the cache) by the first request and found in the cache by the second
+    test_client.get('/metrics', headers=basic_auth_header(test_admin_user))
+    response = test_client.get('/metrics', headers=basic_auth_header(test_admin_user))
+
+    assert 200 == response.status_code
+
+    samples = _samples(response)
+    assert hits + 1 <= samples['subscription_manager_credentials_cache_hits_total']
+    assert misses + hits + 2 == samples['subscription_manager_credentials_cache_misses_total'] \
+        + samples['subscription_manager_credentials_cache_hits_total']
+
+
+def test_metrics__broker_connection_counters_are_exposed(test_client, test_admin_user, http_server):
+    response = test_client.get('/metrics', headers=basic_auth_header(test_admin_user))
+    samples = _samples(response)
+    connections = samples['subscription_manager_broker_connections_total']
+    requests_ = samples['subscription_manager_broker_requests_total']
+
+    broker_session_pool.reset()
+    for _ in range(3):
+        broker_session_pool.get_session().get(http_server).raise_for_status()
+    # the connection to the local server is not kept for the following tests
+    broker_session_pool.reset()
+
+    response = test_client.get('/metrics', headers=basic_auth_header(test_admin_user))
+
+    assert 200 == response.status_code
+
+    samples = _samples(response)
+    assert connections + 1 == samples['subscription_manager_broker_connections_total']
+    assert requests_ + 3 == samples['subscription_manager_broker_requests_total']
+
+
+def test_metrics__no_credentials__returns_401(test_client):
+    response = test_client.get('/metrics')
+
+    assert 401 == response.status_code
+    assert 'Basic' in response.headers['WWW-Authenticate']
+
+
+def test_metrics__non_admin_user__returns_403(test_client, test_user):
+    response = test_client.get('/metrics', headers=basic_auth_header(test_user))
+
+    assert 403 == response.status_code
+
+
+def test_metrics__admin_user_with_bearer_token__are_exposed(test_client, session, test_admin_user):
+    value = unique_id()
+    db_save(session, make_token(value, user=test_admin_user))
+
+    response = test_client.get('/metrics', headers=make_bearer_auth_header(value))
+
+    assert 200 == response.status_code
+
+
+def test_metrics__public__are_exposed_without_credentials(app, test_client):
+    with mock.patch.dict(app.config['METRICS'], {'public': True}):
+        response = test_client.get('/metrics')
+
+    assert 200 == response.status_code
+
+
+@mock.patch.dict('os.environ', {'PROMETHEUS_MULTIPROC_DIR': '/tmp/metrics'})
+@mock.patch('subscription_manager.metrics.multiprocess.MultiProcessCollector')
+def test_metrics__multiprocess_mode__metrics_are_collected_from_all_the_workers(mock_collector, test_client,
+                                                                                 test_admin_user):
+    response = test_client.get('/metrics', headers=basic_auth_header(test_admin_user))
+
+    assert 200 == response.status_code
+    mock_collector.assert_called_once()
@@ -0,0 +1,220 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+from datetime import datetime, timedelta
+from unittest import mock
+from uuid import uuid4
+
+import pytest
+from flask import current_app
+from sqlalchemy.exc import OperationalError
+
+from swim_backend.db import db_save
+from subscription_manager import outbox
+from subscription_manager.broker.broker import BrokerError
+from subscription_manager.db import OutboxMessage, OutboxStatus, Subscription
+from subscription_manager.db.models import topic_subscriptions_table
+from subscription_manager.db.outbox import claim_outbox_messages
+from subscription_manager.db.topics import get_topic_by_id
+from tests.subscription_manager.utils import make_topic, make_subscription, make_user
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+@pytest.fixture
+def generate_message(session):
+    def _generate_message(action, queue, **payload):
+        message = OutboxMessage(action=action, key=queue, payload=dict(queue=queue, **payload))
+        return db_save(session, message)
+
+    return _generate_message
+
+
+def test_claim_outbox_messages__only_the_earliest_pending_message_per_key_is_claimed(generate_message):
+    first = generate_message(outbox.APPLY_TOPOLOGY, 'queue1', durable=True, topics=['topic1'])
+    generate_message(outbox.DELETE_BINDINGS, 'queue1', topics=['topic1'])
+    other = generate_message(outbox.DELETE_QUEUE, 'queue2')
+
+    assert [first, other] == claim_outbox_messages(batch_size=10)
+
+
+def test_claim_outbox_messages__messages_not_due_yet_are_not_claimed(generate_message, session):
+    message = generate_message(outbox.DELETE_QUEUE, 'queue1')
+    message.available_at = datetime.utcnow() + timedelta(minutes=1)
+    db_save(session, message)
+
+    assert [] == claim_outbox_messages(batch_size=10)
+
+
+@mock.patch('subscription_manager.outbox.broker')
+def test_process_batch__messages_are_applied_in_bulk_per_action(mock_broker, generate_message):
+    mock_broker.delete_queues.return_value = {}
+    mock_broker.delete_bindings.return_value = {}
+    apply1 = generate_message(outbox.APPLY_TOPOLOGY, 'queue1', durable=True, topics=['topic1', 'topic2'])
+    apply2 = generate_message(outbox.APPLY_TOPOLOGY, 'queue2', durable=False, topics=[])
+    delete = generate_message(outbox.DELETE_QUEUE, 'queue3')
+
+    assert 3 == outbox.process_batch()
+
+    mock_broker.apply_definitions.assert_called_once_with({'queue1': True, 'queue2': False},
+                                                          [('queue1', 'topic1'), ('queue1', 'topic2')])
+    mock_broker.delete_queues.assert_called_once_with(['queue3'])
+    for message in (apply1, apply2, delete):
+        assert OutboxStatus.DONE == message.status
+        assert 1 == message.attempts
+        assert message.completed_at is not None
+
+
+@mock.patch('subscription_manager.outbox.broker')
+def test_process_batch__failed_message_is_retried_later(mock_broker, generate_message):
+    mock_broker.delete_queues.return_value = {'queue1': 'error'}
+    failed = generate_message(outbox.DELETE_QUEUE, 'queue1')
+    succeeded = generate_message(outbox.DELETE_QUEUE, 'queue2')
+
+    outbox.process_batch()
+
+    assert OutboxStatus.DONE == succeeded.status
+    assert OutboxStatus.PENDING == failed.status
+    assert 'error' == failed.error
+    assert failed.available_at > datetime.utcnow()
+
+
+@mock.patch('subscription_manager.outbox.broker')
+def test_process_batch__message_fails_after_max_attempts(mock_broker, generate_message, session):
+    mock_broker.BrokerError = BrokerError
+    mock_broker.apply_definitions.side_effect = BrokerError('error')
+    message = generate_message(outbox.APPLY_TOPOLOGY, 'queue1', durable=True, topics=['topic1'])
+    message.attempts = outbox.DEFAULT_MAX_ATTEMPTS - 1
+    db_save(session, message)
+
+    outbox.process_batch()
+
+    assert OutboxStatus.FAILED == message.status
+    assert 'error' == message.error
+
+
+@mock.patch('subscription_manager.outbox.broker')
+def test_process_batch__topic_is_deleted_chunk_by_chunk(mock_broker, session):
+    mock_broker.delete_queues.return_value = {}
+    topic = db_save(session, make_topic())
+    queues = [db_save(session, make_subscription(topics=[topic], user=topic.user)).queue for _ in range(3)]
+    message = db_save(session, OutboxMessage(action=outbox.DELETE_TOPIC, key=f'topic:{topic.id}', payload={
+        'topic_id': topic.id, 'topic': topic.name, 'total': 3, 'deleted': 0, 'finished': False
+    }))
+    topic_id = topic.id
+
+    with mock.patch.dict(current_app.config['OUTBOX'], topic_deletion_chunk_size=2):
+        outbox.process_batch()
+
+        assert OutboxStatus.PENDING == message.status
+        assert 0 == message.attempts
+        assert 2 == message.payload['deleted']
+        assert get_topic_by_id(topic_id) is not None
+
+        outbox.process_batch()
+
+    assert OutboxStatus.DONE == message.status
+    assert 3 == message.payload['deleted']
+    assert message.payload['finished'] is True
+    assert get_topic_by_id(topic_id) is None
+    deleted_queues = [queue for call in mock_broker.delete_queues.call_args_list for queue in call[0][0]]
+    assert sorted(queues) == sorted(deleted_queues)
+
+
+@pytest.fixture
+def save_committed(db, session):
+    """
+    Saves instances with a session that really commits, like the one of the outbox worker, instead of the one of the
+    test transaction. The saved rows that remain are deleted afterwards.
+    """
+    committed_session = db.create_scoped_session()
+    db.session = committed_session
+    saved = []
+
+    def _save(instance):
+        db_save(committed_session, instance)
+        saved.append((type(instance), instance.id))
+        return instance
+
+    yield _save
+
+    committed_session.rollback()
+    subscription_ids = [instance_id for model, instance_id in saved if model is Subscription]
+    if subscription_ids:
+        committed_session.execute(topic_subscriptions_table.delete().where(
+            topic_subscriptions_table.c.subscription_id.in_(subscription_ids)))
+    for model, instance_id in reversed(saved):
+        model.query.filter_by(id=instance_id).delete(synchronize_session=False)
+    committed_session.commit()
+    committed_session.remove()
+
+    db.session = session
+
+
+def _write_versioned_tables(db):
+    connection = db.engine.connect()
+    transaction = connection.begin()
+    try:
+        connection.execute("SET LOCAL lock_timeout = '1s'")
+        # the statement triggers bump the versions even though no row matches
+        for table in ('topics', 'subscriptions', 'topic_subscriptions'):
+            connection.execute(f"DELETE FROM {table} WHERE false")
+    finally:
+        transaction.rollback()
+        connection.close()
+
+
+@mock.patch('subscription_manager.outbox.broker')
+def test_process_batch__deleting_topics__concurrent_writes_are_not_blocked_by_the_broker_calls(mock_broker, db,
+                                                                                               save_committed):
+    user = save_committed(make_user())
+    messages = []
+    for _ in range(2):
+        topic = save_committed(make_topic(name=uuid4().hex, user=user))
+        save_committed(make_subscription(topics=[topic], user=user))
+        messages.append(save_committed(OutboxMessage(action=outbox.DELETE_TOPIC, key=f'topic:{topic.id}', payload={
+            'topic_id': topic.id, 'topic': topic.name, 'total': 1, 'deleted': 0, 'finished': False
+        })))
+
+    lock_errors = []
+
+    def delete_queues(queues):
+        try:
+            _write_versioned_tables(db)
+        except OperationalError as e:
+            lock_errors.append(e)
+        return {}
+
+    mock_broker.delete_queues.side_effect = delete_queues
+
+    assert 2 == outbox.process_batch()
+
+    assert 2 == mock_broker.delete_queues.call_count
+    assert [] == lock_errors
+    assert [OutboxStatus.DONE, OutboxStatus.DONE] == [message.status for message in messages]
@@ -0,0 +1,146 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+from unittest import mock
+
+from subscription_manager import reconciler
+from subscription_manager.broker.broker import BrokerError
+from subscription_manager.reconciler import Topology
+
+__author__ = "EUROCONTROL (SWIM)"
+
+QUEUE1 = 'a' * 32
+QUEUE2 = 'b' * 32
+QUEUE3 = 'c' * 32
+
+
+def test_is_managed_queue():
+    assert reconciler.is_managed_queue(QUEUE1) is True
+    assert reconciler.is_managed_queue('amq.gen-queue') is False
+    assert reconciler.is_managed_queue(QUEUE1 + 'x') is False
+
+
+def test_diff__no_drift():
+    topology = Topology(queues={QUEUE1: True}, bindings={(QUEUE1, 'topic1')})
+
+    report = reconciler.diff(topology, Topology(queues={QUEUE1: True}, bindings={(QUEUE1, 'topic1')}))
+
+    assert report.has_drift is False
+
+
+def test_diff__missing_and_extra_topology_is_detected():
+    expected = Topology(queues={QUEUE1: True, QUEUE2: False}, bindings={(QUEUE1, 'topic1'), (QUEUE2, 'topic1')})
+    actual = Topology(queues={QUEUE1: True, QUEUE3: True}, bindings={(QUEUE1, 'topic2'), (QUEUE3, 'topic1')})
+
+    report = reconciler.diff(expected, actual)
+
+    assert {QUEUE2: False} == report.missing_queues
+    assert {(QUEUE1, 'topic1'), (QUEUE2, 'topic1')} == report.missing_bindings
+    assert {QUEUE3} == report.orphan_queues
+    # the binding of the orphan queue is not reported as it is deleted along with the queue
+    assert {(QUEUE1, 'topic2')} == report.stale_bindings
+
+
+@mock.patch('subscription_manager.reconciler.broker')
+def test_get_actual_topology__unmanaged_queues_are_ignored(mock_broker):
+    mock_broker.get_queues.return_value = {QUEUE1: True, 'other': True}
+    mock_broker.get_topic_bindings.return_value = {(QUEUE1, 'topic1'), ('other', 'topic1')}
+
+    topology = reconciler.get_actual_topology()
+
+    assert {QUEUE1: True} == topology.queues
+    assert {(QUEUE1, 'topic1')} == topology.bindings
+
+
+@mock.patch('subscription_manager.reconciler.db')
+def test_get_expected_topology__bindings_of_active_subscriptions_only(mock_db):
+    mock_db.iter_subscriptions_topology.return_value = iter([
+        (QUEUE1, True, True, 'topic1'),
+        (QUEUE1, True, True, 'topic2'),
+        (QUEUE2, False, False, 'topic1'),
+        (QUEUE3, True, True, None),
+    ])
+
+    topology = reconciler.get_expected_topology()
+
+    assert {QUEUE1: True, QUEUE2: False, QUEUE3: True} == topology.queues
+    assert {(QUEUE1, 'topic1'), (QUEUE1, 'topic2')} == topology.bindings
+
+
+def _mock_topologies(mock_get_expected_topology, mock_get_actual_topology):
+    mock_get_expected_topology.return_value = Topology(queues={QUEUE1: True, QUEUE2: True},
+                                                       bindings={(QUEUE1, 'topic1'), (QUEUE2, 'topic1')})
+    mock_get_actual_topology.return_value = Topology(queues={QUEUE1: True, QUEUE3: True},
+                                                     bindings={(QUEUE1, 'topic2')})
+
+
+@mock.patch('subscription_manager.reconciler.broker')
+@mock.patch('subscription_manager.reconciler.get_actual_topology')
+@mock.patch('subscription_manager.reconciler.get_expected_topology')
+def test_reconcile__dry_run__nothing_is_changed(mock_get_expected_topology, mock_get_actual_topology, mock_broker):
+    _mock_topologies(mock_get_expected_topology, mock_get_actual_topology)
+
+    report = reconciler.reconcile(dry_run=True)
+
+    assert report.has_drift is True
+    mock_broker.apply_definitions.assert_not_called()
+    mock_broker.delete_bindings.assert_not_called()
+    mock_broker.delete_queues.assert_not_called()
+
+
+@mock.patch('subscription_manager.reconciler.broker')
+@mock.patch('subscription_manager.reconciler.get_actual_topology')
+@mock.patch('subscription_manager.reconciler.get_expected_topology')
+def test_reconcile__only_the_differences_are_applied(mock_get_expected_topology, mock_get_actual_topology,
+                                                     mock_broker):
+    _mock_topologies(mock_get_expected_topology, mock_get_actual_topology)
+    mock_broker.delete_bindings.return_value = {}
+    mock_broker.delete_queues.return_value = {}
+
+    report = reconciler.reconcile()
+
+    mock_broker.apply_definitions.assert_called_once_with({QUEUE2: True}, [(QUEUE1, 'topic1'), (QUEUE2, 'topic1')])
+    mock_broker.delete_bindings.assert_called_once_with([(QUEUE1, 'topic2')])
+    mock_broker.delete_queues.assert_called_once_with([QUEUE3])
+    assert [] == report.errors
+
+
+@mock.patch('subscription_manager.reconciler.broker')
+@mock.patch('subscription_manager.reconciler.get_actual_topology')
+@mock.patch('subscription_manager.reconciler.get_expected_topology')
+def test_reconcile__errors_are_reported(mock_get_expected_topology, mock_get_actual_topology, mock_broker):
+    _mock_topologies(mock_get_expected_topology, mock_get_actual_topology)
+    mock_broker.BrokerError = BrokerError
+    mock_broker.apply_definitions.side_effect = BrokerError('upload error')
+    mock_broker.delete_bindings.return_value = {}
+    mock_broker.delete_queues.return_value = {QUEUE3: 'delete error'}
+
+    report = reconciler.reconcile()
+
+    assert ['upload error', f'Error while deleting queue {QUEUE3}: delete error'] == report.errors
@@ -0,0 +1,104 @@
+"""
+Copyright 2019 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted provided that the 
+following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following 
+   disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following 
+   disclaimer in the documentation and/or other materials provided with the distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products 
+   derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, 
+INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE 
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR 
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE 
+USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open Source Initiative: 
+http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+import shutil
+from unittest import mock
+
+import pytest
+from connexion.exceptions import InvalidSpecification
+
+from subscription_manager import spec_cache
+
+__author__ = "EUROCONTROL (SWIM)"
+
+
+@pytest.fixture
+def spec_file(tmp_path):
+    path = tmp_path / 'openapi.yml'
+    shutil.copy(str(spec_cache.SPEC_FILE), str(path))
+
+    return path
+
+
+def test_build__artifact_is_loaded_as_long_as_the_spec_does_not_change(spec_file, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+
+    path = spec_cache.build(spec_file, cache_dir)
+
+    assert path.exists()
+    assert spec_cache.spec_hash(spec_file) in path.name
+
+    spec = spec_cache.load(spec_file, cache_dir)
+    assert spec['openapi'].startswith('3.')
+
+    spec_file.write_text(spec_file.read_text() + '\n# changed\n')
+
+    assert spec_cache.load(spec_file, cache_dir) is None
+
+
+def test_build__invalid_spec__raises_invalidspecification_and_no_artifact_is_stored(spec_file, tmp_path):
+    spec_file.write_text('openapi: 3.0.0\ninfo: {}\npaths: {}\n')
+
+    with pytest.raises(InvalidSpecification):
+        spec_cache.build(spec_file, str(tmp_path))
+
+    assert spec_cache.load(spec_file, str(tmp_path)) is None
+
+
+def test_add_api__no_artifact__spec_is_parsed_and_the_spec_of_connexion_is_stored(spec_file, tmp_path):
+    connexion_app = mock.Mock()
+    connexion_app.add_api.return_value.specification.raw = {'openapi': '3.0.0', 'paths': {}}
+
+    api = spec_cache.add_api(connexion_app, spec_file, str(tmp_path), strict_validation=True)
+
+    assert api == connexion_app.add_api.return_value
+    spec, = connexion_app.add_api.call_args[0]
+    assert spec['openapi'].startswith('3.')
+    assert connexion_app.add_api.call_args[1] == {'strict_validation': True}
+    assert spec_cache.load(spec_file, str(tmp_path)) == {'openapi': '3.0.0', 'paths': {}}
+
+
+def test_add_api__artifact_exists__spec_is_not_parsed(spec_file, tmp_path):
+    spec_cache.build(spec_file, str(tmp_path))
+    connexion_app = mock.Mock()
+
+    with mock.patch.object(spec_cache, '_parse') as mock_parse:
+        spec_cache.add_api(connexion_app, spec_file, str(tmp_path), strict_validation=True)
+
+    mock_parse.assert_not_called()
+    connexion_app.add_api.assert_called_once_with(spec_cache.load(spec_file, str(tmp_path)), strict_validation=True)
+
+
+def test_add_api__disabled__spec_file_is_passed_to_connexion(spec_file, tmp_path):
+    connexion_app = mock.Mock()
+
+    spec_cache.add_api(connexion_app, spec_file, str(tmp_path), enabled=False)
+
+    connexion_app.add_api.assert_called_once_with(spec_file)
+    assert spec_cache.load(spec_file, str(tmp_path)) is None
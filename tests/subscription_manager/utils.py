@@ -28,10 +28,15 @@ http://opensource.org/licenses/BSD-3-Clause
 Details on EUROCONTROL: http://www.eurocontrol.int
 """
 from base64 import b64encode
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from uuid import uuid4
 
+from sqlalchemy import event
+
 from swim_backend.auth.auth import hash_password
-from subscription_manager.db import Topic, Subscription, User
+from subscription_manager.db import Topic, Subscription, User, Token
+from subscription_manager.db.utils import hash_token
 
 __author__ = "EUROCONTROL (SWIM)"
 
@@ -70,9 +75,39 @@ def make_user(username: str = 'username', password: str = 'password', is_admin:
     )
 
 
+def make_token(value: str, user=None, expires_in: int = 3600, revoked: bool = False) -> Token:
+    return Token(
+        token_hash=hash_token(value),
+        user=user or make_user(),
+        expires_at=datetime.utcnow() + timedelta(seconds=expires_in),
+        revoked=revoked
+    )
+
+
 def make_basic_auth_header(username, password):
     basic_auth_str = b64encode(bytes(f'{username}:{password}', 'utf-8'))
 
     result = {'Authorization': f"Basic {basic_auth_str.decode('utf-8')}"}
 
     return result
+
+
+def make_bearer_auth_header(token):
+    return {'Authorization': f"Bearer {token}"}
+
+
+@contextmanager
+def count_queries(engine):
+    """
+    Collects the SQL statements executed by the given engine within the context
+    """
+    statements = []
+
+    def _collect(conn, cursor, statement, *args, **kwargs):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', _collect)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', _collect)